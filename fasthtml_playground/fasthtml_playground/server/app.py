@@ -1,12 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 
+from summary_cache import SummaryCache, summary_version
 
 app = FastAPI(debug=True)
 
+summary_cache = SummaryCache(max_bytes=64 * 1024 * 1024)
 
-@app.get("/dummy-summary")
-async def get_dummy_summary():
-    html_content = """
+DUMMY_SUMMARY = """
     <html>
         <head>
             <title>Dummy Summary</title>
@@ -29,7 +29,46 @@ async def get_dummy_summary():
         </body>
     </html>
     """
-    return {"result": {"id": "dummy-001", "summary": html_content}}
+
+# Summary id -> raw HTML; a real store would also hand back its own version
+SUMMARIES = {"dummy-001": DUMMY_SUMMARY}
+
+
+def summary_response(summary_id: str, request: Request) -> Response:
+    html = SUMMARIES.get(summary_id)
+    if html is None:
+        raise HTTPException(status_code=404, detail=f"Summary {summary_id} not found")
+
+    cached = summary_cache.respond(
+        summary_id,
+        summary_version(html),
+        html,
+        if_none_match=request.headers.get("if-none-match"),
+        accept_encoding=request.headers.get("accept-encoding"),
+    )
+    return Response(
+        content=cached.body,
+        status_code=cached.status_code,
+        headers=cached.headers,
+        media_type="application/json" if cached.status_code == 200 else None,
+    )
+
+
+# Plain def: a cache miss renders and compresses the HTML, which is CPU work,
+# so FastAPI runs these handlers in its threadpool instead of the event loop
+@app.get("/dummy-summary")
+def get_dummy_summary(request: Request):
+    return summary_response("dummy-001", request)
+
+
+@app.get("/summaries/{summary_id}")
+def get_summary(summary_id: str, request: Request):
+    return summary_response(summary_id, request)
+
+
+@app.get("/summary-cache/stats")
+async def get_summary_cache_stats():
+    return summary_cache.stats()
 
 
 @app.get("/")
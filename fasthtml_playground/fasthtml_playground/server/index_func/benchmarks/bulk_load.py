@@ -0,0 +1,52 @@
+"""
+Ingest speed into a fresh index with its live settings against bulk-load
+mode, end to end (bulk-load mode includes restoring settings, refresh,
+force merge and waiting for green).
+
+    python -m index_func.benchmarks.bulk_load --docs 50000
+"""
+
+import argparse
+import time
+
+from index_func.benchmarks.insight_ingest import make_docs
+from index_func.datamodels.mapping import index_mapping
+from index_func.datamodels.model import Insight
+from index_func.utils.os_utils import (
+    bulk_index,
+    bulk_load_mode,
+    connect_to_opensearch,
+    create_index,
+    delete_index,
+)
+
+
+def ingest(os_client, index_name: str, docs, bulk_load: bool) -> float:
+    create_index(os_client, index_name, body=index_mapping)
+    try:
+        start_time = time.perf_counter()
+        if bulk_load:
+            with bulk_load_mode(os_client, index_name, force_merge_segments=1):
+                bulk_index(os_client, index_name, docs)
+        else:
+            bulk_index(os_client, index_name, docs)
+            os_client.indices.refresh(index=index_name)
+        return time.perf_counter() - start_time
+    finally:
+        delete_index(os_client, index_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--index-prefix", default="bulk-load-benchmark")
+    args = parser.parse_args()
+
+    os_client = connect_to_opensearch()
+    docs = make_docs(Insight, args.docs)
+
+    normal = ingest(os_client, f"{args.index_prefix}-normal", docs, bulk_load=False)
+    bulk = ingest(os_client, f"{args.index_prefix}-bulk", docs, bulk_load=True)
+    print(f"normal mode:    {normal:8.1f}s {args.docs / normal:8.0f} docs/s")
+    print(f"bulk-load mode: {bulk:8.1f}s {args.docs / bulk:8.0f} docs/s")
+    print(f"speedup:        {normal / bulk:8.2f}x")
@@ -0,0 +1,115 @@
+"""
+Memory per document and bulk serialization rate of Insight, against the
+previous representation (list vector, asdict + json.dumps(default=str)).
+
+    python -m index_func.benchmarks.insight_ingest --docs 20000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import MISSING, asdict, field, fields, make_dataclass
+from datetime import datetime
+from typing import Callable, List
+
+from index_func.datamodels.model import Insight
+from index_func.utils.serialization import VECTOR_FIELD, upsert_entry
+
+DIMENSION = 384
+
+# The previous Insight: same fields, vector as a list of Python floats
+LegacyInsight = make_dataclass(
+    "LegacyInsight",
+    [
+        (
+            f.name,
+            List[float] if f.name == VECTOR_FIELD else f.type,
+            (
+                field(default_factory=f.default_factory)
+                if f.default_factory is not MISSING
+                else field()
+            ),
+        )
+        for f in fields(Insight)
+    ],
+)
+
+
+def legacy_entry(index_name: str, doc) -> tuple:
+    """
+    The previous bulk serialization, kept as the reference.
+    """
+    doc_data = asdict(doc)
+    action = {"update": {"_index": index_name, "_id": doc_data["docid"]}}
+    if doc.date:
+        doc_data["date"] = doc.date.isoformat()
+    doc_action = {"doc": doc_data, "doc_as_upsert": True}
+    return (
+        doc_data["docid"],
+        json.dumps(action, default=str),
+        json.dumps(doc_action, default=str),
+    )
+
+
+def make_docs(cls: Callable, count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        cls(
+            docid=f"doc-{i}",
+            insight=f"Insight {i}: customers asked about dosing and availability.",
+            insight_vector=[rng.uniform(-1, 1) for _ in range(DIMENSION)],
+            sentiment_score=rng.uniform(-1, 1),
+            date=datetime(2025, 1, 1 + i % 28),
+            product="product",
+            country="country",
+            region="region",
+            themes=["access", "safety"],
+            business_unit=["oncology"],
+        )
+        for i in range(count)
+    ]
+
+
+def bytes_per_doc(cls: Callable, count: int) -> float:
+    tracemalloc.start()
+    try:
+        docs = make_docs(cls, count)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del docs
+    return size / count
+
+
+def serialization_rate(serialize: Callable, docs: list) -> tuple:
+    start_time = time.perf_counter()
+    total = 0
+    for doc in docs:
+        _, action, source = serialize("insights", doc)
+        total += len(action) + len(source) + 2
+    seconds = time.perf_counter() - start_time
+    return len(docs) / seconds, total / seconds / 1024 / 1024, total / len(docs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(
+        f"{'representation':>16} {'KB/doc':>7} {'docs/s':>8} {'MB/s':>6} {'KB/line':>8}"
+    )
+    for name, cls, serialize in (
+        ("list + asdict", LegacyInsight, legacy_entry),
+        ("slots + float32", Insight, upsert_entry),
+    ):
+        memory = bytes_per_doc(cls, min(args.docs, 5000))
+        docs_per_second, megabytes_per_second, line_bytes = serialization_rate(
+            serialize, make_docs(cls, args.docs)
+        )
+        print(
+            f"{name:>16} {memory / 1024:>7.1f} {docs_per_second:>8.0f} "
+            f"{megabytes_per_second:>6.1f} {line_bytes / 1024:>8.1f}"
+        )
@@ -0,0 +1,55 @@
+"""
+Rows/s from a Parquet export to bulk NDJSON entries: columnar ingest against
+building an Insight per row and serializing it.
+
+    python -m index_func.benchmarks.parquet_ingest --rows 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from index_func.benchmarks.insight_ingest import DIMENSION, make_docs
+from index_func.datamodels.model import Insight
+from index_func.ingest import file_entries, read_batches
+from index_func.utils.serialization import SOURCE_FIELDS, VECTOR_FIELD, upsert_entry
+
+
+def write_export(path: str, rows: int) -> None:
+    docs = make_docs(Insight, rows)
+    columns = {name: [getattr(doc, name) for doc in docs] for name in SOURCE_FIELDS}
+    columns[VECTOR_FIELD] = pa.array(
+        [doc.insight_vector.tolist() for doc in docs], pa.list_(pa.float32(), DIMENSION)
+    )
+    pq.write_table(pa.table(columns), path)
+
+
+def row_entries(path: str):
+    for record_batch in read_batches(path):
+        for row in record_batch.to_pylist():
+            yield upsert_entry("insights", Insight(**row))
+
+
+def rows_per_second(entries) -> float:
+    start_time = time.perf_counter()
+    rows = sum(1 for _ in entries)
+    return rows / (time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "insights.parquet")
+        write_export(path, args.rows)
+        print(f"row-wise Insight: {rows_per_second(row_entries(path)):8.0f} rows/s")
+        print(
+            f"columnar ingest:  "
+            f"{rows_per_second(file_entries(path, 'insights')):8.0f} rows/s"
+        )
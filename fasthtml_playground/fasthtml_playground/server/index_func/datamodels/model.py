@@ -1,13 +1,15 @@
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import List, Sequence
 
 
-@dataclass
+@dataclass(slots=True)
 class Insight:
     docid: str
     insight: str
-    insight_vector: List[float]
+    # float32, as stored by the knn_vector field; lists are converted on init
+    insight_vector: Sequence[float]
     sentiment_score: float
 
     date: datetime
@@ -29,3 +31,10 @@ class Insight:
     disease_indication_3: List[str] = field(default_factory=list)
     disease_indication_4: List[str] = field(default_factory=list)
     disease_indication_5: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not (
+            isinstance(self.insight_vector, array)
+            and self.insight_vector.typecode == "f"
+        ):
+            self.insight_vector = array("f", self.insight_vector)
@@ -0,0 +1,231 @@
+"""
+Embedding stage that fills Insight.insight_vector before indexing.
+
+Insights are streamed through in windows. Within a window, identical texts
+are embedded once, texts already in the on-disk cache are not embedded at
+all, and the rest go to the model in length-sorted batches. It plugs in
+front of bulk_index:
+
+    embedder = SentenceTransformerEmbedder()
+    with EmbeddingCache("embeddings.sqlite", embedder.model_name) as cache:
+        bulk_index(os_client, index_name, embed_insights(insights, embedder, cache))
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from loguru import logger
+
+from index_func.datamodels.mapping import index_mapping
+from index_func.datamodels.model import Insight
+from index_func.utils.generic_utils import batch
+
+DIMENSION = index_mapping["mappings"]["properties"]["insight_vector"]["dimension"]
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# sqlite limits the number of bound parameters per statement
+_SQLITE_CHUNK = 500
+
+
+def text_key(text: str) -> bytes:
+    """
+    Content hash of an insight text, the deduplication and cache key.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class SentenceTransformerEmbedder:
+    """
+    CPU embedder backed by sentence-transformers, imported on first use.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, device: str = "cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SentenceTransformerEmbedder needs sentence-transformers: "
+                "install the embeddings extra"
+            ) from e
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device=device)
+
+    def __call__(self, texts: List[str]) -> Sequence[Sequence[float]]:
+        return self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+
+class EmbeddingCache:
+    """
+    Persistent float32 embeddings keyed by text hash, in a sqlite file.
+
+    The model name is stored with the file; opening it for another model
+    starts from an empty cache, as its vectors would not be comparable.
+    """
+
+    def __init__(self, path: str, model_name: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self.model_name = model_name
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB)"
+        )
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+        if row is not None and row[0] != model_name:
+            logger.warning(
+                f"Embedding cache {path} was built with {row[0]}, clearing it for "
+                f"{model_name}"
+            )
+            self._db.execute("DELETE FROM embeddings")
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('model', ?)", (model_name,)
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, array]:
+        found = {}
+        for start in range(0, len(keys), _SQLITE_CHUNK):
+            chunk = keys[start : start + _SQLITE_CHUNK]
+            rows = self._db.execute(
+                "SELECT key, vector FROM embeddings "
+                f"WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, vector in rows:
+                found[key] = array("f", vector)
+        return found
+
+    def put_many(self, vectors: Dict[bytes, array]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+            [(key, vector.tobytes()) for key, vector in vectors.items()],
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def embed_insights(
+    insights: Iterable[Insight],
+    embed: Callable[[List[str]], Sequence[Sequence[float]]],
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 64,
+    window: int = 4096,
+    stats: Optional[Dict[str, float]] = None,
+) -> Iterator[Insight]:
+    """
+    Yield the insights in input order with insight_vector filled in.
+
+    Insights that already carry a vector pass through untouched. Insights
+    with the same text share one embedding (and one array).
+
+    Args:
+        insights: Any iterable or generator of insights
+        embed: Callable embedding a list of texts into DIMENSION-long vectors
+        cache: On-disk cache consulted before, and filled after, embedding
+        batch_size: Texts per embed call; texts are sorted by length first so
+            a batch pads to similar lengths
+        window: Insights read ahead and deduplicated together; memory is
+            bounded by it
+        stats: Dict receiving texts, unique_texts, cache_hits, embedded,
+            seconds, texts_per_second and cache_hit_rate as insights stream
+    """
+    stats = {} if stats is None else stats
+    stats.update(texts=0, unique_texts=0, cache_hits=0, embedded=0, seconds=0.0)
+    stats.update(texts_per_second=0.0, cache_hit_rate=0.0)
+
+    pending: List[Insight] = []
+    for insight in insights:
+        pending.append(insight)
+        if len(pending) >= window:
+            _fill_vectors(pending, embed, cache, batch_size, stats)
+            yield from pending
+            pending = []
+    if pending:
+        _fill_vectors(pending, embed, cache, batch_size, stats)
+        yield from pending
+
+    logger.info(
+        f"Embedded {stats['texts']} texts ({stats['unique_texts']} unique, "
+        f"{stats['cache_hits']} from cache) at {stats['texts_per_second']:.0f} "
+        f"texts/s, cache hit rate {stats['cache_hit_rate']:.1%}"
+    )
+
+
+def _fill_vectors(
+    insights: List[Insight],
+    embed: Callable[[List[str]], Sequence[Sequence[float]]],
+    cache: Optional[EmbeddingCache],
+    batch_size: int,
+    stats: Dict[str, float],
+) -> None:
+    start_time = time.perf_counter()
+    todo = [insight for insight in insights if not len(insight.insight_vector)]
+    keys = [text_key(insight.insight) for insight in todo]
+    texts: Dict[bytes, str] = {}
+    for key, insight in zip(keys, todo):
+        texts.setdefault(key, insight.insight)
+
+    vectors = cache.get_many(list(texts)) if cache is not None else {}
+    hits = len(vectors)
+
+    misses = sorted(
+        (key for key in texts if key not in vectors), key=lambda key: len(texts[key])
+    )
+    embedded: Dict[bytes, array] = {}
+    for batch_keys in batch(misses, batch_size):
+        for key, vector in zip(batch_keys, embed([texts[key] for key in batch_keys])):
+            # numpy rows are copied as raw float32 bytes
+            if hasattr(vector, "astype"):
+                vector = array("f", vector.astype("float32").tobytes())
+            else:
+                vector = array("f", vector)
+            if len(vector) != DIMENSION:
+                raise ValueError(
+                    f"embedding has {len(vector)} dimensions, mapping has {DIMENSION}"
+                )
+            embedded[key] = vector
+    if cache is not None and embedded:
+        cache.put_many(embedded)
+    vectors.update(embedded)
+
+    for key, insight in zip(keys, todo):
+        insight.insight_vector = vectors[key]
+
+    stats["texts"] += len(todo)
+    stats["unique_texts"] += len(texts)
+    stats["cache_hits"] += hits
+    stats["embedded"] += len(embedded)
+    stats["seconds"] += time.perf_counter() - start_time
+    if stats["seconds"]:
+        stats["texts_per_second"] = stats["texts"] / stats["seconds"]
+    if stats["unique_texts"]:
+        stats["cache_hit_rate"] = stats["cache_hits"] / stats["unique_texts"]
@@ -0,0 +1,313 @@
+"""
+Columnar ingest: Parquet or Arrow IPC files straight to bulk NDJSON.
+
+Rows are never turned into Insight objects. Each record batch is validated
+against index_mapping once, every column is JSON-encoded as a whole, and
+the encoded columns are zipped into upsert lines.
+
+    python -m index_func.ingest insights.parquet --index insights_test_1
+    python -m index_func.ingest insights.parquet --index insights --output bulk.ndjson
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from index_func.datamodels.mapping import index_mapping
+from index_func.datamodels.results import Result, T
+from index_func.utils.serialization import VECTOR_FIELD, vector_to_json
+
+ID_FIELD = "docid"
+
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Columnar ingest needs pyarrow: install the parquet extra")
+
+
+def _is_string(data_type) -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def _is_list(data_type) -> bool:
+    return (
+        pa.types.is_list(data_type)
+        or pa.types.is_large_list(data_type)
+        or pa.types.is_fixed_size_list(data_type)
+    )
+
+
+def _type_problem(name: str, data_type, spec: Dict[str, Any]) -> Optional[str]:
+    # keyword fields may hold one value or a list of values
+    field_type = spec["type"]
+    if field_type in ("keyword", "text"):
+        if _is_string(data_type):
+            return None
+        if field_type == "keyword" and _is_list(data_type):
+            if _is_string(data_type.value_type) or pa.types.is_null(
+                data_type.value_type
+            ):
+                return None
+    elif field_type in ("float", "half_float", "double", "scaled_float"):
+        if pa.types.is_floating(data_type) or pa.types.is_integer(data_type):
+            return None
+    elif field_type in ("integer", "long", "short", "byte"):
+        if pa.types.is_integer(data_type):
+            return None
+    elif field_type == "date":
+        if (
+            pa.types.is_timestamp(data_type)
+            or pa.types.is_date(data_type)
+            or _is_string(data_type)
+        ):
+            return None
+    elif field_type == "knn_vector":
+        if _is_list(data_type) and (
+            pa.types.is_floating(data_type.value_type)
+            or pa.types.is_integer(data_type.value_type)
+        ):
+            if (
+                pa.types.is_fixed_size_list(data_type)
+                and data_type.list_size != spec["dimension"]
+            ):
+                return (
+                    f"{name}: {data_type.list_size} dimensions, "
+                    f"mapping has {spec['dimension']}"
+                )
+            return None
+    else:
+        return None
+    return f"{name}: {data_type} does not fit mapping type {field_type}"
+
+
+def validate_schema(schema, mapping: Dict[str, Any] = index_mapping) -> List[str]:
+    """
+    Problems that would make the columns index differently from the mapping:
+    missing id or vector column, columns the mapping does not know, and column
+    types that do not fit the mapped field type.
+    """
+    _require_pyarrow()
+    properties = mapping["mappings"]["properties"]
+    problems = []
+    for required in (ID_FIELD, VECTOR_FIELD):
+        if required not in schema.names:
+            problems.append(f"{required}: column is missing")
+    if ID_FIELD in schema.names and not _is_string(schema.field(ID_FIELD).type):
+        problems.append(f"{ID_FIELD}: ids must be strings")
+    for schema_field in schema:
+        spec = properties.get(schema_field.name)
+        if spec is None:
+            problems.append(f"{schema_field.name}: not in the index mapping")
+            continue
+        problem = _type_problem(schema_field.name, schema_field.type, spec)
+        if problem:
+            problems.append(problem)
+    return problems
+
+
+def read_batches(path: Path, batch_size: int = 4096) -> Iterator["pa.RecordBatch"]:
+    """
+    Memory-mapped record batches of at most batch_size rows from a Parquet
+    file, or an Arrow IPC file (.arrow, .feather, .ipc).
+    """
+    _require_pyarrow()
+    path = Path(path)
+    if path.suffix in ARROW_SUFFIXES:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                record_batch = reader.get_batch(i)
+                for offset in range(0, record_batch.num_rows, batch_size):
+                    yield record_batch.slice(offset, batch_size)
+    else:
+        parquet_file = pq.ParquetFile(str(path), memory_map=True)
+        yield from parquet_file.iter_batches(batch_size=batch_size)
+
+
+def _encode_column(column, spec: Dict[str, Any]) -> List[str]:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    field_type = spec["type"]
+
+    if field_type == "knn_vector":
+        # float32, as Insight holds it; raises if a row has the wrong dimension
+        dimension = spec["dimension"]
+        column = column.cast(pa.list_(pa.float32(), dimension))
+        values = column.flatten().to_numpy(zero_copy_only=False)
+        rows = values.reshape(-1, dimension).tolist()
+        if column.null_count:
+            valid = column.is_valid().to_pylist()
+            rows = iter(rows)
+            return [vector_to_json(next(rows)) if ok else "null" for ok in valid]
+        return [vector_to_json(row) for row in rows]
+
+    if field_type == "date":
+        if pa.types.is_timestamp(column.type) and column.type.tz is not None:
+            # strftime writes the zone's wall-clock time without an offset, which
+            # OpenSearch would read as UTC; write UTC explicitly instead
+            column = column.cast(pa.timestamp(column.type.unit, "UTC"))
+            column = pc.strftime(column, format=DATE_FORMAT + "Z")
+        elif pa.types.is_timestamp(column.type):
+            column = pc.strftime(column, format=DATE_FORMAT)
+        elif pa.types.is_date(column.type):
+            column = pc.strftime(column, format="%Y-%m-%d")
+
+    return list(map(encode, column.to_pylist()))
+
+
+def batch_entries(
+    record_batch, index_name: str, mapping: Dict[str, Any] = index_mapping
+) -> List[Tuple[str, str, str]]:
+    """
+    Upsert entries (docid, action line, source line) for a record batch, in
+    the same shape as serialization.upsert_entry.
+    """
+    properties = mapping["mappings"]["properties"]
+    docids = record_batch.column(ID_FIELD)
+    if docids.null_count or not pc.all(pc.greater(pc.utf8_length(docids), 0)).as_py():
+        raise ValueError("docid is required")
+
+    # vector last, as in insight_to_json
+    names = [name for name in record_batch.schema.names if name != VECTOR_FIELD]
+    names.append(VECTOR_FIELD)
+    columns = [
+        _encode_column(record_batch.column(name), properties[name]) for name in names
+    ]
+
+    source_template = (
+        '{"doc": {'
+        + ", ".join(f"{json.dumps(name)}: %s" for name in names)
+        + '}, "doc_as_upsert": true}'
+    )
+    action_template = '{"update": {"_index": %s, "_id": %%s}}' % json.dumps(
+        index_name
+    ).replace("%", "%%")
+    encoded_ids = columns[names.index(ID_FIELD)]
+    return list(
+        zip(
+            docids.to_pylist(),
+            map(action_template.__mod__, encoded_ids),
+            map(source_template.__mod__, zip(*columns)),
+        )
+    )
+
+
+def file_entries(
+    path: Path,
+    index_name: str,
+    batch_size: int = 4096,
+    stats: Optional[Dict[str, float]] = None,
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    Validated upsert entries for every row of the file, one record batch in
+    memory at a time. stats receives rows, batches, seconds and rows_per_second
+    (of reading and encoding) as the file is consumed.
+    """
+    stats = {} if stats is None else stats
+    stats.update(rows=0, batches=0, seconds=0.0, rows_per_second=0.0)
+    checked_schema = None
+    for record_batch in read_batches(path, batch_size):
+        start_time = time.perf_counter()
+        if record_batch.schema != checked_schema:
+            problems = validate_schema(record_batch.schema)
+            if problems:
+                raise ValueError(f"{path} does not fit the index mapping: {problems}")
+            checked_schema = record_batch.schema
+
+        entries = batch_entries(record_batch, index_name)
+        stats["seconds"] += time.perf_counter() - start_time
+        stats["rows"] += record_batch.num_rows
+        stats["batches"] += 1
+        stats["rows_per_second"] = (
+            stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        )
+        yield from entries
+
+
+def write_ndjson(entries: Iterable[Tuple[str, str, str]], output) -> int:
+    """
+    Write entries to a text stream as bulk NDJSON; returns the rows written.
+    """
+    rows = 0
+    for _, action_line, source_line in entries:
+        output.write(f"{action_line}\n{source_line}\n")
+        rows += 1
+    return rows
+
+
+def ingest_file(
+    os_client,
+    path: Path,
+    index_name: str,
+    batch_size: int = 4096,
+    max_bytes: int | None = 10 * 1024 * 1024,
+    max_docs: int | None = 500,
+    stats: Optional[Dict[str, float]] = None,
+) -> Result[T]:
+    """
+    Index a Parquet or Arrow file through bulk_index_entries.
+    """
+    from index_func.utils.os_utils import bulk_index_entries
+
+    stats = {} if stats is None else stats
+    start_time = time.perf_counter()
+    result = bulk_index_entries(
+        os_client,
+        index_name,
+        file_entries(path, index_name, batch_size, stats),
+        max_bytes,
+        max_docs,
+    )
+    seconds = time.perf_counter() - start_time
+    logger.info(
+        f"Ingested {stats['rows']} rows from {path} in {seconds:.1f}s: "
+        f"{stats['rows'] / seconds if seconds else 0.0:.0f} rows/s end to end, "
+        f"{stats['rows_per_second']:.0f} rows/s encoding"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--index", required=True)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Write NDJSON here instead of indexing ('-' for stdout)",
+    )
+    args = parser.parse_args()
+
+    stats: Dict[str, float] = {}
+    if args.output is None:
+        from index_func.utils.os_utils import connect_to_opensearch
+
+        ingest_file(
+            connect_to_opensearch(), args.path, args.index, args.batch_size, stats=stats
+        )
+    else:
+        entries = file_entries(args.path, args.index, args.batch_size, stats)
+        if str(args.output) == "-":
+            write_ndjson(entries, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as output:
+                write_ndjson(entries, output)
+        logger.info(
+            f"Encoded {stats['rows']} rows at {stats['rows_per_second']:.0f} rows/s"
+        )
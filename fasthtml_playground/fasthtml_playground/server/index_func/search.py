@@ -0,0 +1,241 @@
+"""
+Query path for the insights index: kNN and keyword-filter queries over the
+Insight fields, batched _msearch, and search_after pagination.
+
+Vectors are left out of _source unless asked for, since each one is 384
+floats of JSON per hit.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from opensearchpy import OpenSearch
+
+from index_func.datamodels.mapping import index_mapping
+from index_func.utils.generic_utils import batch
+from index_func.utils.serialization import VECTOR_FIELD
+
+ID_FIELD = "docid"
+TEXT_FIELD = "insight"
+
+PROPERTIES = index_mapping["mappings"]["properties"]
+
+# Fields that can be filtered with exact values
+KEYWORD_FIELDS = {
+    name for name, spec in PROPERTIES.items() if spec["type"] == "keyword"
+}
+
+# Fields that can be filtered with ranges
+RANGE_FIELDS = {
+    name
+    for name, spec in PROPERTIES.items()
+    if spec["type"] in ("date", "half_float", "float", "double", "integer", "long")
+}
+
+# Tie-breaker so search_after pages are stable across equal scores
+DEFAULT_SORT = [{"_score": "desc"}, {ID_FIELD: "asc"}]
+
+
+@dataclass
+class SearchResponse:
+    """
+    Hits of one query, with the server-side took and the client round trip.
+
+    For queries sent together in one _msearch, latency_ms is the round trip
+    of the whole batch.
+    """
+
+    hits: List[Dict[str, Any]] = field(default_factory=list)
+    total: int = 0
+    took_ms: float = 0.0
+    latency_ms: float = 0.0
+    error: Optional[Dict[str, Any]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def search_after(self) -> Optional[List[Any]]:
+        """
+        Sort values of the last hit, to request the next page.
+        """
+        return self.hits[-1].get("sort") if self.hits else None
+
+
+def _filter_clauses(
+    filters: Optional[Dict[str, Any]],
+    ranges: Optional[Dict[str, Tuple[Any, Any]]],
+) -> List[Dict[str, Any]]:
+    clauses = []
+    for name, value in (filters or {}).items():
+        if name not in KEYWORD_FIELDS:
+            raise ValueError(f"{name} is not a keyword field of the index")
+        if isinstance(value, (list, tuple, set)):
+            clauses.append({"terms": {name: list(value)}})
+        else:
+            clauses.append({"term": {name: value}})
+    for name, (low, high) in (ranges or {}).items():
+        if name not in RANGE_FIELDS:
+            raise ValueError(f"{name} is not a date or numeric field of the index")
+        bounds = {}
+        if low is not None:
+            bounds["gte"] = low
+        if high is not None:
+            bounds["lte"] = high
+        clauses.append({"range": {name: bounds}})
+    return clauses
+
+
+def build_query(
+    vector: Optional[Sequence[float]] = None,
+    text: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    ranges: Optional[Dict[str, Tuple[Any, Any]]] = None,
+    k: int = 10,
+    size: int = 10,
+    include_vectors: bool = False,
+    sort: Optional[List[Dict[str, Any]]] = None,
+    search_after: Optional[List[Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Search body for insights.
+
+    With a vector, the query is a kNN query whose filter is applied inside
+    the kNN search (faiss efficient filtering), so the k neighbours are
+    taken from the matching documents rather than filtered afterwards.
+    Without one, text is matched against the insight field, or every
+    document matches, within the filters.
+
+    Args:
+        vector: Query embedding, len 384
+        text: Full-text query on the insight field
+        filters: Keyword field -> value, or list of values (any of)
+        ranges: Date or numeric field -> (low, high), inclusive, None for open
+        k: Neighbours per kNN query
+        size: Hits returned
+        include_vectors: Return insight_vector in _source
+        sort: Sort clauses, DEFAULT_SORT when paginating
+        search_after: Sort values of the previous page's last hit
+    """
+    clauses = _filter_clauses(filters, ranges)
+
+    if vector is not None:
+        knn: Dict[str, Any] = {"vector": list(vector), "k": k}
+        if clauses:
+            knn["filter"] = {"bool": {"filter": clauses}}
+        query: Dict[str, Any] = {"knn": {VECTOR_FIELD: knn}}
+    else:
+        must = [{"match": {TEXT_FIELD: text}}] if text else [{"match_all": {}}]
+        query = {"bool": {"must": must, "filter": clauses}}
+
+    body: Dict[str, Any] = {"size": size, "query": query}
+    if not include_vectors:
+        body["_source"] = {"excludes": [VECTOR_FIELD]}
+    if search_after is not None:
+        body["search_after"] = search_after
+        sort = sort or DEFAULT_SORT
+    if sort:
+        body["sort"] = sort
+    return body
+
+
+def _parse_response(response: Dict[str, Any], latency_ms: float) -> SearchResponse:
+    if "error" in response:
+        return SearchResponse(latency_ms=latency_ms, error=response["error"])
+    total = response["hits"]["total"]
+    return SearchResponse(
+        hits=response["hits"]["hits"],
+        total=total["value"] if isinstance(total, dict) else total,
+        took_ms=response.get("took", 0),
+        latency_ms=latency_ms,
+    )
+
+
+def search(
+    os_client: OpenSearch, index_name: str, body: Dict[str, Any]
+) -> SearchResponse:
+    """
+    Run one search.
+    """
+    start_time = time.perf_counter()
+    response = os_client.search(index=index_name, body=body)
+    return _parse_response(response, 1000 * (time.perf_counter() - start_time))
+
+
+def msearch(
+    os_client: OpenSearch,
+    index_name: str,
+    bodies: Sequence[Dict[str, Any]],
+    max_queries: int = 50,
+) -> List[SearchResponse]:
+    """
+    Run many searches in _msearch round trips of at most max_queries each.
+
+    Responses are in the order of bodies; a failing query gets a response
+    with error set instead of failing the others.
+    """
+    results: List[SearchResponse] = []
+    header = json.dumps({"index": index_name})
+    for chunk in batch(list(bodies), max_queries):
+        payload = "".join(f"{header}\n{json.dumps(body)}\n" for body in chunk)
+        start_time = time.perf_counter()
+        response = os_client.msearch(body=payload)
+        latency_ms = 1000 * (time.perf_counter() - start_time)
+        results.extend(
+            _parse_response(item, latency_ms) for item in response["responses"]
+        )
+    return results
+
+
+def search_pages(
+    os_client: OpenSearch,
+    index_name: str,
+    body: Dict[str, Any],
+    page_size: int = 100,
+    max_pages: Optional[int] = None,
+) -> Iterator[SearchResponse]:
+    """
+    Page through all hits of a query with search_after instead of from, so
+    deep pages cost the same as the first. The body's sort, or DEFAULT_SORT,
+    must end in a unique field.
+    """
+    body = dict(body, size=page_size)
+    body.setdefault("sort", DEFAULT_SORT)
+    body.pop("from", None)
+
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        page = search(os_client, index_name, body)
+        if not page.ok:
+            raise RuntimeError(f"search failed: {page.error}")
+        if not page.hits:
+            return
+        yield page
+        pages += 1
+        if len(page.hits) < page_size:
+            return
+        body["search_after"] = page.search_after
+
+
+def search_stats(responses: Sequence[SearchResponse]) -> Dict[str, float]:
+    """
+    took and latency summary over a set of responses.
+    """
+    ok = [response for response in responses if response.ok]
+    took = sorted(response.took_ms for response in ok)
+    latency = sorted(response.latency_ms for response in ok)
+
+    def percentile(values: List[float], q: float) -> float:
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+    return {
+        "queries": len(responses),
+        "errors": len(responses) - len(ok),
+        "took_ms_mean": sum(took) / len(took) if took else 0.0,
+        "took_ms_p95": percentile(took, 0.95),
+        "latency_ms_mean": sum(latency) / len(latency) if latency else 0.0,
+        "latency_ms_p95": percentile(latency, 0.95),
+    }
@@ -1,4 +1,4 @@
-from typing import Any, Generator, List
+from typing import Any, Generator, Iterable, List, Optional, Tuple
 
 
 def batch(
@@ -18,3 +18,46 @@ def batch(
         yield iterable[
             batch_start_index : min(batch_start_index + batch_size, iterable_len)
         ]
+
+
+def batch_bulk_lines(
+    entries: Iterable[Tuple[str, str, str]],
+    max_bytes: Optional[int] = None,
+    max_docs: Optional[int] = None,
+) -> Generator[Tuple[List[str], str], None, None]:
+    """
+    Group bulk entries into NDJSON request bodies, lazily.
+
+    Each entry is (docid, action line, source line). A batch is flushed before
+    it would exceed max_bytes (UTF-8 bytes of the body) or max_docs entries;
+    an entry's two lines always stay in the same body, so a single entry larger
+    than max_bytes is sent on its own. Yields the docids and the body of each
+    batch.
+    """
+    if max_bytes is not None and max_bytes < 1:
+        raise ValueError("max_bytes must be at least 1")
+    if max_docs is not None and max_docs < 1:
+        raise ValueError("max_docs must be at least 1")
+
+    docids: List[str] = []
+    lines: List[str] = []
+    size = 0
+    for docid, action_line, source_line in entries:
+        entry_size = len(action_line.encode("utf-8")) + len(source_line.encode("utf-8"))
+        # one newline after each line, including the last
+        entry_size += 2
+
+        if docids and (
+            (max_bytes is not None and size + entry_size > max_bytes)
+            or (max_docs is not None and len(docids) >= max_docs)
+        ):
+            yield docids, "\n".join(lines) + "\n"
+            docids, lines, size = [], [], 0
+
+        docids.append(docid)
+        lines.append(action_line)
+        lines.append(source_line)
+        size += entry_size
+
+    if docids:
+        yield docids, "\n".join(lines) + "\n"
@@ -1,10 +1,13 @@
-import json
 import os
-from dataclasses import asdict
-from typing import Any, Dict, List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from loguru import logger
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import OpenSearch, RequestsHttpConnection, TransportError
 
 from index_func.datamodels.model import Insight
 from index_func.datamodels.results import (
@@ -15,10 +18,24 @@ from index_func.datamodels.results import (
     SuccessResult,
     T,
 )
-from index_func.utils.generic_utils import batch
+from index_func.utils.generic_utils import batch_bulk_lines
+from index_func.utils.serialization import upsert_entry
 
 opensearch_password = os.getenv("OPENSEARCH_PASSWORD")
 
+# Statuses meaning "slow down and send again", for a request or a single item
+RETRY_STATUSES = {429, 503}
+
+# Index settings changed by bulk_load_mode, with their bulk-load values
+BULK_LOAD_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": "0",
+}
+
+# k-NN plugin setting (OpenSearch 2.18+): -1 skips HNSW graph building while
+# indexing; graphs are then built when segments merge
+KNN_THRESHOLD_SETTING = "index.knn.advanced.approximate_threshold"
+
 
 def connect_to_opensearch(
     host: str = "search-az-test-4-pcuj2jwp5f7jdjnm3gypboagu4.us-east-1.es.amazonaws.com",
@@ -118,61 +135,349 @@ def count_docs_in_index(
     return os_client.count(index=index_name)["count"]
 
 
+def insight_bulk_entry(index_name: str, doc: Insight) -> Tuple[str, str, str]:
+    """
+    Serialize one insight as an upsert: (docid, action line, source line).
+    """
+    return upsert_entry(index_name, doc)
+
+
+def bulk_item_errors(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-document failures in a bulk response, whatever the action type.
+    """
+    if not response.get("errors"):
+        return []
+
+    errors = []
+    for item in response["items"]:
+        # each item has a single key: the action ("update", "index", ...)
+        action, result = next(iter(item.items()))
+        if "error" not in result:
+            continue
+        errors.append(
+            {
+                "_id": result.get("_id"),
+                "action": action,
+                "status": result.get("status"),
+                "error": result["error"],
+            }
+        )
+        logger.debug(
+            f"Error indexing doc with id {result.get('_id')}: {result['error']}"
+        )
+    return errors
+
+
 def bulk_index(
     os_client: OpenSearch,
     index_name: str,
-    documents: List[Insight],
-    batch_size: int = 256,
+    documents: Iterable[Insight],
+    max_bytes: int | None = 10 * 1024 * 1024,
+    max_docs: int | None = 500,
 ) -> Result[T]:
     """
     Bulk index the documents.
+
+    Documents are consumed and serialized lazily, so any iterable or generator
+    works and memory is bounded by one request body. A request is sent once
+    the next document would take it past max_bytes or it holds max_docs
+    documents. The value of the result lists the per-document failures.
     """
+    entries = (insight_bulk_entry(index_name, doc) for doc in documents)
+    return bulk_index_entries(os_client, index_name, entries, max_bytes, max_docs)
 
-    assert batch_size % 2 == 0, "Batch size must be even"
 
+def bulk_index_entries(
+    os_client: OpenSearch,
+    index_name: str,
+    entries: Iterable[Tuple[str, str, str]],
+    max_bytes: int | None = 10 * 1024 * 1024,
+    max_docs: int | None = 500,
+) -> Result[T]:
+    """
+    Bulk index already serialized (docid, action line, source line) entries,
+    batched as in bulk_index.
+    """
     try:
-        bulk_data = []
-        for doc in documents:
-            doc_data = asdict(doc)
+        result_errors = []
+        num_docs = 0
+        for docids, body in batch_bulk_lines(entries, max_bytes, max_docs):
+            response = os_client.bulk(index=index_name, body=body)
+            num_docs += len(docids)
 
-            if not doc_data["docid"]:
-                raise ValueError("docid is required")
+            # handle errors gracefully
+            result_errors.extend(bulk_item_errors(response))
 
-            action = {"update": {"_index": index_name, "_id": doc_data["docid"]}}
+        logger.info(
+            f"Bulk indexed {num_docs} documents into {index_name}, "
+            f"{len(result_errors)} failed"
+        )
+        return SuccessResult(value=result_errors)
 
-            if doc.date:
-                doc_data["date"] = doc.date.isoformat()
+    except Exception as e:
+        logger.error(f"failed to bulk index documents: {repr(e)}")
+        raise e
 
-            # for upserting
-            doc_action = {"doc": doc_data, "doc_as_upsert": True}
 
-            # combine action and document data into a single line
-            bulk_data.append(json.dumps(action, default=str))
-            bulk_data.append(json.dumps(doc_action, default=str))
+def backoff_seconds(attempt: int, initial: float, maximum: float) -> float:
+    """
+    Exponential backoff with full jitter for the given retry attempt (0-based).
+    """
+    return random.uniform(0, min(maximum, initial * 2**attempt))
 
-        # slpit data into batches and send bulk requests to CREATE
-        for batch_item in batch(bulk_data, batch_size):
-            response = os_client.bulk(index=index_name, body=batch_item)
 
-            # handle errors gracefully
-            result_errors = []
-            if response["errors"]:
-                for item in response["items"]:
-                    if "error" not in item["create"]:
-                        continue
-
-                    reason = item["create"]["error"]
-                    result_errors.append(item)
-                    logger.debug(
-                        f"Error indexing doc with id {item['create']['_id']}: {reason}"
-                    )
+def parallel_bulk_index(
+    os_client: OpenSearch,
+    index_name: str,
+    documents: Iterable[Insight],
+    max_bytes: int | None = 10 * 1024 * 1024,
+    max_docs: int | None = 500,
+    max_in_flight: int = 4,
+    max_retries: int = 5,
+    initial_backoff: float = 0.5,
+    max_backoff: float = 30.0,
+    stats: Optional[Dict[str, float]] = None,
+) -> Result[T]:
+    """
+    Bulk index the documents with up to max_in_flight concurrent requests.
 
-        return SuccessResult(value=result_errors)
+    Batching is the same as bulk_index. A request throttled with 429/503 is
+    retried with exponential backoff and jitter; when only some documents
+    are rejected with 429/503, only those are sent again. Other per-document
+    failures, and documents still rejected after max_retries, are returned
+    in the value of the result.
+
+    Args:
+        max_in_flight: Bulk requests sent at the same time; batches are only
+            serialized when a slot is free, so memory stays bounded
+        max_retries: Retries per batch before giving up on its documents
+        initial_backoff: Upper bound in seconds of the first retry's sleep
+        max_backoff: Cap in seconds of the backoff
+        stats: Dict receiving documents, failed, bytes, requests, retries,
+            throttled (document responses with 429/503, including those of
+            the last attempt), seconds, documents_per_second and
+            bytes_per_second
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+
+    lock = threading.Lock()
+    counts = {"documents": 0, "failed": 0, "bytes": 0, "requests": 0}
+    counts.update(retries=0, throttled=0)
+    result_errors: List[Dict[str, Any]] = []
+    failures: List[Exception] = []
+
+    def attempt(body: str, docids: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return bulk_item_errors(os_client.bulk(index=index_name, body=body))
+        except TransportError as e:
+            if e.status_code not in RETRY_STATUSES:
+                raise
+            # the whole request was throttled: every document failed with it,
+            # reported in the same shape as bulk_item_errors
+            error = e.info.get("error") if isinstance(e.info, dict) else None
+            return [
+                {
+                    "_id": docid,
+                    "action": "update",
+                    "status": e.status_code,
+                    "error": error or e.error,
+                }
+                for docid in docids
+            ]
+
+    def send(docids: List[str], body: str) -> None:
+        lines = body.split("\n")
+        entries = [(docid, lines[2 * i : 2 * i + 2]) for i, docid in enumerate(docids)]
+        with lock:
+            counts["bytes"] += len(body.encode("utf-8"))
+
+        for retry in range(max_retries + 1):
+            errors = attempt(body, [docid for docid, _ in entries])
+            throttled = {
+                error["_id"] for error in errors if error["status"] in RETRY_STATUSES
+            }
+            rejected = len(throttled)
+            if retry == max_retries:
+                throttled = set()
+            final_errors = [error for error in errors if error["_id"] not in throttled]
+            with lock:
+                counts["requests"] += 1
+                counts["throttled"] += rejected
+                counts["retries"] += bool(throttled)
+                counts["documents"] += len(entries) - len(errors)
+                counts["failed"] += len(final_errors)
+                result_errors.extend(final_errors)
+            if not throttled:
+                return
+
+            # send only the throttled documents again
+            entries = [(docid, pair) for docid, pair in entries if docid in throttled]
+            body = "".join(f"{line}\n" for _, pair in entries for line in pair)
+            time.sleep(backoff_seconds(retry, initial_backoff, max_backoff))
+
+    def run(docids: List[str], body: str) -> None:
+        try:
+            send(docids, body)
+        except Exception as e:
+            failures.append(e)
+        finally:
+            slots.release()
+
+    start_time = time.perf_counter()
+    try:
+        entries = (insight_bulk_entry(index_name, doc) for doc in documents)
+        slots = threading.BoundedSemaphore(max_in_flight)
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            for docids, body in batch_bulk_lines(entries, max_bytes, max_docs):
+                # wait for a free slot: at most max_in_flight batches are held
+                slots.acquire()
+                if failures:
+                    break
+                executor.submit(run, docids, body)
+        if failures:
+            raise failures[0]
 
     except Exception as e:
         logger.error(f"failed to bulk index documents: {repr(e)}")
         raise e
 
+    seconds = time.perf_counter() - start_time
+    counts.update(
+        seconds=seconds,
+        documents_per_second=counts["documents"] / seconds if seconds else 0.0,
+        bytes_per_second=counts["bytes"] / seconds if seconds else 0.0,
+    )
+    if stats is not None:
+        stats.update(counts)
+    logger.info(
+        f"Bulk indexed {counts['documents']} documents into {index_name} "
+        f"({counts['failed']} failed, {counts['retries']} retries) at "
+        f"{counts['documents_per_second']:.0f} docs/s"
+    )
+    return SuccessResult(value=result_errors)
+
+
+@contextmanager
+def bulk_load_mode(
+    os_client: OpenSearch,
+    index_name: str,
+    defer_knn: bool = True,
+    force_merge_segments: Optional[int] = None,
+    wait_for_status: str = "green",
+    timeout: str = "10m",
+) -> Iterator[Dict[str, float]]:
+    """
+    Run the block with the index tuned for a large ingest.
+
+    Refresh is turned off, replicas are set to 0 and, when defer_knn is set
+    and the k-NN plugin supports it, HNSW graph building is deferred. On exit,
+    including on failure, the original settings are restored. Then the index
+    is refreshed, force-merged to force_merge_segments segments, and the
+    cluster is waited on until the index reaches wait_for_status. Yields a
+    dict receiving seconds spent in the block and in each exit phase.
+
+    Segments written while kNN graph building is deferred have no graph until
+    they are merged, so when it was deferred the index is always force-merged,
+    to 1 segment unless force_merge_segments says otherwise. Otherwise it is
+    only force-merged when force_merge_segments is given.
+
+    If the block fails and leaving bulk-load mode fails as well, the error of
+    the block is raised and the other one is logged.
+    """
+    response = os_client.indices.get_settings(index=index_name, flat_settings=True)
+    current = response[index_name]["settings"]
+
+    bulk_settings = dict(BULK_LOAD_SETTINGS)
+    if defer_knn:
+        bulk_settings[KNN_THRESHOLD_SETTING] = "-1"
+    # settings not set on the index are restored to their default with None
+    original = {name: current.get(name) for name in bulk_settings}
+
+    try:
+        os_client.indices.put_settings(index=index_name, body=bulk_settings)
+    except TransportError as e:
+        if KNN_THRESHOLD_SETTING not in bulk_settings:
+            raise
+        logger.warning(
+            f"Cannot defer kNN graph building on {index_name}, building inline: {e}"
+        )
+        del bulk_settings[KNN_THRESHOLD_SETTING]
+        del original[KNN_THRESHOLD_SETTING]
+        os_client.indices.put_settings(index=index_name, body=bulk_settings)
+    logger.info(f"Index {index_name} in bulk-load mode: {bulk_settings}")
+
+    if force_merge_segments is None and KNN_THRESHOLD_SETTING in bulk_settings:
+        force_merge_segments = 1
+
+    timings: Dict[str, float] = {}
+    start_time = time.perf_counter()
+    failed = False
+    try:
+        yield timings
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        timings["ingest"] = time.perf_counter() - start_time
+        try:
+            _leave_bulk_load_mode(
+                os_client,
+                index_name,
+                original,
+                force_merge_segments,
+                wait_for_status,
+                timeout,
+                timings,
+            )
+        except Exception as e:
+            if not failed:
+                raise
+            logger.error(
+                f"Failed to leave bulk-load mode on {index_name} after the ingest "
+                f"failed: {repr(e)}"
+            )
+
+
+def _leave_bulk_load_mode(
+    os_client: OpenSearch,
+    index_name: str,
+    original: Dict[str, Any],
+    force_merge_segments: Optional[int],
+    wait_for_status: str,
+    timeout: str,
+    timings: Dict[str, float],
+) -> None:
+    phase_start = time.perf_counter()
+    os_client.indices.put_settings(index=index_name, body=original)
+    logger.info(f"Index {index_name} settings restored: {original}")
+
+    os_client.indices.refresh(index=index_name)
+    timings["refresh"] = time.perf_counter() - phase_start
+
+    if force_merge_segments is not None:
+        phase_start = time.perf_counter()
+        os_client.indices.forcemerge(
+            index=index_name,
+            max_num_segments=force_merge_segments,
+            request_timeout=3600,
+        )
+        timings["force_merge"] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
+    health = os_client.cluster.health(
+        index=index_name,
+        params={"wait_for_status": wait_for_status, "timeout": timeout},
+        request_timeout=3600,
+    )
+    timings["wait"] = time.perf_counter() - phase_start
+    if health.get("timed_out"):
+        logger.warning(
+            f"Index {index_name} is {health.get('status')}, "
+            f"not {wait_for_status}, after {timeout}"
+        )
+
 
 def list_fields(
     os_client: OpenSearch,
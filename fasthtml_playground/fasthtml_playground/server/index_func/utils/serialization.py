@@ -0,0 +1,60 @@
+import json
+import math
+from dataclasses import fields
+from datetime import date
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+from index_func.datamodels.model import Insight
+
+VECTOR_FIELD = "insight_vector"
+
+# Every Insight field except the vector, which is written separately
+SOURCE_FIELDS = tuple(f.name for f in fields(Insight) if f.name != VECTOR_FIELD)
+
+
+@lru_cache(maxsize=8)
+def _vector_format(dimension: int) -> str:
+    # 9 significant digits round-trip any float32
+    return "[" + ",".join(["%.9g"] * dimension) + "]"
+
+
+def vector_to_json(vector: Sequence[float]) -> str:
+    """
+    JSON array for a float32 vector, formatted in one call.
+
+    Raises ValueError for NaN or infinite components, which %g would write as
+    nan/inf and make the bulk body invalid JSON.
+    """
+    # one C-level pass; NaN and inf propagate through the sum
+    if not math.isfinite(sum(vector)):
+        for i, value in enumerate(vector):
+            if not math.isfinite(value):
+                raise ValueError(f"vector component {i} is not finite: {value}")
+    return _vector_format(len(vector)) % tuple(vector)
+
+
+def insight_to_json(doc: Insight) -> str:
+    """
+    JSON object for an insight, without dataclasses.asdict copies.
+
+    List fields are handed to the encoder as they are, the date is written in
+    ISO format and the vector with vector_to_json.
+    """
+    source = {name: getattr(doc, name) for name in SOURCE_FIELDS}
+    if isinstance(doc.date, date):
+        source["date"] = doc.date.isoformat()
+    body = json.dumps(source, ensure_ascii=False)
+    return f'{body[:-1]}, "{VECTOR_FIELD}": {vector_to_json(doc.insight_vector)}}}'
+
+
+def upsert_entry(index_name: str, doc: Insight) -> Tuple[str, str, str]:
+    """
+    Bulk upsert of an insight: (docid, action line, source line).
+    """
+    if not doc.docid:
+        raise ValueError("docid is required")
+
+    action = json.dumps({"update": {"_index": index_name, "_id": doc.docid}})
+    source = f'{{"doc": {insight_to_json(doc)}, "doc_as_upsert": true}}'
+    return doc.docid, action, source
@@ -0,0 +1,253 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from html_parsing.fix import transform_html
+from loguru import logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def summary_version(html: str) -> str:
+    """
+    Content version of a summary, for sources without their own version field.
+    """
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def parse_accept_encoding(header: Optional[str]) -> List[str]:
+    """
+    Content codings the client accepts, best first; q=0 codings are dropped.
+    """
+    codings = []
+    for position, part in enumerate((header or "").split(",")):
+        name, *params = [piece.strip() for piece in part.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            codings.append((-quality, position, name.lower()))
+    return [name for _, _, name in sorted(codings)]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check; uses weak comparison and ignores the coding suffix,
+    since every coding of a summary decodes to the same body.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.strip('"').split("-", 1)[0]
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate.split("-", 1)[0] == opaque:
+            return True
+    return False
+
+
+@dataclass
+class RenderedSummary:
+    """
+    JSON response body for one summary version, plus its compressed codings.
+    """
+
+    key: Tuple[str, str]
+    body: bytes
+    etag: str
+    render_seconds: float
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(value) for value in self.encoded.values())
+
+
+@dataclass
+class SummaryResponse:
+    """
+    What the endpoint sends: status, body and headers.
+    """
+
+    status_code: int
+    body: bytes
+    headers: Dict[str, str]
+
+
+class SummaryCache:
+    """
+    Size-bounded LRU cache of rendered summaries keyed by (summary id, version).
+
+    A new version of a summary gets a new key, so stale renders are never
+    served; they age out of the cache instead.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        render: Callable[[str], str] = transform_html,
+    ):
+        self.max_bytes = max_bytes
+        self.render = render
+        self._entries: "OrderedDict[Tuple[str, str], RenderedSummary]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+    def get(self, summary_id: str, version: str, html: str) -> RenderedSummary:
+        """
+        Cached render of the summary, rendering it on a miss.
+        """
+        key = (summary_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        start_time = time.perf_counter()
+        summary = self.render(html)
+        body = json.dumps({"result": {"id": summary_id, "summary": summary}}).encode(
+            "utf-8"
+        )
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = RenderedSummary(
+            key=key,
+            body=body,
+            etag=etag,
+            render_seconds=time.perf_counter() - start_time,
+        )
+
+        with self._lock:
+            self.render_seconds += entry.render_seconds
+            self._store(key, entry)
+        return entry
+
+    def encode(self, entry: RenderedSummary, coding: str) -> bytes:
+        """
+        Body compressed with coding ("gzip" or "br"), compressed once per entry.
+        """
+        encoded = entry.encoded.get(coding)
+        if encoded is not None:
+            return encoded
+        if coding == "br":
+            encoded = brotli.compress(entry.body, quality=BROTLI_QUALITY)
+        else:
+            encoded = gzip.compress(entry.body, compresslevel=GZIP_LEVEL, mtime=0)
+        with self._lock:
+            entry.encoded[coding] = encoded
+            # the entry may have been evicted in the meantime
+            if self._entries.get(entry.key) is entry:
+                self._bytes += len(encoded)
+                self._evict()
+        return encoded
+
+    def respond(
+        self,
+        summary_id: str,
+        version: str,
+        html: str,
+        if_none_match: Optional[str] = None,
+        accept_encoding: Optional[str] = None,
+    ) -> SummaryResponse:
+        """
+        Response for a summary request: 304 when the client's ETag is current,
+        otherwise the body in the best coding the client accepts. Either way
+        the ETag is the one of that coding.
+        """
+        entry = self.get(summary_id, version, html)
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        coding = None
+        if len(entry.body) >= MIN_COMPRESS_BYTES:
+            for name in parse_accept_encoding(accept_encoding):
+                if name == "gzip" or (name == "br" and brotli is not None):
+                    coding = name
+                    break
+
+        # strong ETags differ per coding, as the bytes on the wire differ
+        if coding is None:
+            headers["ETag"] = entry.etag
+        else:
+            headers["ETag"] = f'{entry.etag[:-1]}-{coding}"'
+
+        if etag_matches(if_none_match, headers["ETag"]):
+            return SummaryResponse(status_code=304, body=b"", headers=headers)
+
+        if coding is None:
+            return SummaryResponse(status_code=200, body=entry.body, headers=headers)
+
+        headers["Content-Encoding"] = coding
+        return SummaryResponse(
+            status_code=200, body=self.encode(entry, coding), headers=headers
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+                "render_seconds_total": self.render_seconds,
+                "render_ms_mean": (
+                    1000 * self.render_seconds / self.misses if self.misses else 0.0
+                ),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key: Tuple[str, str], entry: RenderedSummary) -> None:
+        if entry.size > self.max_bytes:
+            logger.warning(
+                f"Summary {key[0]} renders to {entry.size} bytes, too large to cache"
+            )
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
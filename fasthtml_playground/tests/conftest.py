@@ -0,0 +1,37 @@
+import os
+import sys
+
+# server modules import each other as top-level modules, as when run from there
+SERVER_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "fasthtml_playground", "server"
+)
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+from datetime import datetime
+from typing import Iterator
+
+from index_func.datamodels.model import Insight
+
+
+def make_insight(i: int, **fields) -> Insight:
+    """
+    Insight number i with placeholder values; keyword arguments override them.
+    """
+    values = dict(
+        docid=f"doc-{i}",
+        insight=f"Insight number {i}",
+        insight_vector=[0.1] * 4,
+        sentiment_score=0.5,
+        date=datetime(2025, 1, 1),
+        product="product",
+        country="country",
+        region="region",
+    )
+    values.update(fields)
+    return Insight(**values)
+
+
+def make_insights(count: int, **fields) -> Iterator[Insight]:
+    for i in range(count):
+        yield make_insight(i, **fields)
@@ -0,0 +1,309 @@
+"""
+Local stand-in for the OpenSearch HTTP API, for tests.
+
+Implements the bulk API (update with doc_as_upsert and index actions) and
+can inject throttling: whole requests answered with 429, or single items
+rejected with 429 inside an otherwise successful response. Index settings,
+refresh, force merge and cluster health are served from memory so bulk-load
+tuning can be checked. _search and _msearch evaluate the subset of the query
+DSL that index_func.search builds (match_all, match, term, terms, range, bool
+filters and kNN with a filter) over the indexed documents.
+"""
+
+import functools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from opensearchpy import OpenSearch
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: "OpenSearchStandIn"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> str:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8")
+
+    def route(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self.read_body()
+        self.server.calls.append((method, url.path, query))
+
+        if path and path[-1] == "_msearch":
+            self.send_json(200, self.server.msearch(body))
+        elif path and path[-1] == "_search":
+            response = self.server.search(path[0], json.loads(body or "{}"))
+            self.send_json(response.get("status", 200), response)
+        elif path and path[-1] == "_bulk":
+            index = path[0] if len(path) == 2 else None
+            self.server.handle_bulk(self, index, body)
+        elif len(path) == 2 and path[1] == "_settings":
+            if method == "GET":
+                self.send_json(200, self.server.get_settings(path[0]))
+            else:
+                status, payload = self.server.put_settings(path[0], json.loads(body))
+                self.send_json(status, payload)
+        elif len(path) == 2 and path[1] in ("_refresh", "_forcemerge"):
+            self.send_json(200, {"_shards": {"total": 1, "successful": 1, "failed": 0}})
+        elif path[:2] == ["_cluster", "health"]:
+            self.send_json(200, {"status": self.server.health, "timed_out": False})
+        elif not path:
+            self.send_json(200, {"version": {"distribution": "opensearch"}})
+        else:
+            self.send_json(404, {"error": f"{self.path} is not supported"})
+
+    def do_HEAD(self):
+        self.send_json(200, {})
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def do_PUT(self):
+        self.route("PUT")
+
+
+class OpenSearchStandIn(ThreadingHTTPServer):
+    """
+    Serves on a free local port from a background thread; use as a context
+    manager and talk to it through client().
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.delay = delay
+        self.indices: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # throttling knobs: the next N requests / items are rejected with 429
+        self.throttle_requests = 0
+        self.reject_items = 0
+        # documents that always fail with a mapping error
+        self.fail_ids: Set[str] = set()
+        # flat index settings, and settings the "cluster" rejects as unknown
+        self.settings: Dict[str, Dict[str, str]] = {}
+        self.unsupported_settings: Set[str] = set()
+        self.health = "green"
+        self.calls: List[Tuple[str, str, Dict[str, str]]] = []
+        self.searches: List[Tuple[str, Dict[str, Any]]] = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def client(self) -> OpenSearch:
+        host, port = self.server_address
+        return OpenSearch(hosts=[{"host": host, "port": port}], max_retries=0)
+
+    def get_settings(self, index: str) -> Dict[str, Any]:
+        with self.lock:
+            return {index: {"settings": dict(self.settings.get(index, {}))}}
+
+    def put_settings(
+        self, index: str, body: Dict[str, Optional[str]]
+    ) -> Tuple[int, Dict[str, Any]]:
+        unsupported = self.unsupported_settings.intersection(body)
+        if unsupported:
+            reason = f"unknown setting [{sorted(unsupported)[0]}]"
+            error = {"type": "illegal_argument_exception", "reason": reason}
+            return 400, {"error": {**error, "root_cause": [error]}, "status": 400}
+        with self.lock:
+            settings = self.settings.setdefault(index, {})
+            for name, value in body.items():
+                if value is None:
+                    settings.pop(name, None)
+                else:
+                    settings[name] = str(value)
+        return 200, {"acknowledged": True}
+
+    def handle_bulk(self, handler: StandInHandler, index: str, body: str) -> None:
+        # the request stops counting as in flight before its response is sent
+        status, payload = self.bulk(index, body)
+        handler.send_json(status, payload)
+
+    def bulk(self, index: str, body: str) -> Tuple[int, Dict[str, Any]]:
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            throttled = self.throttle_requests > 0
+            self.throttle_requests -= throttled
+        try:
+            time.sleep(self.delay)
+            if throttled:
+                return 429, {"error": {"type": "too_many_requests"}, "status": 429}
+
+            lines = body.splitlines()
+            items = []
+            for action_line, source_line in zip(lines[::2], lines[1::2]):
+                action_type, action = next(iter(json.loads(action_line).items()))
+                docid = action["_id"]
+                result = {"_index": action.get("_index", index), "_id": docid}
+                with self.lock:
+                    rejected = docid not in self.fail_ids and self.reject_items > 0
+                    self.reject_items -= rejected
+                if docid in self.fail_ids:
+                    result.update(
+                        status=400, error={"type": "mapper_parsing_exception"}
+                    )
+                elif rejected:
+                    result.update(
+                        status=429,
+                        error={"type": "es_rejected_execution_exception"},
+                    )
+                else:
+                    source = json.loads(source_line)
+                    with self.lock:
+                        docs = self.indices.setdefault(result["_index"], {})
+                        if action_type == "update":
+                            docs.setdefault(docid, {}).update(source["doc"])
+                        else:
+                            docs[docid] = source
+                    result.update(status=200, result="updated")
+                items.append({action_type: result})
+
+            errors = any("error" in next(iter(item.values())) for item in items)
+            return 200, {"took": 1, "errors": errors, "items": items}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def msearch(self, body: str) -> Dict[str, Any]:
+        lines = body.splitlines()
+        responses = []
+        for header, query in zip(lines[::2], lines[1::2]):
+            index = json.loads(header)["index"]
+            responses.append(self.search(index, json.loads(query)))
+        return {
+            "took": sum(r.get("took", 0) for r in responses),
+            "responses": responses,
+        }
+
+    def search(self, index: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        with self.lock:
+            self.searches.append((index, body))
+            docs = self.indices.get(index)
+            if docs is None:
+                error = {"type": "index_not_found_exception", "index": index}
+                return {"error": {**error, "root_cause": [error]}, "status": 404}
+            docs = dict(docs)
+
+        query = body.get("query", {"match_all": {}})
+        scored = []
+        for docid, source in docs.items():
+            score = self._score(query, source)
+            if score is not None:
+                scored.append((docid, source, score))
+        if "knn" in query:
+            k = next(iter(query["knn"].values()))["k"]
+            scored = sorted(scored, key=lambda hit: -hit[2])[:k]
+
+        sort = body.get("sort") or [{"_score": "desc"}, {"docid": "asc"}]
+        clauses = [next(iter(clause.items())) for clause in sort]
+
+        def sort_values(hit):
+            docid, source, score = hit
+            return [
+                score if name == "_score" else source.get(name) for name, _ in clauses
+            ]
+
+        def compare(left, right):
+            for (_, order), a, b in zip(clauses, left, right):
+                if a != b:
+                    result = -1 if a < b else 1
+                    return -result if order == "desc" else result
+            return 0
+
+        hits = sorted(
+            ((sort_values(hit), hit) for hit in scored),
+            key=functools.cmp_to_key(lambda a, b: compare(a[0], b[0])),
+        )
+        if "search_after" in body:
+            hits = [hit for hit in hits if compare(hit[0], body["search_after"]) > 0]
+
+        excludes = set(body.get("_source", {}).get("excludes", []))
+        page = []
+        for values, (docid, source, score) in hits[: body.get("size", 10)]:
+            hit = {
+                "_index": index,
+                "_id": docid,
+                "_score": score,
+                "_source": {k: v for k, v in source.items() if k not in excludes},
+            }
+            if "sort" in body:
+                hit["sort"] = values
+            page.append(hit)
+        return {
+            "took": int(1000 * (time.perf_counter() - start_time)),
+            "timed_out": False,
+            "hits": {"total": {"value": len(hits), "relation": "eq"}, "hits": page},
+        }
+
+    def _score(self, query: Dict[str, Any], source: Dict[str, Any]) -> Optional[float]:
+        kind, spec = next(iter(query.items()))
+        if kind == "match_all":
+            return 1.0
+        if kind == "bool":
+            for clause in spec.get("filter", []):
+                if self._score(clause, source) is None:
+                    return None
+            score = 0.0
+            for clause in spec.get("must", []):
+                clause_score = self._score(clause, source)
+                if clause_score is None:
+                    return None
+                score += clause_score
+            return score or 1.0
+        name, value = next(iter(spec.items()))
+        if kind == "knn":
+            if "filter" in value and self._score(value["filter"], source) is None:
+                return None
+            distance = sum((a - b) ** 2 for a, b in zip(value["vector"], source[name]))
+            return 1 / (1 + distance)
+        stored = source.get(name)
+        stored_values = stored if isinstance(stored, list) else [stored]
+        if kind == "term":
+            return 1.0 if value in stored_values else None
+        if kind == "terms":
+            return 1.0 if set(value).intersection(stored_values) else None
+        if kind == "range":
+            if stored is None:
+                return None
+            if "gte" in value and stored < value["gte"]:
+                return None
+            if "lte" in value and stored > value["lte"]:
+                return None
+            return 1.0
+        if kind == "match":
+            words = set(str(stored or "").lower().split())
+            matches = sum(word in words for word in value.lower().split())
+            return float(matches) or None
+        raise ValueError(f"query {kind} is not supported by the stand-in")
@@ -0,0 +1,141 @@
+import json
+import unittest
+from array import array
+
+from index_func.utils.generic_utils import batch_bulk_lines
+from index_func.utils.serialization import upsert_entry, vector_to_json
+
+from .conftest import make_insight
+
+try:
+    import opensearchpy
+except ImportError:
+    opensearchpy = None
+
+if opensearchpy is not None:
+    from index_func.utils import os_utils
+
+
+class FakeBulkClient:
+    """Records bulk bodies and fails the documents listed in fail_ids."""
+
+    def __init__(self, fail_ids=()):
+        self.bodies = []
+        self.fail_ids = set(fail_ids)
+
+    def bulk(self, index, body):
+        self.bodies.append(body)
+        lines = body.splitlines()
+        items = []
+        for action_line in lines[::2]:
+            docid = json.loads(action_line)["update"]["_id"]
+            result = {"_id": docid, "status": 200}
+            if docid in self.fail_ids:
+                result = {"_id": docid, "status": 400, "error": {"type": "bad"}}
+            items.append({"update": result})
+        return {"errors": bool(self.fail_ids), "items": items}
+
+
+class TestInsightSerialization(unittest.TestCase):
+    def test_vector_is_float32(self):
+        doc = make_insight(0)
+        self.assertIsInstance(doc.insight_vector, array)
+        self.assertEqual(doc.insight_vector.typecode, "f")
+        self.assertFalse(hasattr(doc, "__dict__"))
+
+    def test_upsert_entry(self):
+        """Test that the upsert lines hold every field, the ISO date and the float32 vector."""
+        doc = make_insight(3)
+        doc.themes = ["access", "naïve"]
+        docid, action_line, source_line = upsert_entry("test", doc)
+
+        self.assertEqual(docid, "doc-3")
+        self.assertEqual(
+            json.loads(action_line), {"update": {"_index": "test", "_id": "doc-3"}}
+        )
+        source = json.loads(source_line)
+        self.assertTrue(source["doc_as_upsert"])
+        self.assertEqual(source["doc"]["date"], "2025-01-01T00:00:00")
+        self.assertEqual(source["doc"]["themes"], ["access", "naïve"])
+        # float32 values round-trip exactly
+        self.assertEqual(
+            array("f", source["doc"]["insight_vector"]), doc.insight_vector
+        )
+        self.assertEqual(source["doc"]["meeting"], [])
+
+    def test_missing_docid(self):
+        doc = make_insight(0)
+        doc.docid = ""
+        with self.assertRaises(ValueError):
+            upsert_entry("test", doc)
+
+    def test_non_finite_vector(self):
+        """Test that NaN and infinite vector components are rejected, not written as nan/inf."""
+        for value in (float("nan"), float("inf"), float("-inf")):
+            doc = make_insight(0, insight_vector=[0.1, value, 0.3, 0.4])
+            with self.assertRaisesRegex(ValueError, "component 1 is not finite"):
+                upsert_entry("test", doc)
+
+    def test_large_finite_vector(self):
+        """Test that finite components whose sum overflows are still accepted."""
+        vector = [1.7e308, 1.7e308]
+        self.assertEqual(json.loads(vector_to_json(vector)), vector)
+
+
+class TestBatchBulkLines(unittest.TestCase):
+    def entries(self, count, size=10):
+        for i in range(count):
+            yield f"doc-{i}", "a" * size, "b" * size
+
+    def test_max_docs(self):
+        """Test that batches hold at most max_docs entries."""
+        batches = list(batch_bulk_lines(self.entries(7), max_docs=3))
+        self.assertEqual([len(docids) for docids, _ in batches], [3, 3, 1])
+
+    def test_max_bytes_keeps_pairs(self):
+        """Test that bodies stay under max_bytes without splitting an entry."""
+        # each entry is 22 bytes with its newlines
+        batches = list(batch_bulk_lines(self.entries(5), max_bytes=50))
+        self.assertEqual([len(docids) for docids, _ in batches], [2, 2, 1])
+        for docids, body in batches:
+            self.assertLessEqual(len(body.encode("utf-8")), 50)
+            self.assertEqual(body.count("\n"), 2 * len(docids))
+            self.assertTrue(body.endswith("\n"))
+
+    def test_oversized_entry_sent_alone(self):
+        entries = [("small", "a", "b"), ("large", "a" * 100, "b"), ("next", "a", "b")]
+        batches = list(batch_bulk_lines(entries, max_bytes=50))
+        self.assertEqual(
+            [docids for docids, _ in batches], [["small"], ["large"], ["next"]]
+        )
+
+    def test_lazy(self):
+        """Test that the first batch is yielded before the input is exhausted."""
+        batches = batch_bulk_lines(self.entries(10**9), max_docs=2)
+        self.assertEqual(next(batches)[0], ["doc-0", "doc-1"])
+
+
+@unittest.skipIf(opensearchpy is None, "opensearch-py is not installed")
+class TestBulkIndex(unittest.TestCase):
+    def test_streams_generator(self):
+        """Test that a generator is indexed in several requests."""
+        client = FakeBulkClient()
+        result = os_utils.bulk_index(
+            client, "test", (make_insight(i) for i in range(10)), max_docs=4
+        )
+        self.assertTrue(result.success)
+        self.assertEqual(result.value, [])
+        self.assertEqual(len(client.bodies), 3)
+
+    def test_reports_update_errors(self):
+        """Test that failures of update actions are reported per document."""
+        client = FakeBulkClient(fail_ids={"doc-1", "doc-6"})
+        result = os_utils.bulk_index(
+            client, "test", (make_insight(i) for i in range(8)), max_docs=4
+        )
+        self.assertEqual([error["_id"] for error in result.value], ["doc-1", "doc-6"])
+        self.assertEqual(result.value[0]["status"], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
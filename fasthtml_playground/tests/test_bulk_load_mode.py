@@ -0,0 +1,96 @@
+import unittest
+
+from .conftest import make_insights
+from .opensearch_stand_in import OpenSearchStandIn
+
+try:
+    import opensearchpy
+except ImportError:
+    opensearchpy = None
+
+if opensearchpy is not None:
+    from index_func.utils import os_utils
+
+LIVE_SETTINGS = {"index.refresh_interval": "5s", "index.number_of_replicas": "2"}
+
+
+@unittest.skipIf(opensearchpy is None, "opensearch-py is not installed")
+class TestBulkLoadMode(unittest.TestCase):
+    def setUp(self):
+        self.server = OpenSearchStandIn().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.settings["insights"] = dict(LIVE_SETTINGS)
+        self.client = self.server.client()
+
+    def test_settings_during_and_after(self):
+        """Test that bulk-load settings apply inside the block and are restored after."""
+        with os_utils.bulk_load_mode(
+            self.client, "insights", force_merge_segments=1
+        ) as timings:
+            self.assertEqual(
+                self.server.settings["insights"],
+                {
+                    "index.refresh_interval": "-1",
+                    "index.number_of_replicas": "0",
+                    "index.knn.advanced.approximate_threshold": "-1",
+                },
+            )
+            os_utils.bulk_index(self.client, "insights", make_insights(20))
+
+        self.assertEqual(self.server.settings["insights"], LIVE_SETTINGS)
+        paths = [path for _, path, _ in self.server.calls]
+        restore = max(i for i, path in enumerate(paths) if path.endswith("_settings"))
+        self.assertEqual(
+            paths[restore + 1 :],
+            [
+                "/insights/_refresh",
+                "/insights/_forcemerge",
+                "/_cluster/health/insights",
+            ],
+        )
+        self.assertEqual(self.server.calls[-2][2]["max_num_segments"], "1")
+        self.assertEqual(self.server.calls[-1][2]["wait_for_status"], "green")
+        self.assertIn("ingest", timings)
+        self.assertIn("force_merge", timings)
+
+    def test_deferred_knn_is_force_merged(self):
+        """Test that deferred kNN graphs are built by a force merge even without force_merge_segments."""
+        with os_utils.bulk_load_mode(self.client, "insights"):
+            os_utils.bulk_index(self.client, "insights", make_insights(20))
+
+        merges = [call for call in self.server.calls if call[1].endswith("_forcemerge")]
+        self.assertEqual(len(merges), 1)
+        self.assertEqual(merges[0][2]["max_num_segments"], "1")
+
+    def test_restores_on_failure(self):
+        with self.assertRaises(RuntimeError):
+            with os_utils.bulk_load_mode(self.client, "insights"):
+                raise RuntimeError("ingest failed")
+        self.assertEqual(self.server.settings["insights"], LIVE_SETTINGS)
+
+    def test_restore_failure_keeps_ingest_error(self):
+        """Test that a failing restore does not hide the error that ended the block."""
+        with self.assertRaisesRegex(RuntimeError, "ingest failed"):
+            with os_utils.bulk_load_mode(self.client, "insights"):
+                self.server.unsupported_settings = {"index.refresh_interval"}
+                raise RuntimeError("ingest failed")
+
+    def test_restore_failure_raises(self):
+        with self.assertRaises(os_utils.TransportError):
+            with os_utils.bulk_load_mode(self.client, "insights"):
+                self.server.unsupported_settings = {"index.refresh_interval"}
+
+    def test_without_knn_deferral_support(self):
+        """Test that clusters without the kNN threshold setting still get bulk-load mode."""
+        self.server.unsupported_settings = {os_utils.KNN_THRESHOLD_SETTING}
+        with os_utils.bulk_load_mode(self.client, "insights"):
+            self.assertEqual(
+                self.server.settings["insights"]["index.refresh_interval"], "-1"
+            )
+        self.assertEqual(self.server.settings["insights"], LIVE_SETTINGS)
+        paths = [path for _, path, _ in self.server.calls]
+        self.assertNotIn("/insights/_forcemerge", paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from index_func.embedding import DIMENSION, EmbeddingCache, embed_insights
+
+from .conftest import make_insight
+
+
+class CountingEmbedder:
+    """Deterministic embedder that records the batches it is asked for."""
+
+    model_name = "counting"
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[len(text) / 100] * DIMENSION for text in texts]
+
+
+def make_insights(texts):
+    for i, text in enumerate(texts):
+        yield make_insight(i, insight=text, insight_vector=[])
+
+
+TEXTS = ["a much longer insight text", "short", "medium text", "short", "tiny"]
+
+
+class TestEmbedInsights(unittest.TestCase):
+    def test_dedup_and_order(self):
+        """Test that duplicates are embedded once, in length-sorted batches, in input order."""
+        embedder = CountingEmbedder()
+        stats = {}
+        insights = list(
+            embed_insights(make_insights(TEXTS), embedder, batch_size=2, stats=stats)
+        )
+
+        self.assertEqual([insight.insight for insight in insights], TEXTS)
+        self.assertEqual(
+            embedder.batches,
+            [["tiny", "short"], ["medium text", "a much longer insight text"]],
+        )
+        for insight in insights:
+            self.assertEqual(len(insight.insight_vector), DIMENSION)
+            self.assertAlmostEqual(
+                insight.insight_vector[0], len(insight.insight) / 100, places=6
+            )
+        self.assertIs(insights[1].insight_vector, insights[3].insight_vector)
+        self.assertEqual((stats["texts"], stats["unique_texts"]), (5, 4))
+
+    def test_persistent_cache(self):
+        """Test that a second run over the same corpus is served from the cache."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "embeddings.sqlite")
+            with EmbeddingCache(path, "counting") as cache:
+                list(embed_insights(make_insights(TEXTS), CountingEmbedder(), cache))
+
+            embedder = CountingEmbedder()
+            stats = {}
+            with EmbeddingCache(path, "counting") as cache:
+                insights = list(
+                    embed_insights(make_insights(TEXTS), embedder, cache, stats=stats)
+                )
+                self.assertEqual(len(cache), 4)
+
+            self.assertEqual(embedder.batches, [])
+            self.assertEqual(stats["cache_hit_rate"], 1.0)
+            self.assertAlmostEqual(insights[2].insight_vector[0], 0.11, places=6)
+
+            # another model does not reuse the vectors
+            with EmbeddingCache(path, "other") as cache:
+                self.assertEqual(len(cache), 0)
+
+    def test_existing_vectors_and_windows(self):
+        embedder = CountingEmbedder()
+        insights = list(make_insights(TEXTS))
+        insights[0].insight_vector = [0.5] * DIMENSION
+        stats = {}
+        list(embed_insights(iter(insights), embedder, window=2, stats=stats))
+
+        self.assertEqual(insights[0].insight_vector[0], 0.5)
+        self.assertEqual(stats["texts"], 4)
+        # "short" appears in two windows, so it is embedded twice without a cache
+        self.assertEqual(stats["embedded"], 4)
+
+    def test_wrong_dimension(self):
+        with self.assertRaises(ValueError):
+            list(embed_insights(make_insights(["x"]), lambda texts: [[0.0] * 3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from index_func.datamodels.model import Insight
+from index_func.utils.serialization import upsert_entry
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from index_func.ingest import file_entries, validate_schema
+except ImportError:
+    pa = None
+
+
+def make_columns(count: int, dimension: int = 384) -> dict:
+    return {
+        "docid": [f"doc-{i}" for i in range(count)],
+        "insight": [f"Insight {i} with 100% “quotes”" for i in range(count)],
+        "sentiment_score": [i / 10 for i in range(count)],
+        "date": pa.array([datetime(2025, 1, 2, 3, 4, 5)] * count, pa.timestamp("s")),
+        "themes": [["access", "safety"]] * count,
+        "insight_vector": [[i / 7] * dimension for i in range(count)],
+    }
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestColumnarIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_matches_insight_serialization(self):
+        """Test that columnar entries equal the entries of the same Insight."""
+        columns = make_columns(25)
+        pq.write_table(pa.table(columns), self.path("export.parquet"))
+
+        stats = {}
+        entries = list(file_entries(self.path("export.parquet"), "insights", 10, stats))
+        self.assertEqual((stats["rows"], stats["batches"]), (25, 3))
+
+        insight = Insight(
+            docid="doc-4",
+            insight=columns["insight"][4],
+            insight_vector=columns["insight_vector"][4],
+            sentiment_score=0.4,
+            date=datetime(2025, 1, 2, 3, 4, 5),
+            product=None,
+            country=None,
+            region=None,
+            themes=["access", "safety"],
+        )
+        docid, action_line, source_line = entries[4]
+        _, expected_action, expected_source = upsert_entry("insights", insight)
+        self.assertEqual(docid, "doc-4")
+        self.assertEqual(action_line, expected_action)
+
+        source = json.loads(source_line)["doc"]
+        expected = json.loads(expected_source)["doc"]
+        self.assertEqual(source["date"][:19], expected["date"])
+        for name in ("docid", "insight", "themes", "insight_vector"):
+            self.assertEqual(source[name], expected[name])
+        self.assertAlmostEqual(source["sentiment_score"], 0.4)
+
+    def test_timezone_aware_dates(self):
+        """Test that zoned timestamps are written as the same instant as Insight dates."""
+        noon_utc = datetime(2025, 1, 2, 12, 0, 0, tzinfo=timezone.utc)
+        columns = make_columns(1)
+        columns["date"] = pa.array([noon_utc], pa.timestamp("us", "America/New_York"))
+        pq.write_table(pa.table(columns), self.path("zoned.parquet"))
+
+        _, _, source_line = next(file_entries(self.path("zoned.parquet"), "insights"))
+        written = json.loads(source_line)["doc"]["date"]
+        self.assertTrue(written.endswith("Z"))
+        self.assertEqual(datetime.fromisoformat(written), noon_utc)
+
+    def test_arrow_ipc_file(self):
+        table = pa.table(make_columns(5, dimension=384))
+        with pa.OSFile(self.path("export.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        entries = list(file_entries(self.path("export.arrow"), "insights", 2))
+        self.assertEqual([docid for docid, _, _ in entries], table["docid"].to_pylist())
+
+    def test_schema_validation(self):
+        """Test that columns are checked against the index mapping."""
+        columns = make_columns(2)
+        columns["docid"] = [1, 2]
+        columns["unknown"] = ["x", "y"]
+        columns["insight_vector"] = pa.array([[0.5] * 8] * 2, pa.list_(pa.float32(), 8))
+        problems = validate_schema(pa.table(columns).schema)
+        self.assertEqual(len(problems), 4)
+
+        pq.write_table(pa.table(columns), self.path("bad.parquet"))
+        with self.assertRaises(ValueError):
+            list(file_entries(self.path("bad.parquet"), "insights"))
+
+    def test_wrong_vector_length(self):
+        columns = make_columns(2)
+        columns["insight_vector"] = [[0.5] * 384, [0.5] * 383]
+        pq.write_table(pa.table(columns), self.path("short.parquet"))
+        with self.assertRaises(pa.ArrowInvalid):
+            list(file_entries(self.path("short.parquet"), "insights"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from .conftest import make_insights
+from .opensearch_stand_in import OpenSearchStandIn
+
+try:
+    import opensearchpy
+except ImportError:
+    opensearchpy = None
+
+if opensearchpy is not None:
+    from index_func.utils import os_utils
+
+
+@unittest.skipIf(opensearchpy is None, "opensearch-py is not installed")
+class TestParallelBulkIndex(unittest.TestCase):
+    def index(self, server, count, **kwargs):
+        stats = {}
+        result = os_utils.parallel_bulk_index(
+            server.client(),
+            "insights",
+            make_insights(count),
+            max_docs=10,
+            initial_backoff=0.01,
+            stats=stats,
+            **kwargs,
+        )
+        return result, stats
+
+    def test_bounded_in_flight(self):
+        """Test that all documents arrive and in-flight requests stay bounded."""
+        with OpenSearchStandIn(delay=0.02) as server:
+            result, stats = self.index(server, 200, max_in_flight=3)
+
+        self.assertEqual(result.value, [])
+        self.assertEqual(len(server.indices["insights"]), 200)
+        self.assertLessEqual(server.max_in_flight, 3)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertEqual(stats["documents"], 200)
+        self.assertEqual(stats["requests"], 20)
+        self.assertGreater(stats["documents_per_second"], 0)
+
+    def test_throttled_requests_are_retried(self):
+        """Test that 429 responses are retried until they succeed."""
+        with OpenSearchStandIn() as server:
+            server.throttle_requests = 3
+            result, stats = self.index(server, 50, max_in_flight=2)
+
+        self.assertEqual(result.value, [])
+        self.assertEqual(len(server.indices["insights"]), 50)
+        self.assertEqual(stats["retries"], 3)
+        self.assertEqual(stats["requests"], 8)
+        # every document of a throttled request was throttled with it
+        self.assertEqual(stats["throttled"], 30)
+
+    def test_only_rejected_documents_are_resent(self):
+        """Test that a partial failure re-sends only the rejected documents."""
+        with OpenSearchStandIn() as server:
+            server.reject_items = 4
+            result, stats = self.index(server, 10, max_in_flight=1)
+
+        self.assertEqual(result.value, [])
+        self.assertEqual(len(server.indices["insights"]), 10)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["throttled"], 4)
+        # the retry carried only the 4 rejected documents
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["documents"], 10)
+
+    def test_permanent_and_exhausted_failures(self):
+        """Test that mapping errors and documents throttled past max_retries are reported."""
+        with OpenSearchStandIn() as server:
+            server.fail_ids = {"doc-3"}
+            server.reject_items = 1000
+            result, stats = self.index(server, 5, max_in_flight=1, max_retries=2)
+
+        self.assertEqual(len(result.value), 5)
+        statuses = {error["_id"]: error["status"] for error in result.value}
+        self.assertEqual(statuses.pop("doc-3"), 400)
+        self.assertEqual(set(statuses.values()), {429})
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["requests"], 3)
+        # 4 documents rejected on each of the 3 attempts, the last one included
+        self.assertEqual(stats["throttled"], 12)
+        self.assertEqual(stats["failed"], 5)
+        self.assertEqual(stats["documents"], 0)
+
+    def test_exhausted_request_throttling(self):
+        """Test that a request throttled past max_retries reports bulk item errors."""
+        with OpenSearchStandIn() as server:
+            server.throttle_requests = 1000
+            result, stats = self.index(server, 3, max_in_flight=1, max_retries=1)
+
+        self.assertEqual(len(result.value), 3)
+        for error in result.value:
+            self.assertEqual(set(error), {"_id", "action", "status", "error"})
+            self.assertEqual(error["status"], 429)
+            self.assertEqual(error["error"], {"type": "too_many_requests"})
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["failed"], 3)
+        self.assertEqual(stats["documents"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from datetime import datetime
+
+from .conftest import make_insight
+from .opensearch_stand_in import OpenSearchStandIn
+
+try:
+    import opensearchpy
+except ImportError:
+    opensearchpy = None
+
+if opensearchpy is not None:
+    from index_func import search
+    from index_func.utils import os_utils
+
+COUNTRIES = ["de", "fr", "it"]
+
+
+def make_insights(count: int):
+    for i in range(count):
+        yield make_insight(
+            i,
+            docid=f"doc-{i:03d}",
+            insight=f"insight about {'dosing' if i % 2 else 'access'} number {i}",
+            insight_vector=[i / count] * 384,
+            sentiment_score=i / count,
+            date=datetime(2025, 1, 1 + i % 28),
+            country=COUNTRIES[i % 3],
+            region="europe",
+            themes=["safety"] if i % 4 == 0 else ["supply"],
+        )
+
+
+@unittest.skipIf(opensearchpy is None, "opensearch-py is not installed")
+class TestBuildQuery(unittest.TestCase):
+    def test_knn_with_filter(self):
+        """Test that filters go inside the kNN clause and vectors are excluded."""
+        body = search.build_query(
+            vector=[0.1] * 384,
+            filters={"country": "de", "themes": ["safety", "supply"]},
+            ranges={"date": ("2025-01-01", None)},
+            k=5,
+        )
+        knn = body["query"]["knn"]["insight_vector"]
+        self.assertEqual(knn["k"], 5)
+        self.assertEqual(
+            knn["filter"]["bool"]["filter"],
+            [
+                {"term": {"country": "de"}},
+                {"terms": {"themes": ["safety", "supply"]}},
+                {"range": {"date": {"gte": "2025-01-01"}}},
+            ],
+        )
+        self.assertEqual(body["_source"], {"excludes": ["insight_vector"]})
+
+    def test_include_vectors_and_unknown_fields(self):
+        self.assertNotIn("_source", search.build_query(include_vectors=True))
+        with self.assertRaises(ValueError):
+            search.build_query(filters={"insight": "text"})
+        with self.assertRaises(ValueError):
+            search.build_query(ranges={"country": (1, 2)})
+
+
+@unittest.skipIf(opensearchpy is None, "opensearch-py is not installed")
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.server = OpenSearchStandIn().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.client = self.server.client()
+        os_utils.bulk_index(self.client, "insights", make_insights(60))
+
+    def test_filter_first_knn(self):
+        """Test that kNN neighbours come from the filtered documents only."""
+        body = search.build_query(vector=[0.0] * 384, filters={"country": "fr"}, k=3)
+        response = search.search(self.client, "insights", body)
+
+        self.assertEqual(
+            [hit["_id"] for hit in response.hits], ["doc-001", "doc-004", "doc-007"]
+        )
+        self.assertNotIn("insight_vector", response.hits[0]["_source"])
+        self.assertGreater(response.latency_ms, 0)
+
+    def test_msearch_batches_in_order(self):
+        """Test that many queries go out in few _msearch round trips, in order."""
+        bodies = [
+            search.build_query(filters={"country": COUNTRIES[i % 3]}, size=1)
+            for i in range(7)
+        ]
+        bodies.append(search.build_query(text="dosing", size=100))
+        calls_before = len(self.server.calls)
+        responses = search.msearch(self.client, "insights", bodies, max_queries=3)
+
+        msearch_calls = [
+            path
+            for _, path, _ in self.server.calls[calls_before:]
+            if "_msearch" in path
+        ]
+        self.assertEqual(len(msearch_calls), 3)
+        self.assertEqual(len(responses), 8)
+        for i, response in enumerate(responses[:7]):
+            self.assertEqual(response.hits[0]["_source"]["country"], COUNTRIES[i % 3])
+        self.assertEqual(responses[7].total, 30)
+
+        stats = search.search_stats(responses)
+        self.assertEqual((stats["queries"], stats["errors"]), (8, 0))
+
+    def test_msearch_error_per_query(self):
+        responses = search.msearch(
+            self.client, "missing", [search.build_query()], max_queries=3
+        )
+        self.assertFalse(responses[0].ok)
+        self.assertEqual(search.search_stats(responses)["errors"], 1)
+
+    def test_search_after_pages(self):
+        """Test that search_after pagination returns every hit once, without from."""
+        body = search.build_query(filters={"region": "europe"})
+        pages = list(search.search_pages(self.client, "insights", body, page_size=25))
+
+        ids = [hit["_id"] for page in pages for hit in page.hits]
+        self.assertEqual([len(page.hits) for page in pages], [25, 25, 10])
+        self.assertEqual(sorted(ids), sorted(set(ids)))
+        self.assertEqual(len(ids), 60)
+        sent = [body for _, body in self.server.searches]
+        self.assertNotIn("from", sent[-1])
+        self.assertEqual(sent[-1]["search_after"], pages[1].search_after)
+
+
+if __name__ == "__main__":
+    unittest.main()
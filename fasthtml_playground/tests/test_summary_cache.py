@@ -0,0 +1,102 @@
+import gzip
+import json
+import unittest
+
+from summary_cache import (
+    SummaryCache,
+    etag_matches,
+    parse_accept_encoding,
+    transform_html,
+)
+
+SUMMARY = (
+    "<html><body><h1>Report</h1><ul>"
+    + "".join(f"<li>Finding {i}</li>" for i in range(100))
+    + "</ul></body></html>"
+)
+
+
+class TestSummaryCache(unittest.TestCase):
+    def test_render_and_hit(self):
+        """Test that the transformed summary is rendered once and then served from cache."""
+        cache = SummaryCache()
+        first = cache.respond("s1", "v1", SUMMARY)
+        second = cache.respond("s1", "v1", SUMMARY)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.body, second.body)
+        payload = json.loads(first.body)
+        self.assertEqual(payload["result"]["summary"], transform_html(SUMMARY))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_new_version_is_rendered(self):
+        """Test that a new content version gets a new render and ETag."""
+        cache = SummaryCache()
+        old = cache.respond("s1", "v1", SUMMARY)
+        new = cache.respond("s1", "v2", SUMMARY.replace("Report", "Update"))
+        self.assertNotEqual(old.headers["ETag"], new.headers["ETag"])
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_if_none_match(self):
+        """Test that a current ETag gets a 304 carrying the ETag the 200 would have sent."""
+        cache = SummaryCache()
+        for accept_encoding in (None, "gzip"):
+            with self.subTest(accept_encoding=accept_encoding):
+                full = cache.respond(
+                    "s1", "v1", SUMMARY, accept_encoding=accept_encoding
+                )
+                response = cache.respond(
+                    "s1",
+                    "v1",
+                    SUMMARY,
+                    if_none_match=full.headers["ETag"],
+                    accept_encoding=accept_encoding,
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.body, b"")
+                self.assertEqual(response.headers["ETag"], full.headers["ETag"])
+        stale = cache.respond("s1", "v1", SUMMARY, if_none_match='"other"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_compression(self):
+        """Test that large bodies are compressed and small ones are not."""
+        cache = SummaryCache()
+        response = cache.respond(
+            "s1", "v1", SUMMARY, accept_encoding="br;q=0, gzip, deflate"
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(response.body), cache.respond("s1", "v1", SUMMARY).body
+        )
+        self.assertNotEqual(
+            response.headers["ETag"], cache.respond("s1", "v1", SUMMARY).headers["ETag"]
+        )
+
+        small = cache.respond("s2", "v1", "<p>short</p>", accept_encoding="gzip")
+        self.assertNotIn("Content-Encoding", small.headers)
+
+    def test_size_bound(self):
+        """Test that least recently used renders are evicted to stay under max_bytes."""
+        cache = SummaryCache(max_bytes=5000)
+        for i in range(5):
+            cache.respond(f"s{i}", "v1", SUMMARY)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 5000)
+        self.assertGreater(stats["evictions"], 0)
+        cache.respond("s4", "v1", SUMMARY)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_header_parsing(self):
+        self.assertEqual(
+            parse_accept_encoding("gzip;q=0.5, br, identity;q=0"), ["br", "gzip"]
+        )
+        self.assertTrue(etag_matches('W/"abc-gzip", "x"', '"abc"'))
+        self.assertTrue(etag_matches('"abc"', '"abc-br"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"abcd"', '"abc"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Transform many HTML documents at once on a process pool.
+
+    python batch.py reports/*.html --output-dir out --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fix import transform_html
+
+
+@dataclass
+class TransformResult:
+    """
+    Outcome of one document; exactly one of output and error is set.
+    """
+
+    output: Optional[str] = None
+    error: Optional[str] = None
+    size: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _transform_one(
+    item: Union[str, Path], parser: str
+) -> Tuple[Optional[str], Optional[str], int]:
+    # runs in the worker: files are read there so only paths are pickled
+    size = 0
+    try:
+        if isinstance(item, Path):
+            html = item.read_text(encoding="utf-8")
+        else:
+            html = item
+        size = len(html.encode("utf-8"))
+        return transform_html(html, parser), None, size
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", size
+
+
+def _transform_chunk(
+    items: List[Union[str, Path]], parser: str
+) -> List[Tuple[Optional[str], Optional[str], int]]:
+    return [_transform_one(item, parser) for item in items]
+
+
+def _chunks(items: List, chunksize: int) -> List[List]:
+    return [items[i : i + chunksize] for i in range(0, len(items), chunksize)]
+
+
+def transform_many(
+    items: Iterable[Union[str, os.PathLike]],
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    parser: str = "html.parser",
+    stats: Optional[Dict[str, float]] = None,
+) -> List[TransformResult]:
+    """
+    Applies transform_html to every item, spread over a process pool.
+
+    Results are returned in input order. An item that fails (unreadable file,
+    parser error) gets a result with error set instead of stopping the batch.
+
+    Args:
+        items: HTML strings, or paths (pathlib.Path / os.PathLike) to UTF-8
+            HTML files; plain str items are always treated as HTML
+        workers: Worker processes, os.cpu_count() by default; 1 runs in
+            this process without a pool
+        chunksize: Documents sent to a worker per task; larger chunks cut
+            inter-process overhead for many small documents
+        parser: BeautifulSoup parser backend, as in transform_html
+        stats: Dict receiving documents, errors, bytes, seconds,
+            documents_per_second and bytes_per_second
+
+    Returns:
+        List[TransformResult]: One result per item, in input order.
+    """
+    items = [item if isinstance(item, str) else Path(item) for item in items]
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(items, max(1, chunksize))
+
+    start_time = time.perf_counter()
+    if workers == 1 or len(chunks) <= 1:
+        outcomes = [_transform_chunk(chunk, parser) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            outcomes = list(
+                executor.map(_transform_chunk, chunks, [parser] * len(chunks))
+            )
+    seconds = time.perf_counter() - start_time
+
+    results = [
+        TransformResult(output=output, error=error, size=size)
+        for outcome in outcomes
+        for output, error, size in outcome
+    ]
+
+    if stats is not None:
+        total_bytes = sum(result.size for result in results)
+        stats.update(
+            documents=len(results),
+            errors=sum(not result.ok for result in results),
+            bytes=total_bytes,
+            seconds=seconds,
+            documents_per_second=len(results) / seconds if seconds else 0.0,
+            bytes_per_second=total_bytes / seconds if seconds else 0.0,
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--output-dir", type=Path, required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--parser", default="html.parser")
+    args = parser.parse_args()
+
+    stats: Dict[str, float] = {}
+    results = transform_many(
+        args.paths, args.workers, args.chunksize, args.parser, stats=stats
+    )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for path, result in zip(args.paths, results):
+        if result.ok:
+            (args.output_dir / path.name).write_text(result.output, encoding="utf-8")
+        else:
+            print(f"{path}: {result.error}")
+
+    print(
+        f"{stats['documents']} documents ({stats['errors']} failed) in "
+        f"{stats['seconds']:.2f}s: {stats['documents_per_second']:.1f} docs/s, "
+        f"{stats['bytes_per_second'] / 1024 / 1024:.2f} MB/s"
+    )
@@ -0,0 +1,91 @@
+"""
+Throughput and peak memory of transform_html against the previous multi-pass
+implementation and the streaming rewriter, on small, medium and multi-MB
+documents, for every installed parser backend.
+
+    python benchmark_fix.py --repeat 3
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from fix import PARSERS, transform_html
+from reference import make_document, transform_html_multipass
+from streaming import transform_html_stream
+
+# Sections per document size
+SIZES = {"small": 2, "medium": 200, "large": 6000}
+
+
+def measure(func, html: str, repeat: int) -> float:
+    """
+    Best wall-clock seconds of repeat calls.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def peak_memory(func, html: str) -> float:
+    """
+    Peak MB allocated by one call, on top of the input.
+    """
+    tracemalloc.start()
+    try:
+        func(html)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def transform_streaming(html: str) -> None:
+    # output chunks are consumed as they come, as a writer to disk would
+    for _ in transform_html_stream(io.StringIO(html)):
+        pass
+
+
+def installed_parsers():
+    for parser in PARSERS:
+        try:
+            BeautifulSoup("", parser)
+        except FeatureNotFound:
+            continue
+        yield parser
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=SIZES)
+    args = parser.parse_args()
+
+    print(
+        f"{'size':>6} {'KB':>7} {'implementation':>24} "
+        f"{'seconds':>8} {'MB/s':>6} {'peak MB':>8}"
+    )
+    for size in args.sizes:
+        html = make_document(SIZES[size])
+        assert transform_html(html) == transform_html_multipass(html)
+        assert "".join(transform_html_stream(html)) == transform_html(html)
+        megabytes = len(html.encode("utf-8")) / 1024 / 1024
+
+        candidates = {"multi-pass (html.parser)": transform_html_multipass}
+        for backend in installed_parsers():
+            candidates[f"single-pass ({backend})"] = (
+                lambda html, backend=backend: transform_html(html, backend)
+            )
+        candidates["streaming (html.parser)"] = transform_streaming
+        for name, func in candidates.items():
+            seconds = measure(func, html, args.repeat)
+            peak = peak_memory(func, html)
+            print(
+                f"{size:>6} {megabytes * 1024:>7.0f} {name:>24} "
+                f"{seconds:>8.3f} {megabytes / seconds:>6.2f} {peak:>8.1f}"
+            )
@@ -0,0 +1,46 @@
+"""
+Reference implementation and sample documents shared by test_fix.py and
+benchmark_fix.py.
+"""
+
+from bs4 import BeautifulSoup
+
+SECTION = """
+<h1>Quarterly review {i}</h1>
+<p>Revenue grew in <b>every</b> region, led by new <a href="/accounts">accounts</a>.</p>
+<h3>Highlights</h3>
+<ul>
+    <li>Item {i}.1
+        <ul>
+            <li>Nested {i}.1.1</li>
+            <li>Nested {i}.1.2</li>
+        </ul>
+    </li>
+    <li>Item {i}.2</li>
+</ul>
+<h5>Notes</h5>
+<p>Figures are <i>unaudited</i>.</p>
+"""
+
+
+def transform_html_multipass(html: str) -> str:
+    """
+    The previous transform_html, one tree walk per rule, kept as the reference.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    content = soup.body or soup
+    for level in range(1, 7):
+        for tag in content.find_all(f"h{level}"):
+            tag.name = "h2"
+    for li in content.find_all("li"):
+        li.name = "p"
+    for ul in content.find_all("ul"):
+        ul.unwrap()
+    for p in content.find_all("p"):
+        p.append("\n")
+    return str(content)
+
+
+def make_document(sections: int) -> str:
+    body = "".join(SECTION.format(i=i) for i in range(sections))
+    return f"<html><body>{body}</body></html>"
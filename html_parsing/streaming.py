@@ -0,0 +1,283 @@
+from html.parser import HTMLParser
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Same rules as fix.transform_html
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+# Tags serialized without an end tag, as BeautifulSoup writes them
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "keygen",
+    "link",
+    "menuitem",
+    "meta",
+    "param",
+    "source",
+    "spacer",
+    "track",
+    "wbr",
+    "basefont",
+    "bgsound",
+    "command",
+    "frame",
+    "image",
+    "isindex",
+    "nextid",
+}
+
+# Tags allowed before <body>; anything else means the document has no body
+HEAD_ELEMENTS = {
+    "html",
+    "head",
+    "title",
+    "meta",
+    "link",
+    "style",
+    "script",
+    "base",
+    "noscript",
+    "template",
+}
+
+# Whitespace-separated attributes, which BeautifulSoup re-joins with single spaces
+LIST_ATTRIBUTES = {"class", "rel", "rev", "accept-charset", "headers", "accesskey"}
+
+# Raw text elements whose content is written unescaped
+RAW_TEXT_ELEMENTS = {"script", "style"}
+
+# Whitespace-only text is collapsed to one newline or space outside these
+PRESERVE_WHITESPACE_ELEMENTS = {"pre", "textarea"}
+
+ASCII_SPACES = " \t\n\r\f"
+
+
+def _escape_text(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _format_attrs(attrs: List[Tuple[str, Optional[str]]]) -> str:
+    # later duplicates win and names are sorted, as in BeautifulSoup
+    values: Dict[str, str] = {}
+    for name, value in attrs:
+        value = value or ""
+        if name in LIST_ATTRIBUTES:
+            value = " ".join(value.split())
+        values[name] = value
+
+    parts = []
+    for name, value in sorted(values.items()):
+        value = _escape_text(value)
+        if '"' in value:
+            if "'" in value:
+                value = f'"{value.replace(chr(34), "&quot;")}"'
+            else:
+                value = f"'{value}'"
+        else:
+            value = f'"{value}"'
+        parts.append(f" {name}={value}")
+    return "".join(parts)
+
+
+class StreamingTransformer(HTMLParser):
+    """
+    Event-based version of transform_html that writes output while parsing.
+
+    Only the stack of open elements is kept, so memory is bounded by the
+    nesting depth plus the <head>, which is held back until the parser knows
+    whether the document has a <body>. Output matches transform_html for
+    documents whose <body> (if any) starts before other body content; a
+    <body> tag appearing after body content is treated as a regular tag.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._stack: List[str] = []
+        self._out: List[str] = []
+        # output before <body> is held back until the mode is known
+        self._pending: Optional[List[str]] = []
+        self._body_depth: Optional[int] = None
+        self._done = False
+        # a text run is held back only while it is all whitespace
+        self._whitespace = ""
+        self._in_text = False
+        # void tags already closed, so a later explicit end tag is a no-op
+        self._closed_void: Dict[str, int] = {}
+
+    def _write(self, text: str) -> None:
+        if self._done:
+            return
+        if self._pending is not None:
+            self._pending.append(text)
+        else:
+            self._out.append(text)
+
+    def _start_document_mode(self) -> None:
+        # no <body> before body content: the whole document is the output
+        if self._pending is not None:
+            self._out.extend(self._pending)
+            self._pending = None
+
+    def _open_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        if tag == "ul":
+            return ""
+        if tag in HEADINGS:
+            tag = "h2"
+        elif tag == "li":
+            tag = "p"
+        if tag in VOID_ELEMENTS:
+            return f"<{tag}{_format_attrs(attrs)}/>"
+        return f"<{tag}{_format_attrs(attrs)}>"
+
+    def _close_tag(self, tag: str) -> str:
+        if tag == "ul":
+            return ""
+        if tag in HEADINGS:
+            return "</h2>"
+        if tag in ("li", "p"):
+            return "\n</p>"
+        return f"</{tag}>"
+
+    def _end_text(self) -> None:
+        # BeautifulSoup collapses whitespace-only strings
+        if self._whitespace:
+            if PRESERVE_WHITESPACE_ELEMENTS.intersection(self._stack):
+                self._write(self._whitespace)
+            else:
+                self._write("\n" if "\n" in self._whitespace else " ")
+        self._whitespace = ""
+        self._in_text = False
+
+    def handle_starttag(self, tag, attrs):
+        self._start_tag(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._closed_void[tag] = self._closed_void.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._start_tag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._closed_void.get(tag):
+            self._closed_void[tag] -= 1
+            return
+        self._end_text()
+        # end tags without a matching open element are dropped
+        if tag not in self._stack:
+            return
+        while self._stack:
+            name = self._stack.pop()
+            self._write(self._close_tag(name))
+            if self._body_depth is not None and len(self._stack) == self._body_depth:
+                self._done = True
+            if name == tag:
+                break
+
+    def _start_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._end_text()
+        if self._pending is not None:
+            if tag == "body":
+                self._pending = None
+                self._body_depth = len(self._stack)
+            elif tag not in HEAD_ELEMENTS:
+                self._start_document_mode()
+
+        self._write(self._open_tag(tag, attrs))
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(tag)
+
+    def handle_data(self, data):
+        # one text run can arrive in several calls at chunk boundaries
+        if not self._in_text:
+            if not data.strip(ASCII_SPACES):
+                self._whitespace += data
+                return
+            data = self._whitespace + data
+            self._whitespace = ""
+            self._in_text = True
+            if self._pending is not None and (
+                not self._stack or self._stack[-1] not in HEAD_ELEMENTS - {"html"}
+            ):
+                self._start_document_mode()
+
+        if self._stack and self._stack[-1] in RAW_TEXT_ELEMENTS:
+            self._write(data)
+        else:
+            self._write(_escape_text(data))
+
+    def handle_comment(self, data):
+        self._end_text()
+        self._write(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        self._end_text()
+        if decl.startswith("DOCTYPE "):
+            decl = decl[len("DOCTYPE ") :]
+        self._write(f"<!DOCTYPE {decl}>\n")
+
+    def handle_pi(self, data):
+        self._end_text()
+        self._write(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        self._end_text()
+        if data.upper().startswith("CDATA["):
+            self._write(f"<![CDATA[{data[len('CDATA['):]}]]>")
+        else:
+            self._write(f"<?{data}?>")
+
+    def close(self):
+        super().close()
+        self._end_text()
+        # elements still open at the end are closed, as BeautifulSoup does
+        while self._stack and not self._done:
+            self.handle_endtag(self._stack[-1])
+        self._start_document_mode()
+
+    def take_output(self) -> str:
+        """
+        Output written since the last call.
+        """
+        output = "".join(self._out)
+        self._out.clear()
+        return output
+
+
+def transform_html_stream(
+    source: Union[str, Iterable[str], IO[str]], chunk_size: int = 64 * 1024
+) -> Iterator[str]:
+    """
+    Streaming transform_html: applies the same rules while parsing and
+    yields output chunks as soon as they are known.
+
+    Args:
+        source: HTML as a string, an iterable of string chunks or a text
+            file object, read chunk_size characters at a time
+        chunk_size: Characters per read from a file object
+
+    Yields:
+        str: Consecutive chunks of the transformed HTML.
+    """
+    if isinstance(source, str):
+        chunks: Iterable[str] = [source]
+    elif hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), "")
+    else:
+        chunks = source
+
+    transformer = StreamingTransformer()
+    for chunk in chunks:
+        transformer.feed(chunk)
+        output = transformer.take_output()
+        if output:
+            yield output
+    transformer.close()
+    output = transformer.take_output()
+    if output:
+        yield output
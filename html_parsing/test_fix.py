@@ -1,9 +1,18 @@
+import io
+import tempfile
 import unittest
-from bs4 import BeautifulSoup
-from fix import transform_html
+from pathlib import Path
+from bs4 import BeautifulSoup, FeatureNotFound
+from batch import transform_many
+from fix import PARSERS, transform_html
+from reference import make_document, transform_html_multipass
+from streaming import transform_html_stream
 
 
 class TestOpenAILLM(unittest.TestCase):
+    def transform(self, html):
+        return transform_html(html)
+
     def setUp(self):
         """Set up test fixtures before each test method."""
         pass
@@ -22,7 +31,7 @@ class TestOpenAILLM(unittest.TestCase):
             </body>
         </html>
         """
-        transformed = transform_html(html)
+        transformed = self.transform(html)
         soup = BeautifulSoup(transformed, "html.parser")
 
         # All headings should be h2
@@ -43,18 +52,18 @@ class TestOpenAILLM(unittest.TestCase):
             </body>
         </html>
         """
-        transformed = transform_html(html)
+        transformed = self.transform(html)
         soup = BeautifulSoup(transformed, "html.parser")
 
         # Original ul should be gone
         self.assertIsNone(soup.find("ul"))
 
-        # Should have 3 paragraphs
+        # Should have 3 paragraphs, each ending in the appended line break
         paragraphs = soup.find_all("p")
         self.assertEqual(len(paragraphs), 3)
-        self.assertEqual(paragraphs[0].text, "Item 1")
-        self.assertEqual(paragraphs[1].text, "Item 2")
-        self.assertEqual(paragraphs[2].text, "Item 3")
+        self.assertEqual(paragraphs[0].text, "Item 1\n")
+        self.assertEqual(paragraphs[1].text, "Item 2\n")
+        self.assertEqual(paragraphs[2].text, "Item 3\n")
 
     def test_paragraph_line_breaks(self):
         """Test that there is a line break after each paragraph."""
@@ -67,13 +76,131 @@ class TestOpenAILLM(unittest.TestCase):
             </body>
         </html>
         """
-        transformed = transform_html(html)
+        transformed = self.transform(html)
 
         # Check that each paragraph ends with a newline character
         self.assertIn("First paragraph\n", transformed)
         self.assertIn("Second paragraph\n", transformed)
         self.assertIn("Third paragraph\n", transformed)
 
+    def test_nested_list_conversion(self):
+        """Test that nested list items become paragraphs in document order."""
+        html = """
+        <html>
+            <body>
+                <ul>
+                    <li>Item 1
+                        <ul>
+                            <li>Nested 1</li>
+                            <li>Nested 2</li>
+                        </ul>
+                    </li>
+                    <li>Item 2</li>
+                </ul>
+            </body>
+        </html>
+        """
+        transformed = self.transform(html)
+        soup = BeautifulSoup(transformed, "html.parser")
+
+        self.assertIsNone(soup.find("ul"))
+        self.assertIsNone(soup.find("li"))
+        paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+        self.assertEqual(
+            paragraphs, ["Item 1 Nested 1 Nested 2", "Nested 1", "Nested 2", "Item 2"]
+        )
+
+    def test_matches_multipass_transform(self):
+        """Test that the single-pass transform matches the previous implementation."""
+        documents = [
+            "<h1>Title</h1><ul><li>One<ul><li>Two</li></ul></li></ul><p>Text</p>",
+            "<html><body><h4>Head</h4><p>Para <b>bold</b></p></body></html>",
+            make_document(3),
+        ]
+        for html in documents:
+            with self.subTest(html=html[:40]):
+                self.assertEqual(self.transform(html), transform_html_multipass(html))
+
+    def test_parser_backends(self):
+        """Test that every installed parser backend applies the same rules."""
+        html = (
+            "<html><body><h3>Title</h3><ul><li>One</li><li>Two</li></ul></body></html>"
+        )
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                try:
+                    transformed = transform_html(html, parser)
+                except FeatureNotFound:
+                    self.skipTest(f"{parser} is not installed")
+                soup = BeautifulSoup(transformed, "html.parser")
+                self.assertEqual([h.name for h in soup.find_all(["h2", "h3"])], ["h2"])
+                self.assertIsNone(soup.find("ul"))
+                self.assertEqual(
+                    [p.get_text(strip=True) for p in soup.find_all("p")], ["One", "Two"]
+                )
+
+
+class TestStreamingTransform(TestOpenAILLM):
+    """Run the same tests against the streaming rewriter, fed in small chunks."""
+
+    def transform(self, html):
+        chunks = (html[i : i + 7] for i in range(0, len(html), 7))
+        return "".join(transform_html_stream(chunks))
+
+    def test_parser_backends(self):
+        self.skipTest("the streaming rewriter has its own tokenizer")
+
+    def test_matches_tree_transform(self):
+        """Test that streaming output equals transform_html for any chunking."""
+        documents = [
+            "<!DOCTYPE html>\n<html><head><title>T</title></head>\n"
+            "<body class='main'><h5 id=a>Head</h5>\n<p>A &amp; B<br>C</p></body></html>",
+            "<div><ul><li>One<li>Two</ul></span><p>Unclosed",
+            "<p data-x='say \"hi\"'>x</p><pre>\n  kept  \n</pre><script>1 < 2</script>",
+            make_document(3),
+        ]
+        for html in documents:
+            for chunk_size in (1, 5, len(html)):
+                with self.subTest(html=html[:40], chunk_size=chunk_size):
+                    chunks = (
+                        html[i : i + chunk_size]
+                        for i in range(0, len(html), chunk_size)
+                    )
+                    self.assertEqual(
+                        "".join(transform_html_stream(chunks)), transform_html(html)
+                    )
+
+    def test_output_is_incremental(self):
+        """Test that output is yielded before the whole input is read."""
+        html = make_document(50)
+        stream = transform_html_stream(io.StringIO(html), chunk_size=1024)
+        first = next(stream)
+        self.assertTrue(transform_html(html).startswith(first))
+        self.assertLess(len(first), len(html) // 2)
+
+
+class TestTransformMany(unittest.TestCase):
+    def test_order_and_errors(self):
+        """Test that results keep input order and a bad item does not stop the batch."""
+        documents = [make_document(i % 3 + 1) + f"<p>{i}</p>" for i in range(9)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.html"
+            path.write_text(documents[0], encoding="utf-8")
+            items = documents + [path, Path(tmp) / "missing.html"]
+
+            stats = {}
+            results = transform_many(items, workers=2, chunksize=2, stats=stats)
+
+        self.assertEqual(
+            [result.output for result in results[:10]],
+            [transform_html(html) for html in documents + documents[:1]],
+        )
+        self.assertFalse(results[10].ok)
+        self.assertIn("FileNotFoundError", results[10].error)
+        self.assertEqual(stats["documents"], 11)
+        self.assertEqual(stats["errors"], 1)
+        self.assertGreater(stats["documents_per_second"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from statistics import mean, stdev
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+# benchmarks.common puts source_code/ on the import path
+from benchmarks.common import BASE_DOC, DOC_COUNTS, QUERY
+
+import inference
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Resident set size of this process in MB, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class PeakRSSSampler:
+    """
+    Samples RSS in a background thread to find the peak within a block.
+
+    Falls back to the process-lifetime ru_maxrss where /proc is unavailable,
+    in which case the reported peak never decreases between blocks.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        if current_rss_mb() is None:
+            # ru_maxrss is KB on Linux and bytes on macOS
+            scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def make_request(num_docs: int, doc_length: int, iteration: int) -> bytes:
+    """
+    JSON request body with num_docs documents of doc_length x BASE_DOC.
+    Doc ids change per iteration so the embedding cache cannot serve them;
+    the score cache, keyed on content, is disabled unless --keep-cache.
+    """
+    return json.dumps(
+        {
+            "query": QUERY,
+            "docs": [" ".join([BASE_DOC] * doc_length)] * num_docs,
+            "doc_ids": [f"it{iteration}-doc{i+1}" for i in range(num_docs)],
+            "k": num_docs,
+        }
+    ).encode("utf-8")
+
+
+def invoke(model, body: bytes, content_type: str = "application/json") -> Any:
+    """
+    Run one request through the handlers as SageMaker would.
+    """
+    input_data = inference.input_fn(body, content_type)
+    prediction = inference.predict_fn(input_data, model)
+    return inference.output_fn(prediction, content_type)
+
+
+def measure_latency(
+    model, num_docs: int, doc_length: int, iterations: int, warmup: int
+) -> Dict[str, Any]:
+    """
+    Latency distribution, throughput and peak RSS for one request shape.
+    """
+    for i in range(warmup):
+        invoke(model, make_request(num_docs, doc_length, -1 - i))
+
+    latencies = []
+    with PeakRSSSampler() as rss:
+        for i in range(iterations):
+            body = make_request(num_docs, doc_length, i)
+            start_time = time.perf_counter()
+            invoke(model, body)
+            latencies.append(time.perf_counter() - start_time)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    return {
+        "num_docs": num_docs,
+        "doc_length": doc_length,
+        "iterations": iterations,
+        "mean": mean(latencies),
+        "std": stdev(latencies) if len(latencies) > 1 else 0,
+        "min": min(latencies),
+        "max": max(latencies),
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "docs_per_sec": num_docs * len(latencies) / sum(latencies),
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+def format_text(report: Dict[str, Any]) -> str:
+    """
+    Render a report in the format of test_results/latency_test_*.txt, with
+    the extra offline metrics appended to each block.
+    """
+    lines = [
+        "Local Configuration:",
+        f"Model Directory: {report['model_dir']}",
+        f"Model Variant: {report['model_variant']}",
+        f"Embedding Cache: {'on' if report['keep_cache'] else 'off'}",
+        "",
+        "Test Results:",
+    ]
+    for result in report["results"]:
+        lines += [
+            f"Documents: {result['num_docs']}",
+            f"Document Length: {result['doc_length']}",
+            f"Mean: {result['mean']:.3f}s",
+            f"Std: {result['std']:.3f}s",
+            f"Min: {result['min']:.3f}s",
+            f"Max: {result['max']:.3f}s",
+            f"P50: {result['p50']:.3f}s",
+            f"P95: {result['p95']:.3f}s",
+            f"P99: {result['p99']:.3f}s",
+            f"Throughput: {result['docs_per_sec']:.1f} docs/s",
+            f"Peak RSS: {result['peak_rss_mb']:.0f} MB",
+            "-------------------",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Benchmark the handlers against a local model directory and write the
+    text and JSON reports to the output directory.
+    """
+    model = inference.model_fn(args.model_dir)
+    if not args.keep_cache:
+        ranker = model.get()
+        ranker.doc_cache = None
+        ranker.score_cache = None
+
+    report = {
+        "timestamp": time.strftime("%Y%m%d-%H%M%S"),
+        "model_dir": args.model_dir,
+        "model_variant": inference.MODEL_VARIANT,
+        "keep_cache": args.keep_cache,
+        "startup_timings": model.startup_timings,
+        "results": [],
+    }
+    for doc_length in args.doc_lengths:
+        for num_docs in args.doc_counts:
+            print(f"Testing with {num_docs} documents of length {doc_length}...")
+            result = measure_latency(
+                model, num_docs, doc_length, args.iterations, args.warmup
+            )
+            report["results"].append(result)
+            print(
+                f"  p50 {result['p50']:.3f}s  p95 {result['p95']:.3f}s  "
+                f"p99 {result['p99']:.3f}s  {result['docs_per_sec']:.1f} docs/s  "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB"
+            )
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base_name = os.path.join(args.output_dir, f"latency_test_{report['timestamp']}")
+    with open(f"{base_name}.txt", "w") as f:
+        f.write(format_text(report))
+    with open(f"{base_name}.json", "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults have been logged to {base_name}.txt and {base_name}.json")
+
+
+def compare(args: argparse.Namespace) -> int:
+    """
+    Compare two JSON reports and return a non-zero exit code when any metric
+    regressed by more than the threshold.
+    """
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    baseline_results = {
+        (r["num_docs"], r["doc_length"]): r for r in baseline["results"]
+    }
+
+    regressions: List[str] = []
+    print(
+        f"{'docs':>6} {'length':>6} {'metric':>12} "
+        f"{'baseline':>10} {'candidate':>10} {'change':>8}"
+    )
+    for result in candidate["results"]:
+        key = (result["num_docs"], result["doc_length"])
+        if key not in baseline_results:
+            continue
+        for metric in args.metrics:
+            old, new = baseline_results[key][metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            # throughput regresses when it drops, everything else when it grows
+            regressed = -change if metric == "docs_per_sec" else change
+            flag = " REGRESSION" if regressed > args.threshold else ""
+            print(
+                f"{key[0]:>6} {key[1]:>6} {metric:>12} "
+                f"{old:>10.3f} {new:>10.3f} {change:>7.1f}%{flag}"
+            )
+            if flag:
+                regressions.append(f"{metric} at {key[0]} docs x {key[1]}")
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} metric(s) regressed by more than {args.threshold}%"
+        )
+        return 1
+    print(f"\nNo regression above {args.threshold}%")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline latency benchmark for the reranker handlers"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="benchmark a local model directory")
+    run_parser.add_argument("--model-dir", default="model")
+    run_parser.add_argument("--doc-counts", type=int, nargs="+", default=DOC_COUNTS)
+    run_parser.add_argument(
+        "--doc-lengths",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="document lengths as multiples of the base document",
+    )
+    run_parser.add_argument("--iterations", type=int, default=10)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument(
+        "--keep-cache",
+        action="store_true",
+        help="keep the document embedding and score caches enabled",
+    )
+    run_parser.add_argument("--output-dir", default="test_results")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument(
+        "--metrics", nargs="+", default=["p50", "p95"], help="metrics to compare"
+    )
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10.0, help="allowed regression in percent"
+    )
+
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
@@ -0,0 +1,90 @@
+"""
+Measure reranker cold start by calling model_fn in fresh interpreters.
+
+Run from the rerankers directory against a packaged model directory:
+
+    python benchmarks/cold_start.py --model-dir model --runs 5
+
+Each run starts a new Python process so module imports and weight loading
+are measured cold (apart from the OS page cache).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import mean
+
+from common import SOURCE_DIR
+
+CHILD = """
+import json, sys, time
+start_time = time.perf_counter()
+sys.path.insert(0, {source_dir!r})
+from loguru import logger
+logger.remove()
+import inference
+model = inference.model_fn({model_dir!r})
+timings = dict(model.startup_timings)
+timings["process_to_ready"] = time.perf_counter() - start_time
+print(json.dumps(timings))
+"""
+
+
+def run_once(model_dir: str, env: dict) -> dict:
+    """
+    Load the model in a fresh interpreter and return its startup timings.
+    """
+    code = CHILD.format(source_dir=SOURCE_DIR, model_dir=os.path.abspath(model_dir))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reranker cold start")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--variant", default=None, help="RERANKER_MODEL_VARIANT")
+    parser.add_argument(
+        "--compare-factory",
+        action="store_true",
+        help="also measure the Reranker factory path (RERANKER_FAST_START=0)",
+    )
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    modes = {"fast_start": "1"}
+    if args.compare_factory:
+        modes["factory"] = "0"
+
+    results = {}
+    for mode, fast_start in modes.items():
+        env = dict(os.environ, RERANKER_FAST_START=fast_start)
+        if args.variant:
+            env["RERANKER_MODEL_VARIANT"] = args.variant
+
+        runs = [run_once(args.model_dir, env) for _ in range(args.runs)]
+        phases = list(dict.fromkeys(phase for run in runs for phase in run))
+        results[mode] = {
+            phase: mean(run.get(phase, 0.0) for run in runs) for phase in phases
+        }
+
+        print(f"\n{mode} ({args.runs} runs, mean seconds)")
+        for phase, seconds in results[mode].items():
+            print(f"  {phase:<18} {seconds:.3f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"timestamp": time.strftime("%Y%m%d-%H%M%S"), "results": results},
+                f,
+                indent=2,
+            )
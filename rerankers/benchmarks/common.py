@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import time
+from statistics import mean, stdev
+from typing import Any, Callable, Dict, List
+
+# The handlers live in source_code/ so they can be shipped as the SageMaker source_dir
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "source_code")
+if SOURCE_DIR not in sys.path:
+    sys.path.insert(0, SOURCE_DIR)
+
+DOC_COUNTS = [10, 50, 100, 200, 500, 1000]
+
+# Same base document as test_endpoint.ipynb
+BASE_DOC = """Machine learning is a subset of artificial intelligence that enables systems to learn and improve from experience without being explicitly programmed. 
+It uses algorithms and statistical models to analyze and draw inferences from patterns in data."""
+
+QUERY = "What is machine learning?"
+
+
+def make_docs(num_docs: int, mixed_lengths: bool = True, seed: int = 0) -> List[str]:
+    """
+    Build a benchmark candidate set from BASE_DOC.
+
+    With mixed_lengths, each document repeats BASE_DOC 1-8 times so that
+    padding to the longest document is as wasteful as in real candidate sets.
+    """
+    if not mixed_lengths:
+        return [BASE_DOC] * num_docs
+
+    rng = random.Random(seed)
+    return [" ".join([BASE_DOC] * rng.randint(1, 8)) for _ in range(num_docs)]
+
+
+def make_payload(num_docs: int, mixed_lengths: bool = True) -> Dict[str, Any]:
+    """
+    Build a request payload in the endpoint's JSON format.
+    """
+    return {
+        "query": QUERY,
+        "docs": make_docs(num_docs, mixed_lengths),
+        "doc_ids": [f"doc{i+1}" for i in range(num_docs)],
+        "k": num_docs,
+    }
+
+
+def measure(fn: Callable[[], Any], num_iterations: int = 3) -> Dict[str, float]:
+    """
+    Time fn over num_iterations sequential calls.
+    """
+    latencies = []
+    for _ in range(num_iterations):
+        start_time = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start_time)
+
+    return {
+        "mean": mean(latencies),
+        "std": stdev(latencies) if len(latencies) > 1 else 0,
+        "min": min(latencies),
+        "max": max(latencies),
+    }
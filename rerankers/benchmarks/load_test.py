@@ -0,0 +1,59 @@
+"""
+Concurrent load test against a running local_server.py (or any endpoint
+speaking the SageMaker /invocations protocol over HTTP).
+
+    python local_server.py --model-dir model &
+    python benchmarks/load_test.py --url http://localhost:8080 --concurrency 8
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from common import make_payload
+
+
+def invoke(url: str, body: bytes) -> float:
+    request = urllib.request.Request(
+        f"{url}/invocations",
+        data=body,
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    start_time = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the local reranker server")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--num-docs", type=int, default=50)
+    args = parser.parse_args()
+
+    body = json.dumps(make_payload(args.num_docs)).encode("utf-8")
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(
+            pool.map(lambda _: invoke(args.url, body), range(args.requests))
+        )
+    elapsed = time.perf_counter() - start_time
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    print(
+        f"{args.requests} requests x {args.num_docs} docs, concurrency {args.concurrency}"
+    )
+    print(f"p50 {p50:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s")
+    print(
+        f"throughput {args.requests / elapsed:.1f} req/s, {args.requests * args.num_docs / elapsed:.1f} docs/s"
+    )
+
+    with urllib.request.urlopen(f"{args.url}/metrics") as response:
+        print(f"server metrics: {json.loads(response.read())}")
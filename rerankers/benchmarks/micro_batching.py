@@ -0,0 +1,52 @@
+"""
+Compare length-bucketed micro-batching against the single Reranker.rank call.
+
+Run from the rerankers directory against a packaged model directory:
+
+    python benchmarks/micro_batching.py --model-dir model
+"""
+
+import argparse
+
+from loguru import logger
+
+from common import DOC_COUNTS, make_payload, measure
+
+import inference
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched encoding")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=inference.BATCH_SIZE)
+    parser.add_argument(
+        "--max-batch-tokens", type=int, default=inference.MAX_BATCH_TOKENS
+    )
+    args = parser.parse_args()
+
+    logger.remove()
+    model = inference.model_fn(args.model_dir).get()
+    # Measure encoding, not the embedding and score caches
+    model.doc_cache = None
+    model.score_cache = None
+
+    print(f"Batch size: {args.batch_size}, max batch tokens: {args.max_batch_tokens}\n")
+    print(
+        f"{'Documents':>9}  {'single call':>12}  {'micro-batched':>13}  {'speedup':>7}"
+    )
+    for num_docs in DOC_COUNTS:
+        payload = make_payload(num_docs)
+        payload["batch_size"] = args.batch_size
+        payload["max_batch_tokens"] = args.max_batch_tokens
+
+        single = measure(
+            lambda: model.rank(
+                query=payload["query"], docs=payload["docs"], doc_ids=payload["doc_ids"]
+            ),
+            args.iterations,
+        )
+        batched = measure(lambda: inference.predict_fn(payload, model), args.iterations)
+        print(
+            f"{num_docs:>9}  {single['mean']:>11.3f}s  {batched['mean']:>12.3f}s  "
+            f"{single['mean'] / batched['mean']:>6.2f}x"
+        )
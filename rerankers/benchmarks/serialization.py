@@ -0,0 +1,72 @@
+"""
+Time request parsing and response serialization per content type.
+
+No model is needed; predictions are synthetic. Run from the rerankers directory:
+
+    python benchmarks/serialization.py --doc-counts 1000 10000
+"""
+
+import argparse
+import json
+import random
+
+from common import make_payload, measure
+
+import serialization
+from serialization import JSON, MSGPACK, NPZ, decode_request, encode_response
+
+
+def make_prediction(num_docs: int) -> dict:
+    rng = random.Random(0)
+    return {
+        "rankings": [
+            {"doc_id": f"doc{i+1}", "score": rng.uniform(0, 30)}
+            for i in range(num_docs)
+        ]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reranker serialization")
+    parser.add_argument("--doc-counts", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    for num_docs in args.doc_counts:
+        payload = make_payload(num_docs)
+        prediction = make_prediction(num_docs)
+        print(f"\nDocuments: {num_docs}")
+
+        # Requests: stdlib json against the negotiated decoders
+        json_body = json.dumps(payload).encode()
+        request_bodies = {"json (stdlib)": (json_body, None), "json": (json_body, JSON)}
+        if serialization.msgpack is not None:
+            request_bodies["msgpack"] = (serialization.msgpack.packb(payload), MSGPACK)
+
+        for name, (body, content_type) in request_bodies.items():
+            if content_type is None:
+                result = measure(lambda: json.loads(body), args.iterations)
+            else:
+                result = measure(
+                    lambda: decode_request(body, content_type), args.iterations
+                )
+            print(
+                f"  request  {name:<14} {len(body):>10} bytes  {result['mean'] * 1000:>8.3f}ms"
+            )
+
+        # Responses
+        response_types = {"json (stdlib)": JSON, "json (orjson)": JSON, "npz": NPZ}
+        if serialization.msgpack is not None:
+            response_types["msgpack"] = MSGPACK
+
+        for name, accept in response_types.items():
+            serialization.FAST_JSON_RESPONSE = name == "json (orjson)"
+            if serialization.FAST_JSON_RESPONSE and serialization.orjson is None:
+                continue
+            body = encode_response(prediction, accept)
+            result = measure(
+                lambda: encode_response(prediction, accept), args.iterations
+            )
+            print(
+                f"  response {name:<14} {len(body):>10} bytes  {result['mean'] * 1000:>8.3f}ms"
+            )
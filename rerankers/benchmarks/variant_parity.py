@@ -0,0 +1,135 @@
+"""
+Check ranking parity and CPU speedup of packaged model variants against fp32.
+
+Run from the rerankers directory after packaging the variants with deploy.py:
+
+    python benchmarks/variant_parity.py --model-dir model --variants int8 onnx
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from statistics import mean
+from typing import Dict, List
+
+from loguru import logger
+
+from common import BASE_DOC
+
+import inference
+from colbert import encode_documents, encode_query, maxsim
+from rerankers import Reranker
+from variants import load_variant
+
+QUERIES = [
+    "What is machine learning?",
+    "How do neural networks learn from data?",
+    "statistical models for inference",
+    "difference between artificial intelligence and machine learning",
+    "supervised learning with labelled examples",
+    "clinical trial results for a new oncology drug",
+    "how to deploy a model on a serverless endpoint",
+    "patterns in customer feedback",
+]
+
+SENTENCES = [
+    BASE_DOC,
+    "Neural networks adjust their weights with gradient descent to reduce a loss function.",
+    "Supervised learning fits a model to labelled examples and evaluates it on held out data.",
+    "Artificial intelligence is a broad field and machine learning is one approach within it.",
+    "Statistical inference draws conclusions about a population from a sample.",
+    "The phase three trial met its primary endpoint of progression free survival.",
+    "Oncology treatments are often evaluated against the current standard of care.",
+    "Serverless endpoints scale to zero and pay a cold start penalty on the first request.",
+    "Models are packaged as archives and uploaded to object storage before deployment.",
+    "Customer feedback surveys reveal recurring complaints about delivery times.",
+    "Sentiment analysis classifies text as positive, negative or neutral.",
+    "The weather was pleasant and the meeting finished early.",
+]
+
+
+def make_docs(num_docs: int, seed: int = 0) -> List[str]:
+    """
+    Fixed candidate set mixing relevant and off-topic sentences.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(SENTENCES, rng.randint(1, 4))) for _ in range(num_docs)]
+
+
+def ndcg_at_k(reference: List[int], candidate: List[int], k: int) -> float:
+    """
+    NDCG@k of candidate, using graded relevance k - rank from the reference
+    ranking so that swaps near the top cost more than swaps near the cut-off.
+    """
+    relevance = {doc: k - rank for rank, doc in enumerate(reference[:k])}
+    dcg = sum(
+        relevance.get(doc, 0) / math.log2(rank + 2)
+        for rank, doc in enumerate(candidate[:k])
+    )
+    ideal = sum(
+        relevance[doc] / math.log2(rank + 2) for rank, doc in enumerate(reference[:k])
+    )
+    return dcg / ideal if ideal else 1.0
+
+
+def rank(ranker, docs: List[str]) -> Dict[str, object]:
+    """
+    Rank the fixed documents for every query, timing the model work.
+    """
+    start_time = time.perf_counter()
+    doc_embeddings = encode_documents(
+        ranker, docs, inference.BATCH_SIZE, inference.MAX_BATCH_TOKENS
+    )
+    rankings = []
+    for query in QUERIES:
+        query_embeddings, query_length = encode_query(ranker, query)
+        scores = maxsim(query_embeddings, query_length, doc_embeddings)
+        rankings.append(sorted(range(len(docs)), key=lambda i: scores[i], reverse=True))
+    return {"rankings": rankings, "seconds": time.perf_counter() - start_time}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare model variants with fp32")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--variants", nargs="+", default=["int8", "onnx"])
+    parser.add_argument("--num-docs", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    model_path = os.path.join(args.model_dir, inference.MODEL_NAME.replace("/", "-"))
+    docs = make_docs(args.num_docs)
+
+    reference_ranker = Reranker(model_path, model_type="colbert", verbose=0)
+    runs = [rank(reference_ranker, docs) for _ in range(args.iterations)]
+    reference = runs[0]["rankings"]
+    reference_seconds = mean(run["seconds"] for run in runs)
+    print(
+        f"fp32: {reference_seconds:.3f}s for {len(QUERIES)} queries x {len(docs)} docs\n"
+    )
+
+    print(
+        f"{'variant':>8}  {'seconds':>8}  {'speedup':>7}  {f'NDCG@{args.k}':>8}  {f'top-{args.k} overlap':>14}"
+    )
+    for variant in args.variants:
+        ranker = load_variant(
+            Reranker(model_path, model_type="colbert", verbose=0), model_path, variant
+        )
+        runs = [rank(ranker, docs) for _ in range(args.iterations)]
+        seconds = mean(run["seconds"] for run in runs)
+        rankings = runs[0]["rankings"]
+
+        ndcg = mean(
+            ndcg_at_k(ref, cand, args.k) for ref, cand in zip(reference, rankings)
+        )
+        overlap = mean(
+            len(set(ref[: args.k]) & set(cand[: args.k])) / args.k
+            for ref, cand in zip(reference, rankings)
+        )
+        print(
+            f"{variant:>8}  {seconds:>7.3f}s  {reference_seconds / seconds:>6.2f}x  "
+            f"{ndcg:>8.4f}  {overlap:>14.2%}"
+        )
@@ -0,0 +1,129 @@
+"""
+Precompute ColBERT document embeddings for a corpus into an embedding store.
+
+The corpus is a JSONL file with one record per document, e.g. the Insight
+records indexed into OpenSearch. Each run appends one segment to the store, so
+new or changed documents can be added incrementally:
+
+    python build_embedding_store.py corpus.jsonl --model-dir model \\
+        --id-field docid --text-field insight --skip-existing
+
+The store is written into the ColBERT model's directory, model/<model>/<store
+name>, so deploy.py packages it with the model and model_fn opens it when the
+model is loaded.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Tuple
+
+from loguru import logger
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source_code")
+if SOURCE_DIR not in sys.path:
+    sys.path.insert(0, SOURCE_DIR)
+
+import inference
+from colbert import encode_documents
+from embedding_store import MANIFEST_FILE, EmbeddingStore, EmbeddingStoreWriter
+from loading import load_ranker
+
+
+def read_corpus(
+    path: str, id_field: str, text_field: str, chunk_size: int
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Yield (doc_ids, texts) chunks of a JSONL corpus.
+    """
+    doc_ids, texts = [], []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            doc_ids.append(str(record[id_field]))
+            texts.append(record[text_field])
+            if len(doc_ids) == chunk_size:
+                yield doc_ids, texts
+                doc_ids, texts = [], []
+    if doc_ids:
+        yield doc_ids, texts
+
+
+def build(args: argparse.Namespace) -> None:
+    model_path = os.path.join(args.model_dir, args.model.replace("/", "-"))
+    store_dir = os.path.join(model_path, args.store)
+    ranker = load_ranker(model_path, args.variant)
+
+    existing = None
+    if args.skip_existing and os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        existing = EmbeddingStore(store_dir)
+
+    writer = None
+    num_docs = num_skipped = num_tokens = 0
+    start_time = time.perf_counter()
+    for doc_ids, texts in read_corpus(
+        args.corpus, args.id_field, args.text_field, args.chunk_size
+    ):
+        if existing is not None:
+            stored = existing.get_many(doc_ids)
+            keep = [i for i, emb in enumerate(stored) if emb is None]
+            num_skipped += len(doc_ids) - len(keep)
+            doc_ids = [doc_ids[i] for i in keep]
+            texts = [texts[i] for i in keep]
+            if not doc_ids:
+                continue
+
+        embeddings = encode_documents(
+            ranker, texts, args.batch_size, args.max_batch_tokens
+        )
+        if writer is None:
+            writer = EmbeddingStoreWriter(store_dir, embeddings[0].shape[1])
+        writer.add_many(doc_ids, (emb.float().numpy() for emb in embeddings))
+
+        num_docs += len(doc_ids)
+        num_tokens += sum(emb.shape[0] for emb in embeddings)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Encoded {num_docs} docs ({num_docs / elapsed:.1f} docs/s)")
+
+    if writer is not None:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Wrote {num_docs} docs ({num_tokens} tokens) to {store_dir} in "
+        f"{elapsed:.1f}s, skipped {num_skipped} already stored docs"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precompute ColBERT document embeddings into an embedding store"
+    )
+    parser.add_argument("corpus", help="JSONL file with one document per line")
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument(
+        "--model", default=inference.MODEL_NAME, help="packaged ColBERT model"
+    )
+    parser.add_argument(
+        "--store",
+        default=inference.EMBEDDING_STORE,
+        help="store directory, relative to the model's directory",
+    )
+    parser.add_argument("--variant", default="fp32")
+    parser.add_argument("--id-field", default="docid")
+    parser.add_argument("--text-field", default="insight")
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="only encode documents whose doc_id is not in the store yet",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=inference.BATCH_SIZE)
+    parser.add_argument(
+        "--max-batch-tokens", type=int, default=inference.MAX_BATCH_TOKENS
+    )
+    build(parser.parse_args())
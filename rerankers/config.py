@@ -2,6 +2,19 @@
 MODEL_TYPE = "colbert"
 MODEL_NAME = "answerdotai/answerai-colbert-small-v1"
 S3_BUCKET = "sagemaker-bucket-666"
+# S3 endpoint for uploads, e.g. a local S3 stand-in; None uses AWS
+S3_ENDPOINT_URL = None
+# Archive upload: multipart part size, concurrent part uploads and
+# compression threads (0 uses every CPU)
+UPLOAD_PART_SIZE_MB = 16
+UPLOAD_THREADS = 8
+COMPRESSION_THREADS = 0
+# Models packaged into one archive, mapped to their model types. Requests pick
+# one with the "model" field; MODEL_NAME serves requests without it, e.g.
+# MODELS = {MODEL_NAME: MODEL_TYPE, "mixedbread-ai/mxbai-rerank-xsmall-v1": "cross-encoder"}
+MODELS = {MODEL_NAME: MODEL_TYPE}
+# CPU-optimized variants packaged next to the fp32 weights ("int8", "onnx")
+PACKAGED_VARIANTS = ("int8", "onnx")
 
 # Endpoint configuration
 ENDPOINT_NAME = "reranker-endpoint-1"
@@ -12,3 +25,28 @@ SERVERLESS_CONFIG = {
     "memory_size_in_mb": 6144,
     "max_concurrency": 1,
 }
+
+# Inference configuration, passed to the container as environment variables
+# Budget for the in-process document embedding cache (0 disables it)
+DOC_CACHE_MB = 1024
+# Length-bucketed micro-batching of document encoding
+BATCH_SIZE = 32
+MAX_BATCH_TOKENS = 8192
+# Model variant loaded by the endpoint: "fp32", "int8" or "onnx"
+MODEL_VARIANT = "fp32"
+# Fast-start model loading and a synthetic warmup inference inside model_fn
+FAST_START = True
+WARMUP = True
+# Memory budget for loaded models, their weights plus DOC_CACHE_MB and the score
+# cache of each; least recently used models are evicted
+MODEL_MEMORY_MB = 4096
+# Precomputed document embedding store inside each model's directory, built by
+# build_embedding_store.py; lets requests send doc_ids without docs
+EMBEDDING_STORE = "embedding_store"
+# Per-document score cache for repeated queries (0 entries disables it); an
+# empty path keeps it in memory, a file path persists it in sqlite
+SCORE_CACHE_ENTRIES = 100000
+SCORE_CACHE_TTL = 3600
+SCORE_CACHE_PATH = ""
+# Fraction of requests that log a per-stage timing line
+TRACE_SAMPLE_RATE = 1.0
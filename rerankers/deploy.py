@@ -1,5 +1,7 @@
 import argparse
-import shutil
+import json
+import os
+from typing import Dict, Optional
 
 import boto3
 from loguru import logger
@@ -12,59 +14,175 @@ from config import (
     S3_BUCKET,
     MODEL_NAME,
     MODEL_TYPE,
+    MODELS,
+    MODEL_MEMORY_MB,
+    S3_ENDPOINT_URL,
+    UPLOAD_PART_SIZE_MB,
+    UPLOAD_THREADS,
+    COMPRESSION_THREADS,
+    DOC_CACHE_MB,
+    BATCH_SIZE,
+    MAX_BATCH_TOKENS,
+    MODEL_VARIANT,
+    PACKAGED_VARIANTS,
+    FAST_START,
+    WARMUP,
+    TRACE_SAMPLE_RATE,
+    EMBEDDING_STORE,
+    SCORE_CACHE_ENTRIES,
+    SCORE_CACHE_TTL,
+    SCORE_CACHE_PATH,
 )
 
+from model_archive import package_and_upload
 from rerankers import Reranker
+from source_code.instrumentation import timed
+from source_code.registry import MANIFEST_FILE
+from source_code.variants import export_int8, export_onnx
 
 
-def download_and_package_model(
+def download_model(
     model_name: str,
     model_type: str,
-) -> None:
+    variants: tuple = PACKAGED_VARIANTS,
+) -> str:
     """
-    Downloads a model and packages it into a tar.gz archive.
+    Downloads a model and saves it under model/ for packaging.
 
     Args:
         model_name: The name/path of the model to download
         model_type: The type of the model (e.g., "colbert")
-        output_dir: Directory where the model will be saved
-        archive_name: Name of the output archive file (without extension)
+        variants: CPU-optimized variants to package next to the fp32 weights
+            ("int8" dynamic quantization and/or "onnx"), ColBERT models only
+
+    Returns:
+        The model's directory, relative to model/
     """
     # Download and save model
+    model_dir = model_name.replace("/", "-")
+    model_path = f"model/{model_dir}"
     ranker = Reranker(model_name, model_type=model_type)
-    ranker.model.save_pretrained(f"model/{MODEL_NAME.replace('/', '-')}")
-    ranker.tokenizer.save_pretrained(f"model/{MODEL_NAME.replace('/', '-')}")
-    # Create tar.gz archive
-    shutil.make_archive("model", "gztar", "model")
-    logger.info("Successfully created model.tar.gz")
+    # safetensors weights are memory-mapped by from_pretrained at load time
+    ranker.model.save_pretrained(model_path, safe_serialization=True)
+    ranker.tokenizer.save_pretrained(model_path)
+
+    # Optional CPU-optimized variants, selected at load time by RERANKER_MODEL_VARIANT
+    if model_type == "colbert":
+        if "onnx" in variants:
+            logger.info(f"Exported ONNX model to {export_onnx(ranker, model_path)}")
+        if "int8" in variants:
+            logger.info(
+                f"Saved int8 quantized model to {export_int8(ranker, model_path)}"
+            )
+    return model_dir
+
+
+def download_models(
+    models: Dict[str, str] = MODELS,
+    default_model: str = MODEL_NAME,
+    variants: tuple = PACKAGED_VARIANTS,
+    refresh: bool = False,
+) -> bool:
+    """
+    Downloads models into model/ and writes their manifest. Skipped when
+    model/ already holds the same models and variants.
+
+    Args:
+        models: Model names/paths mapped to their model types
+        default_model: The model that serves requests without a "model" field
+        variants: CPU-optimized variants to package next to ColBERT fp32 weights
+        refresh: Download again even if model/ is up to date
+
+    Returns:
+        Whether the models were downloaded
+    """
+    manifest_path = f"model/{MANIFEST_FILE}"
+    manifest = {"default": default_model, "models": {}, "variants": list(variants)}
+    for model_name, model_type in models.items():
+        manifest["models"][model_name] = {
+            "model_type": model_type,
+            "path": model_name.replace("/", "-"),
+        }
+
+    if not refresh and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                logger.info("model/ is up to date, skipping download")
+                return False
+
+    for model_name, model_type in models.items():
+        download_model(model_name, model_type, variants)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Downloaded {len(models)} model(s) to model/")
+    return True
 
 
-def upload_model_to_s3(bucket: str = S3_BUCKET) -> None:
+def upload_model_to_s3(
+    bucket: str = S3_BUCKET,
+    endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+    part_size_mb: int = UPLOAD_PART_SIZE_MB,
+    upload_threads: int = UPLOAD_THREADS,
+    compression_threads: int = COMPRESSION_THREADS,
+    timings: Optional[Dict[str, float]] = None,
+) -> str:
     """
-    Uploads a model archive to S3.
+    Archives model/ and streams it to S3 under a content-addressed key.
+    Nothing is archived or uploaded when that key already exists.
 
     Args:
-        file_name: Name of the archive file to upload
         bucket: Name of the S3 bucket to upload to
+        endpoint_url: S3 endpoint, e.g. a local S3 stand-in; None for AWS
+        part_size_mb: Multipart upload part size (at least 5)
+        upload_threads: Parts uploaded concurrently
+        compression_threads: Threads compressing the archive (0 for all CPUs)
+        timings: Dictionary that receives the seconds spent in each phase
+
+    Returns:
+        The S3 URI of the model archive
     """
-    s3_client = boto3.client("s3")
-    s3_key = f"rerankers/{MODEL_NAME.replace('/', '-')}/model.tar.gz"
-    s3_client.upload_file("model.tar.gz", bucket, s3_key)
-    logger.info(f"Successfully uploaded model.tar.gz to s3://{bucket}/{s3_key}")
+    s3_client = boto3.client("s3", endpoint_url=endpoint_url)
+    return package_and_upload(
+        "model",
+        bucket,
+        f"rerankers/{MODEL_NAME.replace('/', '-')}",
+        s3_client,
+        part_size=part_size_mb * 1024 * 1024,
+        upload_threads=upload_threads,
+        compress_threads=compression_threads or os.cpu_count() or 1,
+        timings=timings,
+    )
 
 
-def deploy_model() -> None:
+def deploy_model(model_data: str) -> None:
     """
     Deploys the PyTorch model to SageMaker as a serverless endpoint.
+
+    Args:
+        model_data: S3 URI of the model archive
     """
     model = PyTorchModel(
         name=f"mdl-nlp-reranker-{MODEL_NAME.replace('/', '-')}",
-        model_data=f"s3://{S3_BUCKET}/rerankers/{MODEL_NAME.replace('/', '-')}/model.tar.gz",
+        model_data=model_data,
         role=SAGEMAKER_ROLE,
         entry_point="inference.py",
         framework_version="2.1.0",
         py_version="py310",
         source_dir="source_code",
+        env={
+            "RERANKER_DOC_CACHE_MB": str(DOC_CACHE_MB),
+            "RERANKER_BATCH_SIZE": str(BATCH_SIZE),
+            "RERANKER_MAX_BATCH_TOKENS": str(MAX_BATCH_TOKENS),
+            "RERANKER_MODEL_VARIANT": MODEL_VARIANT,
+            "RERANKER_FAST_START": "1" if FAST_START else "0",
+            "RERANKER_WARMUP": "1" if WARMUP else "0",
+            "RERANKER_TRACE_SAMPLE_RATE": str(TRACE_SAMPLE_RATE),
+            "RERANKER_EMBEDDING_STORE": EMBEDDING_STORE,
+            "RERANKER_SCORE_CACHE_ENTRIES": str(SCORE_CACHE_ENTRIES),
+            "RERANKER_SCORE_CACHE_TTL": str(SCORE_CACHE_TTL),
+            "RERANKER_SCORE_CACHE_PATH": SCORE_CACHE_PATH,
+            "RERANKER_MODEL_MEMORY_MB": str(MODEL_MEMORY_MB),
+        },
     )
 
     # Configure serverless inference
@@ -98,7 +216,7 @@ def teardown_endpoint() -> None:
             ModelName=f"mdl-nlp-reranker-{MODEL_NAME.replace('/', '-')}"
         )
         logger.info(
-            f"Successfully deleted model: {f'mdl-nlp-reranker-{MODEL_NAME.replace('/', '-')}'}"
+            f"Successfully deleted model: mdl-nlp-reranker-{MODEL_NAME.replace('/', '-')}"
         )
     except Exception as e:
         logger.error(f"Error during endpoint teardown: {str(e)}")
@@ -110,16 +228,43 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "action",
-        choices=["deploy", "teardown"],
-        help="Action to perform: deploy (spin up endpoint) or teardown (clean up)",
-        required=True,
+        choices=["deploy", "package", "teardown"],
+        help="Action to perform: deploy (spin up endpoint), package (download, "
+        "archive and upload only) or teardown (clean up)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="download the models again even if model/ is up to date",
     )
+    parser.add_argument(
+        "--endpoint-url",
+        default=S3_ENDPOINT_URL,
+        help="S3 endpoint, e.g. a local S3 stand-in",
+    )
+    parser.add_argument("--part-size-mb", type=int, default=UPLOAD_PART_SIZE_MB)
+    parser.add_argument("--upload-threads", type=int, default=UPLOAD_THREADS)
+    parser.add_argument("--compression-threads", type=int, default=COMPRESSION_THREADS)
 
     args = parser.parse_args()
 
-    if args.action == "deploy":
-        download_and_package_model(MODEL_NAME, MODEL_TYPE)
-        upload_model_to_s3(S3_BUCKET)
-        deploy_model()
+    if args.action in ("deploy", "package"):
+        timings: Dict[str, float] = {}
+        with timed(timings, "download"):
+            download_models(MODELS, MODEL_NAME, refresh=args.refresh)
+        model_data = upload_model_to_s3(
+            S3_BUCKET,
+            args.endpoint_url,
+            args.part_size_mb,
+            args.upload_threads,
+            args.compression_threads,
+            timings,
+        )
+        if args.action == "deploy":
+            with timed(timings, "deploy"):
+                deploy_model(model_data)
+        logger.info(
+            f"Deploy timings: {json.dumps({k: round(v, 3) for k, v in timings.items()})}"
+        )
     else:  # teardown
         teardown_endpoint()
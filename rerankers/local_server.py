@@ -0,0 +1,292 @@
+"""
+Local SageMaker-compatible server for the reranker handlers.
+
+Serves GET /ping and POST /invocations like the SageMaker inference container,
+plus GET /metrics. Single-query requests that arrive within a short window
+are coalesced: their documents are encoded in shared model batches and each
+caller gets back the scores for its own documents.
+
+    python local_server.py --model-dir model --port 8080
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+from loguru import logger
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source_code")
+if SOURCE_DIR not in sys.path:
+    sys.path.insert(0, SOURCE_DIR)
+
+import inference
+from serialization import negotiate_accept
+
+
+def _num_docs(input_data: Dict[str, Any]) -> int:
+    # requests are validated by _process, after they are collected and counted
+    doc_ids = input_data.get("doc_ids")
+    return len(doc_ids) if isinstance(doc_ids, list) else 0
+
+
+class DynamicBatcher:
+    """
+    Collects requests from concurrent callers and runs them through the model
+    from a single worker thread.
+
+    The worker waits up to max_wait_ms after the first queued request for
+    more requests, until max_batch_docs documents are pending. Plain
+    single-query ColBERT requests for the same model and batching parameters
+    share one document encoding pass over the documents missing from the
+    score cache; any other request (multi-query, prefilter, ids-only, other
+    model types) runs through predict_fn as is. Requests are validated one
+    by one first, so a malformed request fails alone instead of failing the
+    requests it would have shared an encoding pass with.
+    """
+
+    def __init__(self, model, max_wait_ms: float = 10.0, max_batch_docs: int = 1000):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_docs = max_batch_docs
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_docs = 0
+        self.latencies: deque = deque(maxlen=10000)
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, input_data: Dict[str, Any]) -> Future:
+        """
+        Queue a parsed request; the future resolves to its prediction.
+        """
+        future: Future = Future()
+        self._queue.put((input_data, future))
+        return future
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Queue depth, batch fill, per-request latency percentiles and the
+        loaded models.
+        """
+        with self._lock:
+            latencies = list(self.latencies)
+            batches = self.batches
+            metrics = {
+                "queue_depth": self._queue.qsize(),
+                "batches": batches,
+                "requests": self.batched_requests,
+                "mean_requests_per_batch": (
+                    self.batched_requests / batches if batches else 0.0
+                ),
+                "mean_docs_per_batch": self.batched_docs / batches if batches else 0.0,
+                "mean_batch_fill": (
+                    self.batched_docs / (batches * self.max_batch_docs)
+                    if batches
+                    else 0.0
+                ),
+            }
+        if latencies:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+            metrics["latency_seconds"] = {"p50": p50, "p95": p95, "p99": p99}
+        if hasattr(self.model, "stats"):
+            metrics["models"] = self.model.stats()
+        return metrics
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        num_docs = _num_docs(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while num_docs < self.max_batch_docs:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            num_docs += _num_docs(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                outcomes = self._process(batch)
+            except Exception as e:
+                outcomes = [(future, None, e) for _, future in batch]
+
+            # counted before any caller sees its result, so /metrics never lags
+            with self._lock:
+                self.batches += 1
+                self.batched_requests += len(batch)
+                self.batched_docs += sum(_num_docs(item[0]) for item in batch)
+
+            for future, result, error in outcomes:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _process(self, batch: List[tuple]) -> List[tuple]:
+        # (future, result, error) for every request, resolved by _run
+        outcomes = []
+        # plain ColBERT requests are grouped by the model they select
+        shared: Dict[int, tuple] = {}
+        for input_data, future in batch:
+            try:
+                inference._validate(input_data)
+                model = inference.resolve_model(self.model, input_data)
+                if (
+                    "queries" in input_data
+                    or "prefilter" in input_data
+                    or "docs" not in input_data
+                    or getattr(model, "model_type", "colbert") != "colbert"
+                ):
+                    outcomes.append(
+                        (future, inference.predict_fn(input_data, model), None)
+                    )
+                else:
+                    shared.setdefault(id(model), (model, []))[1].append(
+                        (input_data, future)
+                    )
+            except Exception as e:
+                outcomes.append((future, None, e))
+
+        for model, requests in shared.values():
+            outcomes.extend(self._process_shared(model, requests))
+        return outcomes
+
+    def _process_shared(self, model, shared: List[tuple]) -> List[tuple]:
+        # Requests with the same batching parameters share one encoding pass
+        groups: Dict[tuple, List[tuple]] = {}
+        outcomes = []
+        for input_data, future in shared:
+            try:
+                settings = (
+                    int(input_data.get("batch_size", inference.BATCH_SIZE)),
+                    int(input_data.get("max_batch_tokens", inference.MAX_BATCH_TOKENS)),
+                )
+            except (TypeError, ValueError) as e:
+                outcomes.append((future, None, e))
+                continue
+            groups.setdefault(settings, []).append((input_data, future))
+
+        for (batch_size, max_batch_tokens), requests in groups.items():
+            try:
+                all_scores = inference.shared_document_scores(
+                    model,
+                    [
+                        (input_data["query"], input_data["docs"], input_data["doc_ids"])
+                        for input_data, _ in requests
+                    ],
+                    batch_size,
+                    max_batch_tokens,
+                )
+            except Exception as e:
+                outcomes.extend((future, None, e) for _, future in requests)
+                continue
+
+            for (input_data, future), scores in zip(requests, all_scores):
+                doc_ids = input_data["doc_ids"]
+                k = input_data.get("k", len(doc_ids))
+                rankings = inference.rank_results(doc_ids, scores, k)
+                outcomes.append((future, {"rankings": rankings}, None))
+        return outcomes
+
+
+class InvocationHandler(BaseHTTPRequestHandler):
+    batcher: DynamicBatcher = None
+
+    def _respond(self, status: int, body: Any, content_type: str = "application/json"):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/ping":
+            self._respond(200, "")
+        elif self.path == "/metrics":
+            self._respond(200, json.dumps(self.batcher.metrics()))
+        else:
+            self._respond(404, json.dumps({"error": "not found"}))
+
+    def do_POST(self):
+        if self.path != "/invocations":
+            self._respond(404, json.dumps({"error": "not found"}))
+            return
+
+        start_time = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content_type = self.headers.get("Content-Type", "application/json")
+        accept = self.headers.get("Accept", "application/json")
+        try:
+            response_content_type = negotiate_accept(accept)
+            input_data = inference.input_fn(body, content_type)
+            prediction = self.batcher.submit(input_data).result()
+            response = inference.output_fn(prediction, accept)
+        except ValueError as e:
+            self._respond(400, json.dumps({"error": str(e)}))
+            return
+        except Exception as e:
+            logger.exception("Invocation failed")
+            self._respond(500, json.dumps({"error": repr(e)}))
+            return
+
+        self.batcher.record_latency(time.perf_counter() - start_time)
+        self._respond(200, response, response_content_type)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local SageMaker-compatible reranker server"
+    )
+    parser.add_argument("--model-dir", default="model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=10.0,
+        help="how long the first request in a batch waits for more requests",
+    )
+    parser.add_argument(
+        "--max-batch-docs",
+        type=int,
+        default=1000,
+        help="stop collecting once a batch holds this many documents",
+    )
+    args = parser.parse_args()
+
+    model = inference.model_fn(args.model_dir)
+    InvocationHandler.batcher = DynamicBatcher(
+        model, args.max_wait_ms, args.max_batch_docs
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), InvocationHandler)
+    logger.info(f"Serving reranker on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,283 @@
+"""
+Model archive packaging for deploy.py.
+
+The archive is keyed by a hash of the model artifacts, so unchanged models
+are neither rebuilt nor uploaded again. New archives are compressed on
+several threads and streamed straight into a concurrent S3 multipart upload,
+without writing model.tar.gz to disk first.
+"""
+
+import hashlib
+import os
+import tarfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Deque, Dict, List, Optional
+
+from loguru import logger
+
+# S3 rejects multipart parts below 5 MiB, except for the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def hash_artifacts(root: str) -> str:
+    """
+    Content hash of every file under root, including the relative paths, so
+    renamed files change the hash as well.
+    """
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(path, root).encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _gzip_member(data: bytes, level: int) -> bytes:
+    # wbits=31 writes a complete gzip member; zlib releases the GIL
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class ParallelGzipWriter:
+    """
+    Write-only file object that gzip-compresses blocks on a thread pool.
+
+    Each block becomes an independent gzip member, written in order;
+    concatenated members are a valid gzip stream for gzip, tar and Python's
+    tarfile. Compression level 6 matches shutil.make_archive.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        threads: int = os.cpu_count() or 1,
+        level: int = 6,
+        block_size: int = 4 * 1024 * 1024,
+    ):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        self.max_pending = threads * 2
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._buffer = bytearray()
+        self._pending: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(threads)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self.bytes_in += len(block)
+        self._pending.append(self._executor.submit(_gzip_member, block, self.level))
+        # bound memory: wait for the oldest block once enough are in flight
+        while len(self._pending) >= self.max_pending:
+            self._write_oldest()
+
+    def _write_oldest(self) -> None:
+        member = self._pending.popleft().result()
+        self.fileobj.write(member)
+        self.bytes_out += len(member)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_oldest()
+        self._executor.shutdown()
+
+    def abort(self) -> None:
+        """
+        Drop the blocks not written yet and stop the compression threads.
+        """
+        self._buffer.clear()
+        self._pending.clear()
+        self._executor.shutdown(cancel_futures=True)
+
+
+class MultipartUploadWriter:
+    """
+    Write-only file object that uploads to S3 in parts of part_size bytes,
+    with up to threads parts in flight.
+
+    abort() discards the uploaded parts, so a failed run leaves no orphaned
+    multipart upload behind.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        key: str,
+        part_size: int = 16 * 1024 * 1024,
+        threads: int = 8,
+    ):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_pending = threads
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._pending: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(threads)
+        self._upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def _submit(self, body: bytes) -> None:
+        part_number = len(self._parts) + len(self._pending) + 1
+        self.bytes_written += len(body)
+        self._pending.append(
+            self._executor.submit(self._upload_part, part_number, body)
+        )
+        while len(self._pending) >= self.max_pending:
+            self._parts.append(self._pending.popleft().result())
+
+    def close(self) -> None:
+        # the last part may be smaller than MIN_PART_SIZE; an empty archive
+        # still needs one part
+        if self._buffer or not (self._parts or self._pending):
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._parts.append(self._pending.popleft().result())
+        self._executor.shutdown()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+        self.s3_client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+        )
+
+
+def write_archive(
+    root: str, fileobj: BinaryIO, threads: int, level: int = 6
+) -> Dict[str, int]:
+    """
+    Stream a gzipped tar of root's contents into fileobj.
+
+    Entries are relative to root, as with shutil.make_archive(..., root), and
+    carry no owner names or modification times, so the same artifacts
+    produce the same archive.
+    """
+
+    def normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+        info.mtime = 0
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+    gzip_writer = ParallelGzipWriter(fileobj, threads=threads, level=level)
+    try:
+        with tarfile.open(fileobj=gzip_writer, mode="w|") as tar:
+            for name in sorted(os.listdir(root)):
+                tar.add(os.path.join(root, name), arcname=name, filter=normalize)
+        gzip_writer.close()
+    except BaseException:
+        gzip_writer.abort()
+        raise
+    return {"bytes_in": gzip_writer.bytes_in, "bytes_out": gzip_writer.bytes_out}
+
+
+def s3_key_exists(s3_client: Any, bucket: str, key: str) -> bool:
+    from botocore.exceptions import ClientError
+
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return True
+
+
+def package_and_upload(
+    root: str,
+    bucket: str,
+    prefix: str,
+    s3_client: Any,
+    part_size: int = 16 * 1024 * 1024,
+    upload_threads: int = 8,
+    compress_threads: int = os.cpu_count() or 1,
+    compression_level: int = 6,
+    timings: Optional[Dict[str, float]] = None,
+) -> str:
+    """
+    Upload root as s3://bucket/prefix/model-<content hash>.tar.gz unless that
+    archive already exists, and return its S3 URI.
+
+    Wall-clock seconds of each phase (hash, exists_check, archive_upload) are
+    added to timings.
+    """
+    timings = {} if timings is None else timings
+
+    start_time = time.perf_counter()
+    content_hash = hash_artifacts(root)
+    key = f"{prefix}/model-{content_hash}.tar.gz"
+    timings["hash"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    exists = s3_key_exists(s3_client, bucket, key)
+    timings["exists_check"] = time.perf_counter() - start_time
+    uri = f"s3://{bucket}/{key}"
+    if exists:
+        logger.info(f"{uri} is up to date, skipping archive and upload")
+        return uri
+
+    start_time = time.perf_counter()
+    upload = MultipartUploadWriter(s3_client, bucket, key, part_size, upload_threads)
+    try:
+        sizes = write_archive(root, upload, compress_threads, compression_level)
+        upload.close()
+    except BaseException:
+        upload.abort()
+        raise
+    timings["archive_upload"] = elapsed = time.perf_counter() - start_time
+
+    logger.info(
+        f"Uploaded {uri}: {sizes['bytes_in'] / 1024 / 1024:.1f} MB tar, "
+        f"{sizes['bytes_out'] / 1024 / 1024:.1f} MB gzipped, "
+        f"{sizes['bytes_in'] / 1024 / 1024 / elapsed:.1f} MB/s"
+    )
+    return uri
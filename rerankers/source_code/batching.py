@@ -0,0 +1,43 @@
+from typing import List
+
+
+def make_micro_batches(
+    lengths: List[int],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[List[int]]:
+    """
+    Group document indices into length-bucketed micro-batches.
+
+    Documents are sorted by token length so each batch pads to a similar
+    length. A batch is closed once adding the next document would exceed
+    batch_size documents or max_batch_tokens padded tokens (documents x
+    longest document). A single document longer than the token budget still
+    gets a batch of its own.
+
+    Args:
+        lengths: Token length of every document, in request order
+        batch_size: Maximum number of documents per batch
+        max_batch_tokens: Maximum padded tokens per batch
+
+    Returns:
+        Lists of indices into lengths, one list per batch.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if max_batch_tokens < 1:
+        raise ValueError("max_batch_tokens must be at least 1")
+
+    batches = []
+    current: List[int] = []
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # sorted ascending, so the new document is the longest in the batch
+        padded_tokens = (len(current) + 1) * lengths[index]
+        if current and (len(current) >= batch_size or padded_tokens > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(index)
+
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,231 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.nn.utils.rnn import pad_sequence
+
+from batching import make_micro_batches
+from instrumentation import current_trace
+
+
+def content_hash(text: str) -> str:
+    """
+    Stable hash of a document's text, used to detect changed content behind a doc_id.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@torch.inference_mode()
+def encode_query(model, query: str) -> Tuple[torch.Tensor, int]:
+    """
+    Encode a single query into its token embeddings.
+
+    Returns:
+        The (query_len, dim) embedding matrix, including the [MASK] augmentation
+        tokens, and the number of real query tokens used to normalise MaxSim.
+    """
+    trace = current_trace()
+    with trace.stage("tokenization"):
+        encoding = model._query_encode([query])
+    with trace.stage("encoding"):
+        embeddings = model._to_embs(encoding)[0]
+    query_length = int(encoding["attention_mask"][0].sum().item())
+    trace.add("total_tokens", query_length)
+    return embeddings, query_length
+
+
+def token_lengths(model, docs: List[str]) -> List[int]:
+    """
+    Token length of each document as the model will see it, including the
+    inserted document marker token.
+    """
+    with current_trace().stage("tokenization"):
+        encoded = model.tokenizer(
+            docs,
+            max_length=model.doc_max_length - 1,
+            truncation=True,
+        )["input_ids"]
+    return [len(ids) + 1 for ids in encoded]
+
+
+@torch.inference_mode()
+def _encode_batch(model, docs: List[str]) -> List[torch.Tensor]:
+    trace = current_trace()
+    with trace.stage("tokenization"):
+        encoding = model._document_encode(docs)
+    with trace.stage("encoding"):
+        embeddings = model._to_embs(encoding)
+    mask = encoding["attention_mask"].bool()
+    return [embeddings[i][mask[i]].clone() for i in range(len(docs))]
+
+
+def encode_documents(
+    model,
+    docs: List[str],
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+) -> List[torch.Tensor]:
+    """
+    Encode documents into per-document token embeddings with padding stripped.
+
+    Padding tokens are masked out of attention, so the remaining rows do not
+    depend on which other documents shared the batch. When batch_size or
+    max_batch_tokens is given, documents are encoded in length-bucketed
+    micro-batches instead of one batch padded to the longest document.
+    """
+    if not docs:
+        return []
+    if batch_size is None and max_batch_tokens is None:
+        return _encode_batch(model, docs)
+
+    batches = make_micro_batches(
+        token_lengths(model, docs),
+        batch_size=batch_size or len(docs),
+        max_batch_tokens=max_batch_tokens or model.doc_max_length * len(docs),
+    )
+    embeddings: List[Optional[torch.Tensor]] = [None] * len(docs)
+    for indices in batches:
+        for i, emb in zip(indices, _encode_batch(model, [docs[i] for i in indices])):
+            embeddings[i] = emb
+    return embeddings
+
+
+def get_document_embeddings(
+    model,
+    docs: List[str],
+    doc_ids: List[str],
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+) -> List[torch.Tensor]:
+    """
+    Return token embeddings for every document, encoding only cache misses.
+
+    Uses the DocEmbeddingCache attached to the model by model_fn, if any.
+    Batching arguments are passed through to encode_documents.
+    """
+    cache = getattr(model, "doc_cache", None)
+    if cache is None:
+        embeddings = encode_documents(model, docs, batch_size, max_batch_tokens)
+        current_trace().add("total_tokens", sum(emb.shape[0] for emb in embeddings))
+        return embeddings
+
+    keys = [(str(doc_id), content_hash(doc)) for doc, doc_id in zip(docs, doc_ids)]
+    embeddings: List[Optional[torch.Tensor]] = [cache.get(key) for key in keys]
+
+    missing = [i for i, emb in enumerate(embeddings) if emb is None]
+    if missing:
+        encoded = encode_documents(
+            model, [docs[i] for i in missing], batch_size, max_batch_tokens
+        )
+        for i, emb in zip(missing, encoded):
+            cache.put(keys[i], emb)
+            embeddings[i] = emb
+
+    trace = current_trace()
+    trace.add("cache_hits", len(docs) - len(missing))
+    trace.add("total_tokens", sum(emb.shape[0] for emb in embeddings))
+    return embeddings
+
+
+def get_stored_embeddings(store, doc_ids: List[str]) -> List[torch.Tensor]:
+    """
+    Read precomputed token embeddings for every doc_id from an EmbeddingStore.
+
+    Raises:
+        ValueError: if any doc_id is missing from the store
+    """
+    trace = current_trace()
+    with trace.stage("store_lookup"):
+        stored = store.get_many(doc_ids)
+        missing = [doc_id for doc_id, emb in zip(doc_ids, stored) if emb is None]
+        if missing:
+            raise ValueError(
+                f"{len(missing)} doc_ids not in embedding store, e.g. {missing[:5]}"
+            )
+        embeddings = [
+            torch.from_numpy(np.asarray(emb, dtype=np.float32)) for emb in stored
+        ]
+
+    trace.add("total_tokens", sum(emb.shape[0] for emb in embeddings))
+    return embeddings
+
+
+@torch.inference_mode()
+def maxsim(
+    query_embeddings: torch.Tensor,
+    query_length: int,
+    doc_embeddings: List[torch.Tensor],
+) -> List[float]:
+    """
+    ColBERT late-interaction score of one query against variable-length documents.
+
+    Mirrors rerankers' _colbert_score: every query row (including [MASK]
+    augmentation) takes its best matching document token, the maxima are
+    summed and divided by the number of real query tokens.
+    """
+    if not doc_embeddings:
+        return []
+
+    padded = pad_sequence(doc_embeddings, batch_first=True)
+    lengths = torch.tensor([emb.shape[0] for emb in doc_embeddings])
+    doc_mask = torch.arange(padded.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)
+
+    token_scores = torch.einsum("in,pjn->pij", query_embeddings, padded)
+    token_scores = token_scores.masked_fill(~doc_mask.unsqueeze(1), -1e4)
+    scores = token_scores.max(-1).values.sum(-1) / query_length
+    return scores.cpu().tolist()
+
+
+@torch.inference_mode()
+def encode_queries(model, queries: List[str]) -> Tuple[List[torch.Tensor], List[int]]:
+    """
+    Encode several queries. Queries are augmented to different lengths, so
+    each is encoded on its own; this is cheap next to document encoding.
+    """
+    encoded = [encode_query(model, query) for query in queries]
+    return [emb for emb, _ in encoded], [length for _, length in encoded]
+
+
+@torch.inference_mode()
+def maxsim_many(
+    query_embeddings: List[torch.Tensor],
+    query_lengths: List[int],
+    doc_embeddings: List[torch.Tensor],
+    max_elements: int = 2**26,
+) -> List[List[float]]:
+    """
+    MaxSim scores of several queries against one shared set of documents.
+
+    Queries are zero-padded to a common length (a zero row adds nothing to the
+    sum of maxima) and scored against all documents in one einsum per chunk of
+    documents, with chunks sized so the (queries x query tokens x documents x
+    document tokens) score tensor stays under max_elements.
+
+    Returns:
+        One list of document scores per query.
+    """
+    if not doc_embeddings:
+        return [[] for _ in query_embeddings]
+
+    queries = pad_sequence(query_embeddings, batch_first=True)
+    padded = pad_sequence(doc_embeddings, batch_first=True)
+    lengths = torch.tensor([emb.shape[0] for emb in doc_embeddings])
+    doc_mask = torch.arange(padded.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)
+    normaliser = torch.tensor(query_lengths, dtype=queries.dtype).unsqueeze(1)
+
+    per_doc = queries.shape[0] * queries.shape[1] * padded.shape[1]
+    chunk_size = max(1, max_elements // per_doc)
+
+    chunks = []
+    for start in range(0, padded.shape[0], chunk_size):
+        token_scores = torch.einsum(
+            "qin,pjn->qpij", queries, padded[start : start + chunk_size]
+        )
+        token_scores = token_scores.masked_fill(
+            ~doc_mask[start : start + chunk_size, None, :], -1e4
+        )
+        chunks.append(token_scores.max(-1).values.sum(-1))
+
+    scores = torch.cat(chunks, dim=1) / normaliser
+    return scores.cpu().tolist()
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import torch
+
+
+class DocEmbeddingCache:
+    """
+    Memory-bounded LRU cache of per-document ColBERT token embeddings.
+
+    Entries are keyed by (doc_id, content_hash) so an edited document behind an
+    unchanged doc_id is re-encoded instead of served stale. The budget counts
+    tensor storage only, not Python object overhead.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[torch.Tensor]:
+        """
+        Return the cached embeddings for key and mark them most recently used.
+        """
+        with self._lock:
+            embeddings = self._entries.get(key)
+            if embeddings is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embeddings
+
+    def put(self, key: Hashable, embeddings: torch.Tensor) -> None:
+        """
+        Insert embeddings, evicting least recently used entries to stay within budget.
+        Entries larger than the whole budget are not cached.
+        """
+        size = embeddings.element_size() * embeddings.nelement()
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.element_size() * previous.nelement()
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.element_size() * evicted.nelement()
+                self.evictions += 1
+
+            self._entries[key] = embeddings
+            self.current_bytes += size
+
+    def clear(self) -> None:
+        """
+        Drop all entries. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the cache counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+# Index records of one segment, sorted by key
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("offset", "<i8"), ("length", "<i4")])
+
+
+def doc_key(doc_id: str) -> int:
+    """
+    64-bit key of a doc_id, used for the sorted segment indexes.
+    """
+    digest = hashlib.blake2b(str(doc_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _read_manifest(store_dir: str) -> Dict:
+    with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_version(store_dir: str, manifest: Optional[Dict] = None) -> str:
+    """
+    Version of the store's contents: a hash of its segments' content digests,
+    in order. Appending a segment, or rebuilding the store, changes it.
+    Segments written without a digest are identified by their index file.
+    """
+    manifest = _read_manifest(store_dir) if manifest is None else manifest
+    digests = manifest.get("digests", {})
+    version = hashlib.blake2b(digest_size=8)
+    for name in manifest["segments"]:
+        digest = digests.get(name) or _file_digest(
+            os.path.join(store_dir, f"{name}.idx.npy")
+        )
+        version.update(f"{name}:{digest}\0".encode("utf-8"))
+    return version.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Read-only view of a precomputed ColBERT document embedding store.
+
+    The store is a list of append-only segments. Each segment holds a float16
+    (tokens, dim) embedding matrix and a doc_id index sorted by 64-bit key,
+    both memory-mapped, so opening the store costs the same for any corpus
+    size. Newer segments shadow older entries for the same doc_id.
+
+    version identifies the store's contents, so anything derived from the
+    stored embeddings (such as cached scores) can be keyed on it.
+    """
+
+    def __init__(self, store_dir: str):
+        manifest = _read_manifest(store_dir)
+        self.store_dir = store_dir
+        self.dim = manifest["dim"]
+        self.version = store_version(store_dir, manifest)
+        self.segments = []
+        # newest first, so the first match wins
+        for name in reversed(manifest["segments"]):
+            index = np.load(os.path.join(store_dir, f"{name}.idx.npy"), mmap_mode="r")
+            embeddings = np.memmap(
+                os.path.join(store_dir, f"{name}.emb"), dtype=np.float16, mode="r"
+            ).reshape(-1, self.dim)
+            self.segments.append((index, embeddings))
+
+    def __len__(self) -> int:
+        """
+        Number of index entries across segments, counting shadowed ones.
+        """
+        return sum(len(index) for index, _ in self.segments)
+
+    def get_many(self, doc_ids: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Token embeddings (float16, memory-mapped) for each doc_id, or None
+        where the store does not hold it.
+        """
+        keys = np.fromiter((doc_key(doc_id) for doc_id in doc_ids), dtype=np.uint64)
+        results: List[Optional[np.ndarray]] = [None] * len(doc_ids)
+        pending = np.arange(len(doc_ids))
+
+        for index, embeddings in self.segments:
+            if not len(pending) or not len(index):
+                continue
+            positions = np.searchsorted(index["key"], keys[pending])
+            positions = np.minimum(positions, len(index) - 1)
+            found = index["key"][positions] == keys[pending]
+
+            for i, position in zip(pending[found], positions[found]):
+                offset, length = index["offset"][position], index["length"][position]
+                results[i] = embeddings[offset : offset + length]
+            pending = pending[~found]
+
+        return results
+
+    def __contains__(self, doc_id: str) -> bool:
+        return self.get_many([doc_id])[0] is not None
+
+
+class EmbeddingStoreWriter:
+    """
+    Appends one new segment to an embedding store, creating the store if needed.
+
+    Embeddings are streamed to the segment file as they are added; the index
+    and the manifest entry, with a content digest of the segment, are written
+    on close, so readers never see a partial segment.
+    """
+
+    def __init__(self, store_dir: str, dim: int):
+        os.makedirs(store_dir, exist_ok=True)
+        manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            manifest = _read_manifest(store_dir)
+            if manifest["dim"] != dim:
+                raise ValueError(
+                    f"Store has dimension {manifest['dim']}, embeddings have {dim}"
+                )
+        else:
+            manifest = {"dim": dim, "dtype": "float16", "segments": []}
+
+        self.store_dir = store_dir
+        self.dim = dim
+        self.manifest = manifest
+        self.name = f"seg-{len(manifest['segments']):05d}"
+        self._file = open(os.path.join(store_dir, f"{self.name}.emb"), "wb")
+        self._entries: Dict[int, tuple] = {}
+        self._offset = 0
+        self._digest = hashlib.blake2b(digest_size=16)
+
+    def add(self, doc_id: str, embeddings: np.ndarray) -> None:
+        """
+        Append one document's (tokens, dim) embeddings. A doc_id added twice
+        keeps its last embeddings.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected (tokens, {self.dim}) embeddings")
+
+        data = embeddings.tobytes()
+        self._file.write(data)
+        self._digest.update(str(doc_id).encode("utf-8") + b"\0" + data)
+        self._entries[doc_key(doc_id)] = (self._offset, embeddings.shape[0])
+        self._offset += embeddings.shape[0]
+
+    def add_many(
+        self, doc_ids: Iterable[str], embeddings: Iterable[np.ndarray]
+    ) -> None:
+        for doc_id, emb in zip(doc_ids, embeddings):
+            self.add(doc_id, emb)
+
+    def close(self) -> None:
+        """
+        Write the sorted segment index and publish the segment in the manifest.
+        """
+        self._file.close()
+        if not self._entries:
+            os.remove(os.path.join(self.store_dir, f"{self.name}.emb"))
+            return
+
+        index = np.array(
+            [(key, offset, length) for key, (offset, length) in self._entries.items()],
+            dtype=INDEX_DTYPE,
+        )
+        index.sort(order="key")
+        np.save(os.path.join(self.store_dir, f"{self.name}.idx.npy"), index)
+
+        self.manifest["segments"].append(self.name)
+        self.manifest.setdefault("digests", {})[self.name] = self._digest.hexdigest()
+        tmp_path = os.path.join(self.store_dir, f"{MANIFEST_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.store_dir, MANIFEST_FILE))
+
+    def __enter__(self) -> "EmbeddingStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # leave the manifest untouched; the orphaned segment file is ignored
+            self._file.close()
@@ -1,85 +1,624 @@
+import time
+
+# Measured for the startup timing breakdown; torch is imported below
+_MODULE_IMPORT_START = time.perf_counter()
+
 import os
 import json
-from typing import Dict, Any
-from rerankers import Reranker
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 from loguru import logger
 
+from colbert import (
+    encode_queries,
+    encode_query,
+    get_document_embeddings,
+    get_stored_embeddings,
+    maxsim,
+    maxsim_many,
+)
+from embedding_cache import DocEmbeddingCache
+from embedding_store import EmbeddingStore
+from instrumentation import current_trace, finish_trace, start_trace, timed
+from prefilter import PREFILTER_METHODS, bm25_scores
+from registry import ModelRegistry, read_manifest
+from score_cache import ScoreCache, SqliteScoreCache
+from serialization import decode_request, encode_response
+from loading import load_ranker, warmup
+from variants import load_variant
+
+if TYPE_CHECKING:
+    from rerankers.models.colbert_ranker import ColBERTRanker
+
+_MODULE_IMPORT_SECONDS = time.perf_counter() - _MODULE_IMPORT_START
+
 MODEL_NAME = "answerdotai/answerai-colbert-small-v1"
 
+# Byte budget for cached document embeddings, sized to leave room for the model
+# and activations inside the serverless memory limit. Set to 0 to disable.
+DOC_CACHE_MB = int(os.environ.get("RERANKER_DOC_CACHE_MB", "1024"))
 
-def model_fn(model_dir: str) -> Reranker:
-    """
-    Load the model for inference.
+# Length-bucketed micro-batching of document encoding, overridable per request
+# through the "batch_size" and "max_batch_tokens" fields
+BATCH_SIZE = int(os.environ.get("RERANKER_BATCH_SIZE", "32"))
+MAX_BATCH_TOKENS = int(os.environ.get("RERANKER_MAX_BATCH_TOKENS", "8192"))
+
+# Packaged model variant to serve: "fp32", "int8" or "onnx"
+MODEL_VARIANT = os.environ.get("RERANKER_MODEL_VARIANT", "fp32")
+
+# Fast start builds the ColBERT ranker directly instead of through the
+# Reranker factory; warmup runs a synthetic inference inside model_fn
+FAST_START = os.environ.get("RERANKER_FAST_START", "1") == "1"
+WARMUP = os.environ.get("RERANKER_WARMUP", "1") == "1"
+
+# Memory budget for the models loaded by the registry, counting each model's
+# weights and its embedding and score cache capacity; the least recently used
+# models are evicted beyond it
+MODEL_MEMORY_MB = int(os.environ.get("RERANKER_MODEL_MEMORY_MB", "4096"))
+
+# Precomputed document embedding store, relative to each model's directory.
+# When present, requests may carry only query and doc_ids.
+EMBEDDING_STORE = os.environ.get("RERANKER_EMBEDDING_STORE", "embedding_store")
+
+# Per-document score cache for repeated queries: maximum entries (0 disables
+# it), time to live in seconds and an optional sqlite file that keeps scores
+# across worker restarts
+SCORE_CACHE_ENTRIES = int(os.environ.get("RERANKER_SCORE_CACHE_ENTRIES", "100000"))
+SCORE_CACHE_TTL = float(os.environ.get("RERANKER_SCORE_CACHE_TTL", "3600"))
+SCORE_CACHE_PATH = os.environ.get("RERANKER_SCORE_CACHE_PATH", "")
+
+# Log every request's full rankings; only for debugging, it is slow at 1000 docs
+DEBUG_RESULTS = os.environ.get("RERANKER_DEBUG_RESULTS", "0") == "1"
+
+
+def model_fn(model_dir: str) -> ModelRegistry:
     """
-    # Log what is inside model_dir
-    logger.info(f"HELL YEAH:::Model directory: {model_dir}")
-    logger.info(f"HELL YEAH:::Contents of model directory: {os.listdir(model_dir)}")
+    Load the model registry for inference.
 
-    # Initialize the reranker with the local path
-    model_path = os.path.join(model_dir, MODEL_NAME.replace("/", "-"))
-    logger.info(f"HELL YEAH:::Loading model from: {model_path}")
+    Every model packaged in model_dir can be selected with the request's
+    "model" field and is loaded on first use. The default model is loaded
+    here, so the first request does not pay for it; the seconds spent in
+    each of its startup phases are logged and kept on the registry as
+    startup_timings.
+    """
+    manifest = read_manifest(model_dir, MODEL_NAME, "colbert")
+    registry = ModelRegistry(
+        model_dir, manifest, load_model, MODEL_MEMORY_MB * 1024 * 1024
+    )
 
-    ranker = Reranker(
-        model_path,
-        model_type="colbert",
+    ranker = registry.get()
+    timings = {"module_import": _MODULE_IMPORT_SECONDS}
+    timings.update((k, v) for k, v in ranker.startup_timings.items() if k != "total")
+    timings["total"] = sum(timings.values())
+    registry.startup_timings = timings
+    logger.info(
+        f"Startup timings: {json.dumps({k: round(v, 3) for k, v in timings.items()})}"
     )
+    return registry
+
+
+def load_model(model_path: str, name: str, spec: Dict[str, Any]) -> Any:
+    """
+    Load one packaged model and attach its caches.
+
+    ColBERT models use the configured variant, fast start and embedding
+    store; other model types are loaded through the Reranker factory and
+    scored with their own rank method. The seconds spent in each phase are
+    kept on the returned ranker as startup_timings.
+    """
+    model_type = spec.get("model_type", "colbert")
+    timings: Dict[str, float] = {}
+    variant = MODEL_VARIANT if model_type == "colbert" else "fp32"
+    logger.info(f"Loading {variant} {model_type} model from: {model_path}")
+
+    if model_type == "colbert" and FAST_START:
+        ranker = load_ranker(model_path, variant, timings)
+    else:
+        with timed(timings, "import"):
+            from rerankers import Reranker
+        with timed(timings, "weight_load"):
+            ranker = Reranker(model_path, model_type=model_type, verbose=0)
+            if model_type == "colbert":
+                load_variant(ranker, model_path, variant)
+    ranker.model_name = name
+    ranker.model_type = model_type
+
+    if WARMUP:
+        with timed(timings, "warmup"):
+            warmup(ranker)
+
+    if model_type == "colbert":
+        store_path = os.path.join(model_path, EMBEDDING_STORE)
+        if os.path.isdir(store_path):
+            with timed(timings, "store_load"):
+                ranker.embedding_store = EmbeddingStore(store_path)
+            logger.info(
+                f"Loaded embedding store with {len(ranker.embedding_store)} docs"
+            )
+
+        if DOC_CACHE_MB > 0:
+            ranker.doc_cache = DocEmbeddingCache(max_bytes=DOC_CACHE_MB * 1024 * 1024)
+
+    if SCORE_CACHE_ENTRIES > 0:
+        namespace = f"{name}:{variant}"
+        store = getattr(ranker, "embedding_store", None)
+        store_version = store.version if store is not None else ""
+        if SCORE_CACHE_PATH:
+            ranker.score_cache = SqliteScoreCache(
+                SCORE_CACHE_PATH,
+                SCORE_CACHE_ENTRIES,
+                SCORE_CACHE_TTL,
+                namespace,
+                store_version,
+            )
+        else:
+            ranker.score_cache = ScoreCache(
+                SCORE_CACHE_ENTRIES, SCORE_CACHE_TTL, namespace, store_version
+            )
+
+    timings["total"] = sum(timings.values())
+    ranker.startup_timings = timings
     return ranker
 
 
-def input_fn(request_body: str, request_content_type: str) -> Dict[str, Any]:
+def input_fn(
+    request_body: Union[str, bytes], request_content_type: str
+) -> Dict[str, Any]:
     """
     Deserialize and prepare the prediction input.
+    Accepts application/json and application/x-msgpack bodies.
+
+    Starts the request trace; an optional "request_id" field names it.
     """
-    if request_content_type != "application/json":
-        raise ValueError(f"Unsupported content type: {request_content_type}")
+    trace = start_trace()
+    with trace.stage("parse"):
+        input_data = decode_request(request_body, request_content_type)
+
+    with trace.stage("validation"):
+        _validate(input_data)
+
+    if input_data.get("request_id"):
+        trace.request_id = str(input_data["request_id"])
+    trace.set(doc_count=len(input_data["doc_ids"]))
+    return input_data
 
-    # Parse the input JSON
-    input_data = json.loads(request_body)
 
-    # Validate required fields
-    required_fields = ["query", "docs", "doc_ids"]
+def _validate(input_data: Dict[str, Any]) -> None:
+    """
+    Check required fields and the optional query, model, k and prefilter settings.
+    """
+    # Validate required fields; without docs, documents come from the embedding store
+    required_fields = ["doc_ids"]
     for field in required_fields:
         if field not in input_data:
             raise ValueError(f"Missing required field: {field}")
+    if "docs" in input_data and len(input_data["docs"]) != len(input_data["doc_ids"]):
+        raise ValueError("docs and doc_ids must have the same length")
 
-    return input_data
+    # A request carries either a single "query" or a list of "queries"
+    if "query" not in input_data and "queries" not in input_data:
+        raise ValueError("Missing required field: query")
+    if "query" in input_data and "queries" in input_data:
+        raise ValueError("Only one of query and queries may be given")
+    if "queries" in input_data:
+        queries = input_data["queries"]
+        if not isinstance(queries, list) or not queries:
+            raise ValueError("queries must be a non-empty list")
+        k = input_data.get("k")
+        if isinstance(k, list) and len(k) != len(queries):
+            raise ValueError("k must be a single value or one value per query")
 
+    # An optional "model" field selects one of the packaged models
+    if "model" in input_data and not isinstance(input_data["model"], str):
+        raise ValueError("model must be a string")
 
-def predict_fn(input_data: Dict[str, Any], model: Reranker) -> Any:
+    # Validate the optional lexical prefilter stage
+    prefilter = input_data.get("prefilter")
+    if prefilter is not None:
+        if "docs" not in input_data:
+            raise ValueError("prefilter requires docs")
+        if not isinstance(prefilter, dict):
+            raise ValueError("prefilter must be an object")
+        if prefilter.get("method", "bm25") not in PREFILTER_METHODS:
+            raise ValueError(f"Unsupported prefilter method: {prefilter.get('method')}")
+        keep = prefilter.get("keep")
+        if not isinstance(keep, int) or keep < 1:
+            raise ValueError("prefilter.keep must be a positive integer")
+
+
+def predict_fn(
+    input_data: Dict[str, Any], model: Union[ModelRegistry, "ColBERTRanker"]
+) -> Any:
     """
     Apply model to the incoming request.
+    A registry serves the model named by the request's "model" field.
     """
+    model = resolve_model(model, input_data)
+    if "queries" in input_data:
+        return _predict_many(input_data, model)
+
     query = input_data["query"]
-    docs = input_data["docs"]
+    docs = input_data.get("docs")  # None for ids-only requests
     doc_ids = input_data["doc_ids"]
 
     # Optional parameters with defaults
-    k = input_data.get("k", len(docs))  # Default to all docs if k not specified
-
-    # Perform the ranking
-    ranked_results = model.rank(query=query, docs=docs, doc_ids=doc_ids)
-    logger.info(f"HELL YEAH:::Ranked results: {ranked_results}")
-
-    # Get top k results - ranked_results is already a RankedResults object
-    # Convert Result objects to serializable dictionary
-    return {
-        "rankings": [
-            {
-                "doc_id": result.doc_id,
-                "score": float(
-                    result.score
-                ),  # Convert score to float for JSON serialization
-            }
-            for result in ranked_results.results[:k]
+    k = input_data.get("k", len(doc_ids))  # Default to all docs if k not specified
+    batch_size = int(input_data.get("batch_size", BATCH_SIZE))
+    max_batch_tokens = int(input_data.get("max_batch_tokens", MAX_BATCH_TOKENS))
+
+    prefilter = input_data.get("prefilter")
+    if prefilter is not None:
+        return {
+            "rankings": _cascade_rank(
+                model, query, docs, doc_ids, prefilter, batch_size, max_batch_tokens
+            )[:k]
+        }
+
+    scores = _document_scores(model, query, docs, doc_ids, batch_size, max_batch_tokens)
+
+    with current_trace().stage("topk"):
+        rankings = rank_results(doc_ids, scores, k)
+    if DEBUG_RESULTS:
+        logger.debug(f"Ranked results: {rankings}")
+        if getattr(model, "doc_cache", None) is not None:
+            logger.debug(f"Document embedding cache: {model.doc_cache.stats()}")
+        if getattr(model, "score_cache", None) is not None:
+            logger.debug(f"Score cache: {model.score_cache.stats()}")
+
+    return {"rankings": rankings}
+
+
+def resolve_model(
+    model: Union[ModelRegistry, "ColBERTRanker"], input_data: Dict[str, Any]
+) -> Any:
+    """
+    The ranker a request runs on: the registry's model named by its "model"
+    field, or model itself when it is already a loaded ranker.
+    """
+    if isinstance(model, ModelRegistry):
+        return model.get(input_data.get("model"))
+    return model
+
+
+def rank_results(
+    doc_ids: List[str], scores: List[float], k: int
+) -> List[Dict[str, Any]]:
+    """
+    Sort documents by score and return the top k as serializable dictionaries.
+    """
+    ranked_results = sorted(zip(doc_ids, scores), key=lambda x: x[1], reverse=True)
+    return [
+        {
+            "doc_id": doc_id,
+            "score": float(score),  # Convert score to float for JSON serialization
+        }
+        for doc_id, score in ranked_results[:k]
+    ]
+
+
+def _predict_many(input_data: Dict[str, Any], model: "ColBERTRanker") -> Dict[str, Any]:
+    """
+    Rank one shared document set against several queries.
+
+    Documents are encoded once and scored against all queries together. k is
+    either one value for every query or a list with one value per query.
+    """
+    queries = input_data["queries"]
+    docs = input_data.get("docs")  # None for ids-only requests
+    doc_ids = input_data["doc_ids"]
+
+    k = input_data.get("k", len(doc_ids))
+    ks = k if isinstance(k, list) else [k] * len(queries)
+    batch_size = int(input_data.get("batch_size", BATCH_SIZE))
+    max_batch_tokens = int(input_data.get("max_batch_tokens", MAX_BATCH_TOKENS))
+
+    prefilter = input_data.get("prefilter")
+    if prefilter is not None:
+        # survivors differ per query; the document cache shares their encodings
+        return {
+            "results": [
+                {
+                    "query": query,
+                    "rankings": _cascade_rank(
+                        model,
+                        query,
+                        docs,
+                        doc_ids,
+                        prefilter,
+                        batch_size,
+                        max_batch_tokens,
+                    )[:query_k],
+                }
+                for query, query_k in zip(queries, ks)
+            ]
+        }
+
+    all_scores = _document_scores_many(
+        model, queries, docs, doc_ids, batch_size, max_batch_tokens
+    )
+
+    with current_trace().stage("topk"):
+        results = [
+            {"query": query, "rankings": rank_results(doc_ids, scores, query_k)}
+            for query, query_k, scores in zip(queries, ks, all_scores)
         ]
-    }
+    if DEBUG_RESULTS:
+        logger.debug(f"Ranked results: {results}")
+    return {"results": results}
 
 
-def output_fn(prediction: Any, response_content_type: str) -> str:
+def _document_scores_many(
+    model: "ColBERTRanker",
+    queries: List[str],
+    docs: Optional[List[str]],
+    doc_ids: List[str],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[List[float]]:
     """
-    Serialize and prepare the prediction output.
+    Model scores of every document for every query. With a score cache, only
+    documents missing for some query are encoded, and only the queries with
+    misses are scored against them.
+    """
+    cache = getattr(model, "score_cache", None)
+    if cache is None:
+        return _score_documents_many(
+            model, queries, docs, doc_ids, batch_size, max_batch_tokens
+        )
+
+    trace = current_trace()
+    with trace.stage("score_cache"):
+        keys = [cache.keys(query, docs, doc_ids) for query in queries]
+        all_scores = [cache.get_many(query_keys) for query_keys in keys]
+    misses = [[i for i, s in enumerate(scores) if s is None] for scores in all_scores]
+    trace.add("score_cache_hits", sum(len(doc_ids) - len(m) for m in misses))
+
+    missing = sorted({i for query_misses in misses for i in query_misses})
+    if missing:
+        pending = [q for q, query_misses in enumerate(misses) if query_misses]
+        computed = _score_documents_many(
+            model,
+            [queries[q] for q in pending],
+            None if docs is None else [docs[i] for i in missing],
+            [doc_ids[i] for i in missing],
+            batch_size,
+            max_batch_tokens,
+        )
+        with trace.stage("score_cache"):
+            for q, query_scores in zip(pending, computed):
+                scores = dict(zip(missing, query_scores))
+                for i in misses[q]:
+                    all_scores[q][i] = scores[i]
+                cache.put_many(
+                    [keys[q][i] for i in misses[q]], [scores[i] for i in misses[q]]
+                )
+    return all_scores
+
+
+def _score_documents_many(
+    model: "ColBERTRanker",
+    queries: List[str],
+    docs: Optional[List[str]],
+    doc_ids: List[str],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[List[float]]:
+    """
+    Encode every query and document once and MaxSim score all pairs.
+    """
+    if getattr(model, "model_type", "colbert") != "colbert":
+        return [_ranker_scores(model, query, docs) for query in queries]
+
+    query_embeddings, query_lengths = encode_queries(model, queries)
+    doc_embeddings = _document_embeddings(
+        model, docs, doc_ids, batch_size, max_batch_tokens
+    )
+    with current_trace().stage("scoring"):
+        return maxsim_many(query_embeddings, query_lengths, doc_embeddings)
+
+
+def _ranker_scores(model: Any, query: str, docs: Optional[List[str]]) -> List[float]:
+    """
+    Scores of a non-ColBERT ranker (e.g. a cross-encoder) from its own rank
+    method, in request order.
+    """
+    if docs is None:
+        raise ValueError(f"Missing required field: docs ({model.model_name})")
+    with current_trace().stage("scoring"):
+        ranked = model.rank(query=query, docs=docs, doc_ids=list(range(len(docs))))
+    scores = [0.0] * len(docs)
+    for result in ranked.results:
+        scores[result.document.doc_id] = float(result.score)
+    return scores
+
+
+def _document_embeddings(
+    model: "ColBERTRanker",
+    docs: Optional[List[str]],
+    doc_ids: List[str],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[Any]:
+    """
+    Token embeddings of the request's documents, or of its doc_ids in the
+    embedding store for ids-only requests.
+    """
+    if docs is not None:
+        return get_document_embeddings(
+            model, docs, doc_ids, batch_size, max_batch_tokens
+        )
+
+    store = getattr(model, "embedding_store", None)
+    if store is None:
+        raise ValueError("Missing required field: docs (no embedding store loaded)")
+    return get_stored_embeddings(store, doc_ids)
+
+
+def _document_scores(
+    model: "ColBERTRanker",
+    query: str,
+    docs: Optional[List[str]],
+    doc_ids: List[str],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[float]:
     """
-    if response_content_type != "application/json":
-        raise ValueError(f"Unsupported content type: {response_content_type}")
+    Model score of every document. Scores found in the model's score cache
+    are reused; only the remaining documents are encoded and scored.
+    """
+    return shared_document_scores(
+        model, [(query, docs, doc_ids)], batch_size, max_batch_tokens
+    )[0]
+
+
+def shared_document_scores(
+    model: "ColBERTRanker",
+    requests: List[Tuple[str, Optional[List[str]], List[str]]],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[List[float]]:
+    """
+    Model scores of the documents of several single-query requests, such as
+    requests coalesced by the local server. Scores found in the model's
+    score cache are reused; the remaining documents of all requests are
+    encoded in one pass and scored against their own request's query.
+
+    Args:
+        requests: (query, docs, doc_ids) of each request; docs is None for
+            ids-only requests, which cannot share a pass with requests that
+            carry docs
+    """
+    cache = getattr(model, "score_cache", None)
+    trace = current_trace()
+    all_keys: List[Optional[List[str]]] = []
+    all_scores: List[List[Optional[float]]] = []
+    for query, docs, doc_ids in requests:
+        if cache is None:
+            all_keys.append(None)
+            all_scores.append([None] * len(doc_ids))
+            continue
+        with trace.stage("score_cache"):
+            keys = cache.keys(query, docs, doc_ids)
+            scores = cache.get_many(keys)
+        trace.add("score_cache_hits", sum(score is not None for score in scores))
+        all_keys.append(keys)
+        all_scores.append(scores)
+
+    misses = [[i for i, s in enumerate(scores) if s is None] for scores in all_scores]
+    pending = [r for r, missing in enumerate(misses) if missing]
+    if pending:
+        uncached = []
+        for r in pending:
+            query, docs, doc_ids = requests[r]
+            if docs is not None:
+                docs = [docs[i] for i in misses[r]]
+            uncached.append((query, docs, [doc_ids[i] for i in misses[r]]))
+        computed = _score_documents(model, uncached, batch_size, max_batch_tokens)
+        for r, scores in zip(pending, computed):
+            for i, score in zip(misses[r], scores):
+                all_scores[r][i] = score
+            if cache is not None:
+                with trace.stage("score_cache"):
+                    cache.put_many([all_keys[r][i] for i in misses[r]], scores)
+    return all_scores
+
+
+def _score_documents(
+    model: "ColBERTRanker",
+    requests: List[Tuple[str, Optional[List[str]], List[str]]],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[List[float]]:
+    """
+    Encode each request's query and, in one pass, all of their documents
+    (reusing cached document embeddings), and MaxSim score each request's
+    documents against its own query.
+    """
+    if getattr(model, "model_type", "colbert") != "colbert":
+        return [_ranker_scores(model, query, docs) for query, docs, _ in requests]
+
+    ids_only = [docs is None for _, docs, _ in requests]
+    if any(ids_only) and not all(ids_only):
+        raise ValueError("ids-only requests cannot share an encoding pass with docs")
+    docs = None
+    if not all(ids_only):
+        docs = [doc for _, request_docs, _ in requests for doc in request_docs]
+    doc_ids = [doc_id for _, _, request_ids in requests for doc_id in request_ids]
+    doc_embeddings = _document_embeddings(
+        model, docs, doc_ids, batch_size, max_batch_tokens
+    )
+
+    all_scores = []
+    start = 0
+    for query, _, request_ids in requests:
+        query_embeddings, query_length = encode_query(model, query)
+        end = start + len(request_ids)
+        with current_trace().stage("scoring"):
+            all_scores.append(
+                maxsim(query_embeddings, query_length, doc_embeddings[start:end])
+            )
+        start = end
+    return all_scores
 
-    return json.dumps(prediction)
+
+def _cascade_rank(
+    model: "ColBERTRanker",
+    query: str,
+    docs: List[str],
+    doc_ids: List[str],
+    prefilter: Dict[str, Any],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> List[Dict[str, Any]]:
+    """
+    Two-stage ranking: a lexical prefilter scores every document and only the
+    best prefilter["keep"] documents are scored by the model.
+
+    Survivors are ranked first by their model score, followed by the
+    filtered-out documents by their prefilter score. Each ranking records the
+    stage that produced its score.
+    """
+    with current_trace().stage("prefilter"):
+        lexical_scores = bm25_scores(query, docs)
+    # stable sort so ties keep request order
+    order = sorted(range(len(docs)), key=lambda i: lexical_scores[i], reverse=True)
+    survivors, dropped = order[: prefilter["keep"]], order[prefilter["keep"] :]
+
+    scores = _document_scores(
+        model,
+        query,
+        [docs[i] for i in survivors],
+        [doc_ids[i] for i in survivors],
+        batch_size,
+        max_batch_tokens,
+    )
+    stage = getattr(model, "model_type", "colbert")
+    trace = current_trace()
+    trace.set(prefilter_kept=len(survivors))
+    with trace.stage("topk"):
+        rankings = [
+            {"doc_id": doc_ids[i], "score": float(score), "stage": stage}
+            for i, score in sorted(
+                zip(survivors, scores), key=lambda x: x[1], reverse=True
+            )
+        ]
+        rankings.extend(
+            {"doc_id": doc_ids[i], "score": float(lexical_scores[i]), "stage": "bm25"}
+            for i in dropped
+        )
+    logger.debug(
+        f"Prefilter kept {len(survivors)} of {len(docs)} documents for model scoring"
+    )
+    return rankings
+
+
+def output_fn(prediction: Any, response_content_type: str) -> Union[str, bytes]:
+    """
+    Serialize and prepare the prediction output.
+    The accept type SageMaker passes in selects application/json,
+    application/x-msgpack or application/x-npz (doc ids and float32 scores
+    as numpy arrays).
+    """
+    with current_trace().stage("serialization"):
+        response = encode_response(prediction, response_content_type)
+    finish_trace()
+    return response
@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from loguru import logger
+
+# Fraction of requests that emit a trace line (0 disables tracing)
+TRACE_SAMPLE_RATE = float(os.environ.get("RERANKER_TRACE_SAMPLE_RATE", "1.0"))
+
+
+@contextmanager
+def timed(timings: Dict[str, float], phase: str) -> Iterator[None]:
+    """
+    Add the wall-clock seconds spent in the block to timings[phase].
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start_time
+
+
+class RequestTrace:
+    """
+    Per-request stage timings and counters, emitted as one compact JSON log line.
+
+    Stages may be entered several times per request (e.g. once per
+    micro-batch); their durations accumulate.
+    """
+
+    sampled = True
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, Any] = {}
+        self._start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start_time
+            )
+
+    def add(self, name: str, value: int) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, **fields: Any) -> None:
+        self.counters.update(fields)
+
+    def emit(self) -> None:
+        record = {
+            "event": "rerank_request",
+            "request_id": self.request_id,
+            **self.counters,
+            "timings_ms": {k: round(v * 1000, 3) for k, v in self.timings.items()},
+            "total_ms": round((time.perf_counter() - self._start_time) * 1000, 3),
+        }
+        logger.info(json.dumps(record, separators=(",", ":")))
+
+
+class _NullTrace:
+    """
+    Stand-in for requests that are not sampled; every call is a no-op.
+    """
+
+    sampled = False
+    request_id = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def add(self, name: str, value: int) -> None:
+        pass
+
+    def set(self, **fields: Any) -> None:
+        pass
+
+    def emit(self) -> None:
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+_current_trace: ContextVar = ContextVar("reranker_trace", default=NULL_TRACE)
+
+
+def start_trace(request_id: Optional[str] = None):
+    """
+    Start tracing the current request, subject to TRACE_SAMPLE_RATE.
+    """
+    sampled = TRACE_SAMPLE_RATE >= 1.0 or random.random() < TRACE_SAMPLE_RATE
+    trace = RequestTrace(request_id) if sampled else NULL_TRACE
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    """
+    The trace of the request being handled, or a no-op trace outside one.
+    """
+    return _current_trace.get()
+
+
+def finish_trace() -> None:
+    """
+    Emit the current trace and stop tracing.
+    """
+    _current_trace.get().emit()
+    _current_trace.set(NULL_TRACE)
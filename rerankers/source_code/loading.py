@@ -0,0 +1,91 @@
+from typing import Dict, Optional
+
+import torch
+
+from colbert import encode_documents, encode_query, maxsim
+from instrumentation import timed
+from variants import load_variant_model
+
+WARMUP_QUERY = "warmup query"
+WARMUP_DOCS = [
+    "A short warmup document.",
+    "A longer warmup document that exercises a second sequence length so the "
+    "first real request does not pay for kernel selection and allocator growth. " * 4,
+]
+
+
+def load_ranker(
+    model_path: str,
+    variant: str = "fp32",
+    timings: Optional[Dict[str, float]] = None,
+    batch_size: int = 32,
+):
+    """
+    Fast-start loader for a packaged ColBERT model.
+
+    Builds the ColBERTRanker directly instead of going through the Reranker
+    factory, which imports every supported ranker backend, and loads the
+    packaged variant without first loading the fp32 weights it replaces.
+    fp32 weights are saved as safetensors, which from_pretrained memory-maps.
+
+    The attributes set here mirror ColBERTRanker.__init__ in rerankers.
+
+    Args:
+        model_path: Directory with the saved model, tokenizer and variants
+        variant: Packaged model variant ("fp32", "int8" or "onnx")
+        timings: Dict receiving seconds spent in the import, tokenizer_load
+            and weight_load phases
+        batch_size: Encoding batch size used inside the ranker
+    """
+    timings = {} if timings is None else timings
+
+    # Heavy modules are imported on first load rather than at module import
+    with timed(timings, "import"):
+        from rerankers.models.colbert_ranker import ColBERTModel, ColBERTRanker
+        from rerankers.utils import get_device, get_dtype
+        from transformers import AutoConfig, AutoTokenizer
+
+    ranker = ColBERTRanker.__new__(ColBERTRanker)
+    ranker.verbose = 0
+    ranker.device = get_device(None, verbose=0)
+    ranker.dtype = get_dtype(None, ranker.device, verbose=0)
+    ranker.batch_size = batch_size
+
+    with timed(timings, "tokenizer_load"):
+        ranker.tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    with timed(timings, "weight_load"):
+        if variant == "fp32":
+            ranker.model = (
+                ColBERTModel.from_pretrained(model_path, verbose=0)
+                .to(ranker.device)
+                .to(ranker.dtype)
+            )
+            ranker.model.eval()
+            config = ranker.model.config
+        else:
+            ranker.model = load_variant_model(model_path, variant)
+            config = AutoConfig.from_pretrained(model_path)
+
+    ranker.query_max_length = 32
+    ranker.doc_max_length = config.max_position_embeddings - 2
+    ranker.query_token_id = ranker.tokenizer.convert_tokens_to_ids("[unused0]")
+    ranker.document_token_id = ranker.tokenizer.convert_tokens_to_ids("[unused1]")
+    ranker.normalize = True
+    ranker.model_variant = variant
+    return ranker
+
+
+@torch.inference_mode()
+def warmup(ranker) -> None:
+    """
+    Run a synthetic query and documents through the model so one-off costs
+    (lazy module setup, kernel selection, allocator growth) are paid during
+    model loading instead of by the first request.
+    """
+    if getattr(ranker, "model_type", "colbert") != "colbert":
+        ranker.rank(query=WARMUP_QUERY, docs=WARMUP_DOCS)
+        return
+
+    query_embeddings, query_length = encode_query(ranker, WARMUP_QUERY)
+    maxsim(query_embeddings, query_length, encode_documents(ranker, WARMUP_DOCS))
@@ -0,0 +1,60 @@
+import string
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+PREFILTER_METHODS = ("bm25",)
+
+# ASCII punctuation splits tokens; underscores stay part of a word
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation if c != "_"})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens for lexical scoring.
+    """
+    return text.lower().translate(_PUNCTUATION).split()
+
+
+def bm25_scores(
+    query: str,
+    docs: List[str],
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> np.ndarray:
+    """
+    Okapi BM25 score of every document for the query.
+
+    The index is built per request over the candidate documents only: one
+    tokenization and Counter per document, a dictionary lookup per query term,
+    and a few vectorized operations over the (docs x query terms) matrix.
+
+    Args:
+        query: The search query
+        docs: Candidate documents
+        k1: Term frequency saturation
+        b: Document length normalisation
+
+    Returns:
+        float32 array of scores, in document order.
+    """
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    num_docs = len(docs)
+    if not query_terms or num_docs == 0:
+        return np.zeros(num_docs, dtype=np.float32)
+
+    doc_lengths = np.empty(num_docs, dtype=np.float32)
+    tf = np.empty((num_docs, len(query_terms)), dtype=np.float32)
+    for i, doc in enumerate(docs):
+        tokens = tokenize(doc)
+        doc_lengths[i] = len(tokens)
+        counts = Counter(tokens)
+        tf[i] = [counts[term] for term in query_terms]
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    avg_length = max(float(doc_lengths.mean()), 1.0)
+    norm = k1 * (1.0 - b + b * doc_lengths / avg_length)
+    return ((tf * (k1 + 1.0)) / (tf + norm[:, None]) * idf).sum(axis=1)
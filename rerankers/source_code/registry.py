@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+from loguru import logger
+
+# Written next to the packaged models by deploy.py
+MANIFEST_FILE = "models.json"
+
+
+def read_manifest(model_dir: str, default_name: str, default_type: str) -> Dict:
+    """
+    The models packaged in model_dir: {"default": name, "models": {name:
+    {"model_type": ..., "path": ...}}} with paths relative to model_dir.
+
+    Archives built before multi-model packaging hold a single model and no
+    manifest; they are described as default_name of default_type.
+    """
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {
+            "default": default_name,
+            "models": {
+                default_name: {
+                    "model_type": default_type,
+                    "path": default_name.replace("/", "-"),
+                }
+            },
+        }
+    with open(path) as f:
+        return json.load(f)
+
+
+def _tensor_bytes(value: Any) -> int:
+    if torch.is_tensor(value):
+        return value.numel() * value.element_size()
+    # dynamically quantized layers keep their packed weights in tuples
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    return 0
+
+
+def model_memory_bytes(ranker: Any) -> int:
+    """
+    Bytes held by a loaded ranker's weights. ONNX sessions report the size
+    of their model files instead.
+    """
+    model = ranker.model
+    if isinstance(model, torch.nn.Module):
+        return sum(_tensor_bytes(value) for value in model.state_dict().values())
+    return getattr(model, "memory_bytes", 0)
+
+
+def cache_memory_bytes(ranker: Any) -> int:
+    """
+    Bytes a loaded ranker's document embedding and score caches can grow to.
+    They are charged in full at load time, as they fill up while serving.
+    """
+    size = 0
+    doc_cache = getattr(ranker, "doc_cache", None)
+    if doc_cache is not None:
+        size += doc_cache.max_bytes
+    score_cache = getattr(ranker, "score_cache", None)
+    if score_cache is not None:
+        size += score_cache.max_memory_bytes
+    return size
+
+
+class ModelRegistry:
+    """
+    Packaged reranker models, loaded on first use and evicted least recently
+    used first once their memory exceeds the budget. A model's memory is its
+    weights plus the capacity of its embedding and score caches.
+
+    The most recently requested model is never evicted, so a single model
+    larger than the budget still serves requests.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        manifest: Dict,
+        loader: Callable[[str, str, Dict], Any],
+        memory_budget_bytes: int,
+    ):
+        self.model_dir = model_dir
+        self.default = manifest["default"]
+        self.models: Dict[str, Dict] = manifest["models"]
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.startup_timings: Dict[str, float] = {}
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self._loaded: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self.models)
+
+    def get(self, name: Optional[str] = None) -> Any:
+        """
+        The loaded model called name (the default model if None), loading it
+        and evicting others if needed.
+        """
+        name = name or self.default
+        if name not in self.models:
+            raise ValueError(f"Unknown model: {name}. Available: {self.names()}")
+
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                self.hits += 1
+                return self._loaded[name][0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # concurrent first requests for one model load it once
+        with load_lock:
+            with self._lock:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                    self.hits += 1
+                    return self._loaded[name][0]
+
+            spec = self.models[name]
+            model = self.loader(os.path.join(self.model_dir, spec["path"]), name, spec)
+            weights = model_memory_bytes(model)
+            caches = cache_memory_bytes(model)
+            size = weights + caches
+
+            with self._lock:
+                self._loaded[name] = (model, size)
+                self.loads += 1
+                self._evict()
+        logger.info(
+            f"Loaded model {name} ({weights / 1024 / 1024:.0f} MB weights, "
+            f"{caches / 1024 / 1024:.0f} MB caches)"
+        )
+        return model
+
+    def _evict(self) -> None:
+        loaded_bytes = sum(size for _, size in self._loaded.values())
+        while len(self._loaded) > 1 and loaded_bytes > self.memory_budget_bytes:
+            name, (_, size) = self._loaded.popitem(last=False)
+            loaded_bytes -= size
+            self.evictions += 1
+            logger.info(f"Evicted model {name} to stay within the memory budget")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Loaded models and their sizes, plus load and eviction counters.
+        """
+        with self._lock:
+            loaded = {name: size for name, (_, size) in self._loaded.items()}
+        return {
+            "default": self.default,
+            "available": self.names(),
+            "loaded": loaded,
+            "loaded_bytes": sum(loaded.values()),
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
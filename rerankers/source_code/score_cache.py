@@ -0,0 +1,272 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from colbert import content_hash
+
+# sqlite limits the number of bound parameters per statement
+_SQLITE_CHUNK = 500
+
+# Approximate memory of one in-memory entry: the 32-character key, the
+# (score, expires_at) tuple and the OrderedDict bookkeeping
+ENTRY_BYTES = 300
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for cache keys: NFC with whitespace collapsed.
+    Case is kept, since it can change the tokens the model sees.
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+def score_keys(
+    query: str,
+    docs: Optional[List[str]],
+    doc_ids: List[str],
+    namespace: str = "",
+    store_version: str = "",
+) -> List[str]:
+    """
+    Cache key of each (query, document) pair.
+
+    Documents are identified by their content hash, so the same text behind
+    different doc_ids shares one entry and an edited document misses. For
+    ids-only requests, whose embeddings live in the embedding store, the
+    doc_id and the store version are used instead, so updating the store
+    invalidates their scores. The namespace separates models and variants.
+    """
+    prefix = f"{namespace}\0{normalize_query(query)}\0".encode("utf-8")
+    if docs is None:
+        parts = [f"id:{store_version}:{doc_id}" for doc_id in doc_ids]
+    else:
+        parts = [content_hash(doc) for doc in docs]
+    return [
+        hashlib.blake2b(prefix + part.encode("utf-8"), digest_size=16).hexdigest()
+        for part in parts
+    ]
+
+
+class ScoreCache:
+    """
+    In-memory LRU cache of per-document relevance scores with a TTL.
+
+    Entries expire ttl_seconds after they were stored; beyond max_entries the
+    least recently used entries are evicted. The namespace (e.g. model name
+    and variant) is part of every key, so caches of different models never
+    share scores; the version of the model's embedding store is part of the
+    keys of ids-only requests.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        namespace: str = "",
+        store_version: str = "",
+    ):
+        if max_entries < 0:
+            raise ValueError("max_entries must be non-negative")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.store_version = store_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_memory_bytes(self) -> int:
+        """
+        Memory the cache can grow to, counted in the model registry's budget.
+        """
+        return self.max_entries * ENTRY_BYTES
+
+    def keys(
+        self, query: str, docs: Optional[List[str]], doc_ids: List[str]
+    ) -> List[str]:
+        """
+        Cache keys of a request's documents for this cache's namespace.
+        """
+        return score_keys(query, docs, doc_ids, self.namespace, self.store_version)
+
+    def get_many(self, keys: List[str]) -> List[Optional[float]]:
+        """
+        Cached score for each key, or None where it is missing or expired.
+        """
+        now = time.time()
+        scores: List[Optional[float]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    scores.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                scores.append(entry[0])
+            hits = sum(score is not None for score in scores)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return scores
+
+    def put_many(self, keys: List[str], scores: List[float]) -> None:
+        """
+        Store scores, evicting least recently used entries beyond max_entries.
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._entries[key] = (float(score), expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drop all entries. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the cache counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SqliteScoreCache(ScoreCache):
+    """
+    ScoreCache persisted to a local sqlite file, so scores survive worker
+    restarts. Recency is tracked per entry for LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        ttl_seconds: float,
+        namespace: str = "",
+        store_version: str = "",
+    ):
+        super().__init__(max_entries, ttl_seconds, namespace, store_version)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores "
+            "(key TEXT PRIMARY KEY, score REAL, expires_at REAL, last_used REAL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    @property
+    def max_memory_bytes(self) -> int:
+        # entries are on disk
+        return 0
+
+    def get_many(self, keys: List[str]) -> List[Optional[float]]:
+        now = time.time()
+        found: Dict[str, float] = {}
+        with self._lock:
+            expired = []
+            for start in range(0, len(keys), _SQLITE_CHUNK):
+                chunk = keys[start : start + _SQLITE_CHUNK]
+                rows = self._db.execute(
+                    "SELECT key, score, expires_at FROM scores "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for key, score, expires_at in rows:
+                    if expires_at <= now:
+                        expired.append((key,))
+                    else:
+                        found[key] = score
+
+            self._db.executemany("DELETE FROM scores WHERE key = ?", expired)
+            self._db.executemany(
+                "UPDATE scores SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._db.commit()
+
+            self.expirations += len(expired)
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def put_many(self, keys: List[str], scores: List[float]) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                [
+                    (key, float(score), expires_at, now)
+                    for key, score in zip(keys, scores)
+                ],
+            )
+            cursor = self._db.execute(
+                "DELETE FROM scores WHERE expires_at <= ?", (now,)
+            )
+            self.expirations += cursor.rowcount
+
+            excess = (
+                self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+                - self.max_entries
+            )
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM scores WHERE key IN "
+                    "(SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM scores")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "backend": "sqlite", "path": self.path}
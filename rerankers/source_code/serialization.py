@@ -0,0 +1,117 @@
+import io
+import json
+import os
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+# Optional fast paths; stdlib json is always available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+NPZ = "application/x-npz"
+
+REQUEST_CONTENT_TYPES = (JSON, MSGPACK)
+RESPONSE_CONTENT_TYPES = (JSON, MSGPACK, NPZ)
+
+# orjson writes compact JSON, so responses are no longer byte-identical to
+# json.dumps; clients that compare raw bytes should leave this off
+FAST_JSON_RESPONSE = os.environ.get("RERANKER_FAST_JSON_RESPONSE", "0") == "1"
+
+
+def _media_type(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def negotiate_accept(accept: str) -> str:
+    """
+    Pick the response content type for an Accept value.
+
+    Accept may list several types; the first supported one wins, and */* (or
+    an empty value) falls back to JSON.
+    """
+    for candidate in (accept or JSON).split(","):
+        media_type = _media_type(candidate)
+        if media_type in ("*/*", "application/*", ""):
+            return JSON
+        if media_type in RESPONSE_CONTENT_TYPES:
+            if media_type == MSGPACK and msgpack is None:
+                continue
+            return media_type
+    raise ValueError(f"Unsupported content type: {accept}")
+
+
+def decode_request(body: Union[str, bytes], content_type: str) -> Dict[str, Any]:
+    """
+    Parse a request body according to its content type.
+    """
+    media_type = _media_type(content_type)
+
+    if media_type == JSON:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+
+    if media_type == MSGPACK:
+        if msgpack is None:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        return msgpack.unpackb(body, raw=False)
+
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def _rankings_to_arrays(rankings: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    arrays = {
+        "doc_ids": np.array([str(r["doc_id"]) for r in rankings], dtype=np.str_),
+        "scores": np.array([r["score"] for r in rankings], dtype=np.float32),
+    }
+    if rankings and "stage" in rankings[0]:
+        arrays["stages"] = np.array([r["stage"] for r in rankings], dtype=np.str_)
+    return arrays
+
+
+def _encode_npz(prediction: Dict[str, Any]) -> bytes:
+    """
+    Pack rankings as numpy arrays: doc_ids (str), scores (float32) and, for
+    cascade requests, stages (str). Multi-query results are concatenated and
+    split by an offsets array holding each query's start and end.
+    """
+    if "results" in prediction:
+        rankings = [r for result in prediction["results"] for r in result["rankings"]]
+        arrays = _rankings_to_arrays(rankings)
+        arrays["offsets"] = np.cumsum(
+            [0] + [len(result["rankings"]) for result in prediction["results"]],
+            dtype=np.int64,
+        )
+    else:
+        arrays = _rankings_to_arrays(prediction["rankings"])
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def encode_response(prediction: Dict[str, Any], accept: str) -> Union[str, bytes]:
+    """
+    Serialize a prediction in the negotiated response content type.
+    """
+    media_type = negotiate_accept(accept)
+
+    if media_type == MSGPACK:
+        return msgpack.packb(prediction, use_bin_type=True)
+
+    if media_type == NPZ:
+        return _encode_npz(prediction)
+
+    if FAST_JSON_RESPONSE and orjson is not None:
+        return orjson.dumps(prediction)
+    return json.dumps(prediction)
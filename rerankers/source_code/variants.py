@@ -0,0 +1,143 @@
+import os
+import pickle
+from typing import Dict
+
+import torch
+
+# fp32 is the Hugging Face checkpoint itself; the others are packaged next to it
+MODEL_VARIANTS = ("fp32", "int8", "onnx")
+INT8_FILE = "model_int8.pt"
+ONNX_FILE = "model.onnx"
+
+_ONNX_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamically quantize the model's Linear layers to int8 for CPU inference.
+    """
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def export_int8(ranker, model_path: str) -> str:
+    """
+    Save the state_dict of an int8 dynamically quantized copy of the ranker's
+    model next to the fp32 weights. Only tensors are saved, so it loads with
+    torch.load(weights_only=True).
+    """
+    path = os.path.join(model_path, INT8_FILE)
+    torch.save(quantize_int8(ranker.model).state_dict(), path)
+    return path
+
+
+def load_int8(model_path: str) -> torch.nn.Module:
+    """
+    Rebuild the quantized model from the config and the saved int8 state_dict,
+    without loading the fp32 weights.
+    """
+    from rerankers.models.colbert_ranker import ColBERTModel
+    from transformers import AutoConfig
+    from transformers.modeling_utils import no_init_weights
+
+    path = os.path.join(model_path, INT8_FILE)
+    try:
+        state_dict = torch.load(path, weights_only=True)
+    except pickle.UnpicklingError as e:
+        raise ValueError(
+            f"{path} holds a pickled model rather than a state_dict; "
+            "package it again with deploy.py --refresh"
+        ) from e
+
+    # weights are overwritten by the state_dict, so they are not initialized
+    with no_init_weights():
+        model = ColBERTModel(AutoConfig.from_pretrained(model_path), verbose=0)
+    model = quantize_int8(model.eval())
+    model.load_state_dict(state_dict)
+    return model
+
+
+def export_onnx(ranker, model_path: str, opset_version: int = 17) -> str:
+    """
+    Export the ranker's model to ONNX next to the fp32 weights, with dynamic
+    batch and sequence axes.
+    """
+    path = os.path.join(model_path, ONNX_FILE)
+    sample = ranker.tokenizer(
+        ["a sample document", "another sample"], return_tensors="pt", padding=True
+    )
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in _ONNX_INPUTS}
+    dynamic_axes["embeddings"] = {0: "batch", 1: "sequence"}
+
+    torch.onnx.export(
+        ranker.model,
+        tuple(sample[name] for name in _ONNX_INPUTS),
+        path,
+        input_names=list(_ONNX_INPUTS),
+        output_names=["embeddings"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset_version,
+    )
+    return path
+
+
+class OnnxColBERTModel:
+    """
+    Drop-in replacement for ColBERTModel backed by an ONNX Runtime session.
+
+    ColBERTRanker only calls model(**encoding) and expects a torch tensor of
+    token embeddings back, so that is all this implements.
+    """
+
+    def __init__(self, path: str, num_threads: int = 0):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        # model graph plus external weights, for the model registry's budget
+        self.memory_bytes = sum(
+            os.path.getsize(f) for f in (path, f"{path}.data") if os.path.exists(f)
+        )
+
+    def __call__(self, **encoding: torch.Tensor) -> torch.Tensor:
+        feed: Dict[str, object] = {}
+        for name in self.input_names:
+            value = encoding.get(name)
+            if value is None:
+                # query encodings carry no token_type_ids
+                value = torch.zeros_like(encoding["input_ids"])
+            feed[name] = value.cpu().numpy()
+        return torch.from_numpy(self.session.run(None, feed)[0])
+
+    def eval(self) -> "OnnxColBERTModel":
+        return self
+
+
+def load_variant_model(model_path: str, variant: str):
+    """
+    Load the model object of a packaged int8 or ONNX variant.
+    """
+    if variant == "int8":
+        return load_int8(model_path).eval()
+    if variant == "onnx":
+        return OnnxColBERTModel(os.path.join(model_path, ONNX_FILE))
+    raise ValueError(f"Unknown model variant: {variant}")
+
+
+def load_variant(ranker, model_path: str, variant: str):
+    """
+    Swap the ranker's fp32 model for a packaged variant.
+    """
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant: {variant}")
+
+    if variant != "fp32":
+        ranker.model = load_variant_model(model_path, variant)
+
+    ranker.model_variant = variant
+    return ranker
@@ -0,0 +1,10 @@
+import os
+import sys
+
+RERANKERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# inference modules import each other as top-level modules, as in the container
+SOURCE_DIR = os.path.join(RERANKERS_DIR, "source_code")
+for path in (RERANKERS_DIR, SOURCE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
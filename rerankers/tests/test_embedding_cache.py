@@ -0,0 +1,62 @@
+import unittest
+
+import torch
+
+from embedding_cache import DocEmbeddingCache
+
+
+def embeddings(tokens: int) -> torch.Tensor:
+    # 4 float32 columns: 16 bytes per token
+    return torch.zeros(tokens, 4)
+
+
+class TestDocEmbeddingCache(unittest.TestCase):
+    def test_byte_accounting(self):
+        cache = DocEmbeddingCache(max_bytes=1000)
+        cache.put(("a", "h1"), embeddings(10))
+        cache.put(("b", "h2"), embeddings(5))
+        self.assertEqual(cache.current_bytes, 240)
+
+        # replacing an entry counts only its new size
+        cache.put(("a", "h1"), embeddings(2))
+        self.assertEqual(cache.current_bytes, 112)
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual(cache.current_bytes, 0)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = DocEmbeddingCache(max_bytes=320)
+        cache.put("a", embeddings(10))
+        cache.put("b", embeddings(10))
+        cache.get("a")
+        cache.put("c", embeddings(10))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.current_bytes, 320)
+
+    def test_entry_larger_than_budget_not_cached(self):
+        cache = DocEmbeddingCache(max_bytes=100)
+        cache.put("a", embeddings(2))
+        cache.put("big", embeddings(10))
+        self.assertIsNone(cache.get("big"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.current_bytes, 32)
+
+    def test_stats(self):
+        cache = DocEmbeddingCache(max_bytes=1000)
+        cache.put("a", embeddings(1))
+        cache.get("a")
+        cache.get("missing")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["bytes"], 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import tempfile
+import unittest
+
+import build_embedding_store
+import inference
+from embedding_store import EmbeddingStore
+from tiny_colbert import DOCS, make_checkpoint
+
+MODEL = "tiny-colbert"
+
+
+def build_args(model_dir: str, corpus: str, **overrides) -> argparse.Namespace:
+    args = dict(
+        corpus=corpus,
+        model_dir=model_dir,
+        model=MODEL,
+        store=inference.EMBEDDING_STORE,
+        variant="fp32",
+        id_field="docid",
+        text_field="insight",
+        skip_existing=False,
+        chunk_size=3,
+        batch_size=inference.BATCH_SIZE,
+        max_batch_tokens=inference.MAX_BATCH_TOKENS,
+    )
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def write_corpus(path: str, docs: dict) -> str:
+    with open(path, "w") as f:
+        for doc_id, text in docs.items():
+            f.write(json.dumps({"docid": doc_id, "insight": text}) + "\n")
+    return path
+
+
+class TestIdsOnlyRequests(unittest.TestCase):
+    """
+    A store built with build_embedding_store.py serving ids-only requests.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model_path = make_checkpoint(os.path.join(cls.tmp.name, MODEL))
+        cls.docs = {f"doc-{i}": text for i, text in enumerate(DOCS)}
+        corpus = write_corpus(os.path.join(cls.tmp.name, "corpus.jsonl"), cls.docs)
+        build_embedding_store.build(build_args(cls.tmp.name, corpus))
+        cls.model = inference.load_model(
+            cls.model_path, MODEL, {"model_type": "colbert"}
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_store_holds_every_document(self):
+        store = EmbeddingStore(os.path.join(self.model_path, inference.EMBEDDING_STORE))
+        self.assertEqual(len(store), len(DOCS))
+        self.assertIn("doc-0", store)
+        self.assertNotIn("doc-missing", store)
+
+    def test_ids_only_matches_request_with_docs(self):
+        """Test that ids-only scores equal the scores of the same request with docs."""
+        doc_ids = ["doc-5", "doc-0", "doc-3"]
+        query = "the cat sat on the mat"
+        ids_only = inference.predict_fn(
+            {"query": query, "doc_ids": doc_ids}, self.model
+        )
+        with_docs = inference.predict_fn(
+            {
+                "query": query,
+                "docs": [self.docs[doc_id] for doc_id in doc_ids],
+                "doc_ids": doc_ids,
+            },
+            self.model,
+        )
+        self.assertEqual(
+            [r["doc_id"] for r in ids_only["rankings"]],
+            [r["doc_id"] for r in with_docs["rankings"]],
+        )
+        # the store keeps float16 embeddings
+        for got, want in zip(ids_only["rankings"], with_docs["rankings"]):
+            self.assertAlmostEqual(got["score"], want["score"], delta=1e-3)
+
+    def test_missing_doc_id(self):
+        with self.assertRaisesRegex(ValueError, "not in embedding store"):
+            inference.predict_fn(
+                {"query": "cat", "doc_ids": ["doc-1", "doc-missing"]}, self.model
+            )
+
+    def test_skip_existing_appends_only_new_documents(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            make_checkpoint(os.path.join(tmp, MODEL))
+            store_dir = os.path.join(tmp, MODEL, inference.EMBEDDING_STORE)
+            first = write_corpus(os.path.join(tmp, "first.jsonl"), {"a": DOCS[0]})
+            build_embedding_store.build(build_args(tmp, first))
+            version = EmbeddingStore(store_dir).version
+
+            both = write_corpus(
+                os.path.join(tmp, "both.jsonl"), {"a": DOCS[0], "b": DOCS[1]}
+            )
+            build_embedding_store.build(build_args(tmp, both, skip_existing=True))
+            store = EmbeddingStore(store_dir)
+            self.assertEqual(len(store), 2)
+            self.assertNotEqual(store.version, version)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import ast
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+RERANKERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _import_in_subprocess(modules):
+    # a fresh interpreter run from rerankers/, as `python deploy.py` is, without
+    # source_code/ on sys.path
+    return subprocess.run(
+        [sys.executable, "-c", "; ".join(f"import {name}" for name in modules)],
+        cwd=RERANKERS_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_deploy_source_code_imports():
+    with open(os.path.join(RERANKERS_DIR, "deploy.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = sorted(
+        {
+            node.module
+            for node in ast.walk(tree)
+            if isinstance(node, ast.ImportFrom)
+            and node.module
+            and node.module.startswith("source_code.")
+        }
+    )
+    assert modules
+
+    result = _import_in_subprocess(modules)
+
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("sagemaker") is None, reason="sagemaker is not installed"
+)
+def test_import_deploy():
+    result = _import_in_subprocess(["deploy"])
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import inference
+from loading import load_ranker
+from local_server import DynamicBatcher
+from score_cache import ScoreCache
+from tiny_colbert import DOCS, make_checkpoint
+
+QUERIES = ["cat on a mat", "capital of france", "fast reranker model", "green river"]
+
+
+def make_request(query: str, **params) -> dict:
+    return {"query": query, "docs": DOCS, "doc_ids": list(range(len(DOCS))), **params}
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = make_checkpoint(cls.tmp.name)
+        cls.reference = load_ranker(cls.model_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.model = load_ranker(self.model_dir)
+        self.model.model_type = "colbert"
+        self.model.score_cache = ScoreCache(max_entries=1000, ttl_seconds=3600)
+
+    def test_metrics_count_answered_requests(self):
+        """Test that every request whose future resolved is already counted in metrics."""
+        batcher = DynamicBatcher(self.model, max_wait_ms=2)
+        futures = [batcher.submit(make_request(QUERIES[i % 4])) for i in range(16)]
+        for answered, future in enumerate(futures, start=1):
+            future.result(timeout=60)
+            self.assertGreaterEqual(batcher.metrics()["requests"], answered)
+        self.assertEqual(batcher.metrics()["requests"], 16)
+
+    def test_shared_scores_match_predict_fn(self):
+        """Test that coalesced requests get the rankings predict_fn gives them alone."""
+        batcher = DynamicBatcher(self.model, max_wait_ms=200)
+        futures = [batcher.submit(make_request(query, k=5)) for query in QUERIES]
+        for query, future in zip(QUERIES, futures):
+            rankings = future.result(timeout=60)["rankings"]
+            expected = inference.predict_fn(make_request(query, k=5), self.reference)
+            self.assertEqual(len(rankings), 5)
+            for got, want in zip(rankings, expected["rankings"]):
+                self.assertEqual(got["doc_id"], want["doc_id"])
+                self.assertAlmostEqual(got["score"], want["score"], places=5)
+        self.assertEqual(self.model.score_cache.misses, len(QUERIES) * len(DOCS))
+
+        # a repeated request is answered from the score cache
+        batcher.submit(make_request(QUERIES[0])).result(timeout=60)
+        self.assertEqual(self.model.score_cache.hits, len(DOCS))
+
+    def test_malformed_request_fails_alone(self):
+        """Test that malformed requests coalesced with valid ones fail without failing them."""
+        batcher = DynamicBatcher(self.model, max_wait_ms=200)
+        futures = {
+            "valid": batcher.submit(make_request(QUERIES[0])),
+            "extra_docs": batcher.submit(
+                {"query": QUERIES[1], "docs": DOCS, "doc_ids": [0, 1]}
+            ),
+            "no_query": batcher.submit({"docs": DOCS[:2], "doc_ids": [0, 1]}),
+            "no_doc_ids": batcher.submit({"query": QUERIES[1], "docs": DOCS[:2]}),
+            "also_valid": batcher.submit(make_request(QUERIES[2])),
+        }
+
+        for name in ("extra_docs", "no_query", "no_doc_ids"):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    futures[name].result(timeout=60)
+        for name in ("valid", "also_valid"):
+            rankings = futures[name].result(timeout=60)["rankings"]
+            self.assertEqual(len(rankings), len(DOCS))
+        self.assertEqual(batcher.metrics()["requests"], 5)
+
+    def test_per_request_batching_parameters(self):
+        """Test that batch_size and max_batch_tokens are honoured for coalesced requests."""
+        batcher = DynamicBatcher(self.model, max_wait_ms=200)
+        with mock.patch.object(
+            inference,
+            "shared_document_scores",
+            wraps=inference.shared_document_scores,
+        ) as shared:
+            futures = [
+                batcher.submit(make_request(QUERIES[0], batch_size=2)),
+                batcher.submit(make_request(QUERIES[1], batch_size=2)),
+                batcher.submit(make_request(QUERIES[2], max_batch_tokens=64)),
+            ]
+            for future in futures:
+                future.result(timeout=60)
+
+        settings = sorted(
+            (call.args[2], call.args[3]) for call in shared.call_args_list
+        )
+        self.assertEqual(
+            settings,
+            [(2, inference.MAX_BATCH_TOKENS), (inference.BATCH_SIZE, 64)],
+        )
+        self.assertEqual(
+            sorted(len(call.args[1]) for call in shared.call_args_list), [1, 2]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    boto3 = None
+
+from model_archive import (
+    MIN_PART_SIZE,
+    ParallelGzipWriter,
+    package_and_upload,
+    write_archive,
+)
+
+BUCKET = "models"
+
+
+def make_artifacts(root: str) -> dict:
+    files = {
+        "models.json": b'{"default": "tiny"}',
+        "tiny/config.json": b'{"hidden_size": 32}',
+        # incompressible, so the archive spans several blocks and parts
+        "tiny/model.safetensors": os.urandom(3 * MIN_PART_SIZE // 2),
+    }
+    for name, data in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return files
+
+
+def read_archive(data: bytes) -> dict:
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        return {
+            member.name: tar.extractfile(member).read()
+            for member in tar.getmembers()
+            if member.isfile()
+        }
+
+
+class TestWriteArchive(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            files = make_artifacts(root)
+            first, second = io.BytesIO(), io.BytesIO()
+            sizes = write_archive(root, first, threads=2)
+            write_archive(root, second, threads=3)
+
+        self.assertEqual(read_archive(first.getvalue()), files)
+        self.assertEqual(sizes["bytes_out"], len(first.getvalue()))
+        # same artifacts, same archive, whatever the thread count
+        self.assertEqual(first.getvalue(), second.getvalue())
+
+    def test_threads_stopped_when_tarring_fails(self):
+        """Test that the compression pool is shut down when adding a file raises."""
+        created = []
+
+        class RecordingWriter(ParallelGzipWriter):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        with tempfile.TemporaryDirectory() as root:
+            make_artifacts(root)
+            with mock.patch("model_archive.ParallelGzipWriter", RecordingWriter):
+                with mock.patch.object(
+                    tarfile.TarFile, "add", side_effect=OSError("disk gone")
+                ):
+                    with self.assertRaises(OSError):
+                        write_archive(root, io.BytesIO(), threads=2)
+
+        self.assertTrue(created[0]._executor._shutdown)
+
+
+@unittest.skipIf(boto3 is None, "boto3 and moto are not installed")
+class TestPackageAndUpload(unittest.TestCase):
+    def setUp(self):
+        self.aws = mock_aws()
+        self.aws.start()
+        self.addCleanup(self.aws.stop)
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket=BUCKET)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.files = make_artifacts(self.root)
+
+    def upload(self, timings=None) -> str:
+        return package_and_upload(
+            self.root,
+            BUCKET,
+            "reranker",
+            self.s3,
+            part_size=MIN_PART_SIZE,
+            upload_threads=2,
+            compress_threads=2,
+            timings=timings,
+        )
+
+    def test_upload_and_read_back(self):
+        uri = self.upload()
+        key = uri.removeprefix(f"s3://{BUCKET}/")
+        self.assertRegex(key, r"^reranker/model-[0-9a-f]{16}\.tar\.gz$")
+        body = self.s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+        self.assertEqual(read_archive(body), self.files)
+
+    def test_second_run_is_skipped(self):
+        """Test that unchanged artifacts are neither archived nor uploaded again."""
+        first = self.upload()
+        timings = {}
+        with mock.patch("model_archive.write_archive") as write:
+            self.assertEqual(self.upload(timings), first)
+        write.assert_not_called()
+        self.assertNotIn("archive_upload", timings)
+
+        # a changed file gets a new key
+        with open(os.path.join(self.root, "models.json"), "wb") as f:
+            f.write(b'{"default": "other"}')
+        self.assertNotEqual(self.upload(), first)
+        self.assertEqual(self.s3.list_objects_v2(Bucket=BUCKET)["KeyCount"], 2)
+
+    def test_failed_upload_is_aborted(self):
+        with mock.patch.object(
+            tarfile.TarFile, "add", side_effect=OSError("disk gone")
+        ):
+            with self.assertRaises(OSError):
+                self.upload()
+        self.assertEqual(
+            self.s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []), []
+        )
+        self.assertEqual(self.s3.list_objects_v2(Bucket=BUCKET)["KeyCount"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+
+from rerankers import Reranker
+
+import inference
+from loading import load_ranker
+from tiny_colbert import DOCS, make_checkpoint
+
+QUERIES = ["cat on a mat", "capital of france", "fast reranker model", "green river"]
+
+
+class TestRerankerParity(unittest.TestCase):
+    """
+    The handler's own encoding and MaxSim scoring against Reranker.rank on the
+    same checkpoint.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        model_dir = make_checkpoint(cls.tmp.name)
+        cls.reference = Reranker(model_dir, model_type="colbert", verbose=0)
+        cls.model = load_ranker(model_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def reference_scores(self, query: str, docs: list) -> list:
+        ranked = self.reference.rank(
+            query=query, docs=docs, doc_ids=list(range(len(docs)))
+        )
+        scores = [0.0] * len(docs)
+        for result in ranked.results:
+            scores[result.document.doc_id] = float(result.score)
+        return scores
+
+    def assert_scores_close(self, got: list, want: list) -> None:
+        self.assertEqual(len(got), len(want))
+        for got_score, want_score in zip(got, want):
+            self.assertAlmostEqual(got_score, want_score, delta=1e-5)
+
+    def test_document_scores(self):
+        doc_ids = list(range(len(DOCS)))
+        for query in QUERIES:
+            with self.subTest(query=query):
+                scores = inference._document_scores(
+                    self.model,
+                    query,
+                    DOCS,
+                    doc_ids,
+                    inference.BATCH_SIZE,
+                    inference.MAX_BATCH_TOKENS,
+                )
+                self.assert_scores_close(scores, self.reference_scores(query, DOCS))
+
+    def test_small_token_batches(self):
+        """Test that splitting documents into token-budgeted batches does not change scores."""
+        scores = inference._document_scores(
+            self.model, QUERIES[0], DOCS, list(range(len(DOCS))), 2, 16
+        )
+        self.assert_scores_close(scores, self.reference_scores(QUERIES[0], DOCS))
+
+    def test_predict_fn_rankings(self):
+        prediction = inference.predict_fn(
+            {"query": QUERIES[1], "docs": DOCS, "doc_ids": list(range(len(DOCS)))},
+            self.model,
+        )
+        want = self.reference_scores(QUERIES[1], DOCS)
+        ranked = [item["doc_id"] for item in prediction["rankings"]]
+        self.assertEqual(
+            ranked, sorted(range(len(DOCS)), key=lambda i: want[i], reverse=True)
+        )
+
+    def test_multi_query_matches_single_queries(self):
+        """Test that each query of a multi-query request scores like its own single-query request."""
+        doc_ids = list(range(len(DOCS)))
+        ks = [3, 1, len(DOCS), 5]
+        prediction = inference.predict_fn(
+            {"queries": QUERIES, "docs": DOCS, "doc_ids": doc_ids, "k": ks},
+            self.model,
+        )
+
+        self.assertEqual([r["query"] for r in prediction["results"]], QUERIES)
+        for query, k, result in zip(QUERIES, ks, prediction["results"]):
+            with self.subTest(query=query):
+                single = inference.predict_fn(
+                    {"query": query, "docs": DOCS, "doc_ids": doc_ids, "k": k},
+                    self.model,
+                )["rankings"]
+                self.assertEqual(len(result["rankings"]), k)
+                self.assertEqual(
+                    [r["doc_id"] for r in result["rankings"]],
+                    [r["doc_id"] for r in single],
+                )
+                self.assert_scores_close(
+                    [r["score"] for r in result["rankings"]],
+                    [r["score"] for r in single],
+                )
+                want = self.reference_scores(query, DOCS)
+                self.assert_scores_close(
+                    [r["score"] for r in result["rankings"]],
+                    [want[r["doc_id"]] for r in result["rankings"]],
+                )
+
+    def test_multi_query_single_k(self):
+        prediction = inference.predict_fn(
+            {"queries": QUERIES[:2], "docs": DOCS, "doc_ids": list(range(8)), "k": 2},
+            self.model,
+        )
+        self.assertEqual([len(r["rankings"]) for r in prediction["results"]], [2, 2])
+
+    def test_k_list_length_must_match_queries(self):
+        with self.assertRaises(ValueError):
+            inference.input_fn(
+                '{"queries": ["a", "b"], "docs": ["x"], "doc_ids": [0], "k": [1]}',
+                "application/json",
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import inference
+from loading import load_ranker
+from prefilter import bm25_scores, tokenize
+from tiny_colbert import DOCS, make_checkpoint
+
+
+class TestBM25(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Late-interaction, snake_case!"),
+            ["late", "interaction", "snake_case"],
+        )
+
+    def test_matching_documents_score_higher(self):
+        scores = bm25_scores("capital of france", DOCS)
+        self.assertEqual(int(np.argmax(scores)), 1)
+        self.assertEqual(scores[0], 0.0)
+        self.assertEqual(scores.dtype, np.float32)
+
+    def test_term_frequency_saturates(self):
+        docs = ["money", "money money", "money money money money", "water"]
+        scores = bm25_scores("money", docs, b=0.0)
+        self.assertTrue(scores[0] < scores[1] < scores[2])
+        # k1 bounds the gain of repeating a term
+        self.assertLess(scores[2] - scores[1], scores[1] - scores[0])
+
+    def test_reference_formula(self):
+        """Test against BM25 written out term by term."""
+        query, k1, b = "the cat and the dog", 1.5, 0.75
+        docs = [tokenize(doc) for doc in DOCS]
+        avg_length = sum(map(len, docs)) / len(docs)
+        want = []
+        for doc in docs:
+            score = 0.0
+            for term in dict.fromkeys(tokenize(query)):
+                df = sum(term in d for d in docs)
+                idf = np.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                tf = doc.count(term)
+                score += (
+                    idf
+                    * tf
+                    * (k1 + 1)
+                    / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+                )
+            want.append(score)
+        np.testing.assert_allclose(bm25_scores(query, DOCS, k1, b), want, rtol=1e-5)
+
+    def test_empty_query_or_docs(self):
+        self.assertEqual(bm25_scores("", DOCS).tolist(), [0.0] * len(DOCS))
+        self.assertEqual(len(bm25_scores("cat", [])), 0)
+
+
+class TestCascadeRank(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model = load_ranker(make_checkpoint(cls.tmp.name))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def predict(self, query: str, keep: int, **params) -> list:
+        request = {
+            "query": query,
+            "docs": DOCS,
+            "doc_ids": [f"d{i}" for i in range(len(DOCS))],
+            "prefilter": {"method": "bm25", "keep": keep},
+            **params,
+        }
+        return inference.predict_fn(request, self.model)["rankings"]
+
+    def test_only_survivors_reach_the_model(self):
+        """Test that dropped documents are never encoded or scored by the model."""
+        query = "the cat sat on the mat"
+        lexical = bm25_scores(query, DOCS)
+        expected_survivors = {
+            f"d{i}" for i in sorted(range(len(DOCS)), key=lambda i: -lexical[i])[:3]
+        }
+        with mock.patch.object(
+            inference, "_document_scores", wraps=inference._document_scores
+        ) as scored:
+            rankings = self.predict(query, keep=3)
+
+        self.assertEqual(scored.call_count, 1)
+        _, _, docs, doc_ids, _, _ = scored.call_args.args
+        self.assertEqual(set(doc_ids), expected_survivors)
+        self.assertEqual(docs, [DOCS[int(doc_id[1:])] for doc_id in doc_ids])
+        self.assertEqual(
+            {r["doc_id"] for r in rankings if r["stage"] == "colbert"},
+            expected_survivors,
+        )
+
+    def test_ranking_order(self):
+        """Test that survivors come first by model score, then the rest by BM25 score."""
+        rankings = self.predict("a river bank with money", keep=4)
+        self.assertEqual(len(rankings), len(DOCS))
+        self.assertEqual([r["stage"] for r in rankings], ["colbert"] * 4 + ["bm25"] * 4)
+        for stage in ("colbert", "bm25"):
+            scores = [r["score"] for r in rankings if r["stage"] == stage]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+        # survivors keep the scores the model gives them without a prefilter
+        full = {
+            r["doc_id"]: r["score"]
+            for r in inference.predict_fn(
+                {
+                    "query": "a river bank with money",
+                    "docs": DOCS,
+                    "doc_ids": [f"d{i}" for i in range(len(DOCS))],
+                },
+                self.model,
+            )["rankings"]
+        }
+        for r in rankings[:4]:
+            self.assertAlmostEqual(r["score"], full[r["doc_id"]], places=5)
+
+    def test_keep_and_k(self):
+        self.assertEqual(len(self.predict("green water", keep=2, k=3)), 3)
+        everything = self.predict("green water", keep=100)
+        self.assertEqual({r["stage"] for r in everything}, {"colbert"})
+
+    def test_invalid_keep(self):
+        for keep in (0, "3", None):
+            with self.subTest(keep=keep):
+                with self.assertRaises(ValueError):
+                    inference._validate(
+                        {
+                            "query": "q",
+                            "docs": DOCS,
+                            "doc_ids": list(range(len(DOCS))),
+                            "prefilter": {"keep": keep},
+                        }
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
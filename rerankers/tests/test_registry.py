@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import torch
+
+from embedding_cache import DocEmbeddingCache
+from registry import ModelRegistry, cache_memory_bytes, model_memory_bytes
+from score_cache import ENTRY_BYTES, ScoreCache, SqliteScoreCache
+
+MB = 1024 * 1024
+
+
+def make_registry(sizes: dict, budget: int, doc_cache_bytes: int = 0) -> ModelRegistry:
+    manifest = {
+        "default": next(iter(sizes)),
+        "models": {name: {"model_type": "colbert", "path": name} for name in sizes},
+    }
+
+    def loader(model_path, name, spec):
+        ranker = SimpleNamespace(model=SimpleNamespace(memory_bytes=sizes[name]))
+        if doc_cache_bytes:
+            ranker.doc_cache = DocEmbeddingCache(doc_cache_bytes)
+        return ranker
+
+    return ModelRegistry("model", manifest, loader, budget)
+
+
+class TestModelRegistry(unittest.TestCase):
+    def test_loads_once(self):
+        registry = make_registry({"a": MB}, 10 * MB)
+        self.assertIs(registry.get(), registry.get("a"))
+        self.assertEqual((registry.loads, registry.hits), (1, 1))
+
+    def test_lru_eviction(self):
+        registry = make_registry({"a": 4 * MB, "b": 4 * MB, "c": 4 * MB}, 10 * MB)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+
+        self.assertEqual(list(registry.stats()["loaded"]), ["a", "c"])
+        self.assertEqual(registry.evictions, 1)
+
+    def test_single_model_over_budget_is_kept(self):
+        registry = make_registry({"a": 20 * MB, "b": 20 * MB}, 10 * MB)
+        registry.get("a")
+        model = registry.get("b")
+        self.assertEqual(list(registry.stats()["loaded"]), ["b"])
+        self.assertIs(registry.get("b"), model)
+
+    def test_caches_count_against_budget(self):
+        """Test that cache capacity is charged with the weights, so fewer models stay loaded."""
+        registry = make_registry({"a": 2 * MB, "b": 2 * MB}, 10 * MB, 4 * MB)
+        registry.get("a")
+        registry.get("b")
+
+        self.assertEqual(registry.stats()["loaded"], {"b": 6 * MB})
+        self.assertEqual(registry.evictions, 1)
+
+    def test_cache_memory_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ranker = SimpleNamespace(
+                doc_cache=DocEmbeddingCache(MB),
+                score_cache=ScoreCache(max_entries=1000, ttl_seconds=60),
+            )
+            self.assertEqual(cache_memory_bytes(ranker), MB + 1000 * ENTRY_BYTES)
+
+            # a sqlite score cache keeps its entries on disk
+            ranker.score_cache = SqliteScoreCache(
+                os.path.join(tmp, "scores.sqlite"), 1000, 60
+            )
+            self.assertEqual(cache_memory_bytes(ranker), MB)
+            ranker.score_cache._db.close()
+        self.assertEqual(cache_memory_bytes(SimpleNamespace()), 0)
+
+    def test_unknown_model(self):
+        registry = make_registry({"a": MB}, 10 * MB)
+        with self.assertRaises(ValueError):
+            registry.get("missing")
+
+    def test_model_memory_bytes(self):
+        ranker = SimpleNamespace(model=torch.nn.Linear(4, 2))
+        # 4 * 2 weights and 2 biases, float32
+        self.assertEqual(model_memory_bytes(ranker), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, EmbeddingStoreWriter
+from score_cache import ScoreCache, SqliteScoreCache, score_keys
+
+
+def write_segment(store_dir: str, embeddings: dict) -> None:
+    with EmbeddingStoreWriter(store_dir, dim=4) as writer:
+        for doc_id, emb in embeddings.items():
+            writer.add(doc_id, emb)
+
+
+class TestScoreKeys(unittest.TestCase):
+    def test_documents_keyed_by_content(self):
+        """Test that the same text shares a key across doc_ids and edited text misses."""
+        keys = score_keys("query", ["same text", "same text", "other"], ["a", "b", "c"])
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+
+    def test_query_normalization(self):
+        self.assertEqual(
+            score_keys(" what  is\tcolbert ", ["doc"], ["a"]),
+            score_keys("what is colbert", ["doc"], ["a"]),
+        )
+        self.assertNotEqual(
+            score_keys("ColBERT", ["doc"], ["a"]), score_keys("colbert", ["doc"], ["a"])
+        )
+
+    def test_namespace(self):
+        self.assertNotEqual(
+            score_keys("query", ["doc"], ["a"], "model:fp32"),
+            score_keys("query", ["doc"], ["a"], "model:int8"),
+        )
+
+    def test_ids_only_keys_include_store_version(self):
+        """Test that ids-only scores do not survive a store update."""
+        before = score_keys("query", None, ["a", "b"], "model:fp32", "v1")
+        self.assertEqual(
+            before, score_keys("query", None, ["a", "b"], "model:fp32", "v1")
+        )
+        self.assertNotEqual(
+            before, score_keys("query", None, ["a", "b"], "model:fp32", "v2")
+        )
+        # texts are content-addressed, so their keys do not depend on the store
+        self.assertEqual(
+            score_keys("query", ["doc"], ["a"], "model:fp32", "v1"),
+            score_keys("query", ["doc"], ["a"], "model:fp32", "v2"),
+        )
+
+
+class TestStoreVersion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store_dir = os.path.join(self.tmp.name, "store")
+        rng = np.random.default_rng(0)
+        self.embeddings = {doc_id: rng.random((3, 4)) for doc_id in "abc"}
+
+    def test_stable_across_reopen(self):
+        write_segment(self.store_dir, self.embeddings)
+        self.assertEqual(
+            EmbeddingStore(self.store_dir).version,
+            EmbeddingStore(self.store_dir).version,
+        )
+
+    def test_new_segment_changes_version(self):
+        write_segment(self.store_dir, self.embeddings)
+        before = EmbeddingStore(self.store_dir).version
+        write_segment(self.store_dir, {"a": np.zeros((2, 4))})
+        self.assertNotEqual(EmbeddingStore(self.store_dir).version, before)
+
+    def test_rebuilt_store_changes_version(self):
+        """Test that a store rebuilt with the same segment names but new embeddings gets a new version."""
+        write_segment(self.store_dir, self.embeddings)
+        before = EmbeddingStore(self.store_dir).version
+
+        rebuilt_dir = os.path.join(self.tmp.name, "rebuilt")
+        write_segment(rebuilt_dir, {**self.embeddings, "a": np.zeros((3, 4))})
+        self.assertNotEqual(EmbeddingStore(rebuilt_dir).version, before)
+
+    def test_persisted_cache_misses_after_store_update(self):
+        """Test that a sqlite score cache reopened for an updated store does not serve old ids-only scores."""
+        path = os.path.join(self.tmp.name, "scores.sqlite")
+        write_segment(self.store_dir, self.embeddings)
+        version = EmbeddingStore(self.store_dir).version
+
+        cache = SqliteScoreCache(path, 100, 3600, "model:fp32", version)
+        keys = cache.keys("query", None, ["a"])
+        cache.put_many(keys, [1.5])
+        self.assertEqual(cache.get_many(keys), [1.5])
+
+        write_segment(self.store_dir, {"a": np.zeros((2, 4))})
+        version = EmbeddingStore(self.store_dir).version
+        cache = SqliteScoreCache(path, 100, 3600, "model:fp32", version)
+        self.assertEqual(cache.get_many(cache.keys("query", None, ["a"])), [None])
+
+
+class TestScoreCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ScoreCache(max_entries=2, ttl_seconds=3600)
+        cache.put_many(["a", "b"], [1.0, 2.0])
+        cache.get_many(["a"])
+        cache.put_many(["c"], [3.0])
+        self.assertEqual(cache.get_many(["a", "b", "c"]), [1.0, None, 3.0])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_expiry(self):
+        cache = ScoreCache(max_entries=10, ttl_seconds=0)
+        cache.put_many(["a"], [1.0])
+        self.assertEqual(cache.get_many(["a"]), [None])
+        self.assertEqual(cache.expirations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
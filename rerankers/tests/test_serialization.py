@@ -0,0 +1,128 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import inference
+import serialization
+from serialization import JSON, MSGPACK, NPZ, negotiate_accept
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+REQUEST = {
+    "query": "what is colbert",
+    "docs": ["colbert is a reranker", "paris is in france"],
+    "doc_ids": ["a", "b"],
+    "k": 2,
+}
+
+PREDICTION = {
+    "rankings": [
+        {"doc_id": "a", "score": 1.5, "stage": "colbert"},
+        {"doc_id": "b", "score": 0.25, "stage": "bm25"},
+    ]
+}
+
+MULTI_PREDICTION = {
+    "results": [
+        {"query": "q1", "rankings": [{"doc_id": "a", "score": 2.0}]},
+        {
+            "query": "q2",
+            "rankings": [{"doc_id": "b", "score": 1.0}, {"doc_id": "a", "score": 0.5}],
+        },
+    ]
+}
+
+
+def load_npz(body: bytes) -> dict:
+    with np.load(io.BytesIO(body)) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+class TestRequestDecoding(unittest.TestCase):
+    def test_json(self):
+        for body in (json.dumps(REQUEST), json.dumps(REQUEST).encode("utf-8")):
+            self.assertEqual(inference.input_fn(body, JSON), REQUEST)
+        self.assertEqual(
+            inference.input_fn(json.dumps(REQUEST), "application/json; charset=utf-8"),
+            REQUEST,
+        )
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        body = msgpack.packb(REQUEST, use_bin_type=True)
+        self.assertEqual(inference.input_fn(body, MSGPACK), REQUEST)
+
+    def test_unsupported_content_type(self):
+        with self.assertRaisesRegex(ValueError, "Unsupported content type"):
+            inference.input_fn(b"query=x", "application/x-www-form-urlencoded")
+
+
+class TestResponseEncoding(unittest.TestCase):
+    def test_json(self):
+        for prediction in (PREDICTION, MULTI_PREDICTION):
+            body = inference.output_fn(prediction, JSON)
+            self.assertEqual(json.loads(body), prediction)
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        for prediction in (PREDICTION, MULTI_PREDICTION):
+            body = inference.output_fn(prediction, MSGPACK)
+            self.assertEqual(msgpack.unpackb(body, raw=False), prediction)
+
+    def test_npz(self):
+        arrays = load_npz(inference.output_fn(PREDICTION, NPZ))
+        self.assertEqual(arrays["doc_ids"].tolist(), ["a", "b"])
+        self.assertEqual(arrays["scores"].dtype, np.float32)
+        self.assertEqual(arrays["scores"].tolist(), [1.5, 0.25])
+        self.assertEqual(arrays["stages"].tolist(), ["colbert", "bm25"])
+
+    def test_npz_multi_query(self):
+        arrays = load_npz(inference.output_fn(MULTI_PREDICTION, NPZ))
+        offsets = arrays["offsets"].tolist()
+        self.assertEqual(offsets, [0, 1, 3])
+        self.assertNotIn("stages", arrays)
+        for q, result in enumerate(MULTI_PREDICTION["results"]):
+            start, end = offsets[q], offsets[q + 1]
+            self.assertEqual(
+                arrays["doc_ids"][start:end].tolist(),
+                [r["doc_id"] for r in result["rankings"]],
+            )
+            self.assertEqual(
+                arrays["scores"][start:end].tolist(),
+                [r["score"] for r in result["rankings"]],
+            )
+
+    def test_unsupported_accept(self):
+        with self.assertRaisesRegex(ValueError, "Unsupported content type"):
+            inference.output_fn(PREDICTION, "text/csv")
+
+
+class TestNegotiateAccept(unittest.TestCase):
+    def test_first_supported_type_wins(self):
+        self.assertEqual(negotiate_accept(f"text/csv, {NPZ}, {JSON}"), NPZ)
+        self.assertEqual(negotiate_accept(f"{MSGPACK};q=1.0"), MSGPACK)
+
+    def test_wildcards_and_empty_fall_back_to_json(self):
+        for accept in ("*/*", "application/*", "", None):
+            with self.subTest(accept=accept):
+                self.assertEqual(negotiate_accept(accept), JSON)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            negotiate_accept("text/csv, text/plain")
+
+    def test_msgpack_skipped_without_msgpack(self):
+        with mock.patch.object(serialization, "msgpack", None):
+            self.assertEqual(negotiate_accept(f"{MSGPACK}, {JSON}"), JSON)
+            with self.assertRaises(ValueError):
+                negotiate_accept(MSGPACK)
+
+
+if __name__ == "__main__":
+    unittest.main()
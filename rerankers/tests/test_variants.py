@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import torch
+
+import inference
+from loading import load_ranker
+from tiny_colbert import DOCS, make_checkpoint
+from variants import INT8_FILE, export_int8, load_variant_model, quantize_int8
+
+
+class TestInt8Variant(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = make_checkpoint(cls.tmp.name)
+        cls.ranker = load_ranker(cls.model_dir)
+        export_int8(cls.ranker, cls.model_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_saved_as_state_dict(self):
+        """Test that the int8 file holds only tensors and loads with weights_only."""
+        state_dict = torch.load(
+            os.path.join(self.model_dir, INT8_FILE), weights_only=True
+        )
+        self.assertIsInstance(state_dict, dict)
+
+    def test_loaded_model_matches_quantized(self):
+        """Test that the rebuilt int8 model scores like the model it was saved from."""
+        int8 = load_ranker(self.model_dir, variant="int8")
+        reference = load_ranker(self.model_dir)
+        reference.model = quantize_int8(reference.model)
+
+        doc_ids = list(range(len(DOCS)))
+        scores = [
+            inference._document_scores(
+                ranker,
+                "cat on a mat",
+                DOCS,
+                doc_ids,
+                inference.BATCH_SIZE,
+                inference.MAX_BATCH_TOKENS,
+            )
+            for ranker in (int8, reference)
+        ]
+        for got, want in zip(*scores):
+            self.assertAlmostEqual(got, want, places=5)
+
+    def test_pickled_model_is_rejected(self):
+        """Test that an int8 file with a pickled module is not unpickled."""
+        with tempfile.TemporaryDirectory() as tmp:
+            model_dir = make_checkpoint(tmp)
+            torch.save(quantize_int8(self.ranker.model), os.path.join(tmp, INT8_FILE))
+            with self.assertRaisesRegex(ValueError, "--refresh"):
+                load_variant_model(model_dir, "int8")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tiny randomly initialized ColBERT checkpoint, saved like deploy.py saves a
+downloaded model, for tests that need a real model without a download.
+"""
+
+import os
+
+import torch
+from rerankers.models.colbert_ranker import ColBERTModel
+from transformers import BertConfig, BertTokenizerFast
+
+SPECIAL_TOKENS = [
+    "[PAD]",
+    "[unused0]",
+    "[unused1]",
+    "[UNK]",
+    "[CLS]",
+    "[SEP]",
+    "[MASK]",
+]
+
+WORDS = (
+    "the a of and to in is for on with that this are was be as by it at from "
+    "colbert reranker query document search score token embedding model cache "
+    "late interaction vector index batch fast slow small large cat dog sat mat "
+    "paris france capital city river bank money water green blue red"
+).split()
+
+DOCS = [
+    "the cat sat on the mat",
+    "paris is the capital of france",
+    "colbert is a late interaction reranker model",
+    "a river bank with green water",
+    "money in the bank is fast money",
+    "the blue dog and the red cat",
+    "search score for a query and a document",
+    "small model with a large cache",
+]
+
+
+def make_checkpoint(model_dir: str, seed: int = 0) -> str:
+    """
+    Write a two-layer ColBERT model and its tokenizer to model_dir.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    vocab_path = os.path.join(model_dir, "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(SPECIAL_TOKENS + WORDS))
+    tokenizer = BertTokenizerFast(vocab_file=vocab_path, do_lower_case=True)
+
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=128,
+    )
+    torch.manual_seed(seed)
+    model = ColBERTModel(config, verbose=0)
+    model.save_pretrained(model_dir, safe_serialization=True)
+    tokenizer.save_pretrained(model_dir)
+    return model_dir